@@ -1,76 +1,180 @@
 import os
 import json
-from datetime import datetime
-from typing import Dict, Any, Optional
-
-from dotenv import load_dotenv
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Callable
 
 from search_tool_manager import SearchToolManager
 from config_manager import ConfigManager
 from score_collector import ScoreCollector
 from pdf_generator import PDFGenerator
 from ai_agent_manager import AIAgentManager
+from template_report import TemplateReportGenerator
+from assessment_store import AssessmentStore, new_assessment_id
+from risk_scoring import RiskModel
+from metrics_history import MetricsHistory
+from telemetry import span, bind, ASSESSMENTS
+from structured_logging import get_logger, bind_assessment
+import profiling
+import cancellation
+
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), "public", "logo.jpg")
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
+
+log = get_logger("pipeline")
+
 
+def _llm_deadline_from_env() -> Optional[float]:
+	value = os.getenv("LLM_DEADLINE_SECONDS")
+	if not value:
+		return None
+	try:
+		return float(value)
+	except ValueError:
+		log.warning("Ignoring invalid LLM_DEADLINE_SECONDS", extra={"value": value})
+		return None
+
+
+def _run_stage_with_deadline(executor: ThreadPoolExecutor, stage: Callable[[], str], deadline_at: Optional[float], name: str) -> str:
+	cancellation.check(name)
+	if deadline_at is None and cancellation.current() is None:
+		return stage()
+	remaining = None
+	if deadline_at is not None:
+		remaining = deadline_at - time.monotonic()
+		if remaining <= 0:
+			raise FutureTimeoutError("LLM deadline already expired")
+	# A cancelled run stops waiting on the LLM call; the call itself finishes in the background.
+	return cancellation.wait_result(executor.submit(bind(profiling.follow(stage))), remaining, name)
 
-def run_pipeline(scores: dict[str, int], audio_path: list[str], sentiment_dir: Optional[str] = None, offline_sentiment: bool = False) -> Dict[str, Any]:
-	print("[STAGE] Loading environment variables...")
-	load_dotenv()
-	cfg_path = os.path.join(os.path.dirname(__file__), "Agents", "agent.yaml")
-	print(f"[STAGE] Loading agents config from {cfg_path}")
-	agents_cfg = ConfigManager.load_agents_config(cfg_path)
+
+def run_pipeline(
+	scores: dict[str, int],
+	audio_path: list[str],
+	sentiment_dir: Optional[str] = None,
+	offline_sentiment: bool = False,
+	fast: bool = False,
+	llm_deadline: Optional[float] = None,
+	lazy_pdf: Optional[bool] = None,
+	user_id: Optional[str] = None,
+	trials: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+	ConfigManager.load_env_once()
+	agents_cfg = ConfigManager.get_agents_config()
 	disclaimer = agents_cfg.get("disclaimer_line", "")
-	scores = ScoreCollector.collect_scores(scores,audio_path=audio_path, sentiment_dir=sentiment_dir, offline_sentiment=offline_sentiment)
+	scores = ScoreCollector.collect_scores(scores,audio_path=audio_path, sentiment_dir=sentiment_dir, offline_sentiment=offline_sentiment, trials=trials)
+	with span("risk_score"):
+		risk = RiskModel.current().score(scores)
+	scores["risk"] = risk
+	log.info("Risk scored", extra={"category": risk["category"], "probability": risk["probability"], "model_version": risk["model_version"]})
 
-	output_dir = os.path.join(os.path.dirname(__file__), "output")
+	output_dir = OUTPUT_DIR
 	os.makedirs(output_dir, exist_ok=True)
-	print(f"[INFO] Output directory: {output_dir}")
 
 	metrics_path = os.path.join(output_dir, "metrics_latest.json")
-	with open(metrics_path, "w", encoding="utf-8") as mf:
+	with span("artifact_write"), open(metrics_path, "w", encoding="utf-8") as mf:
 		json.dump(scores, mf, indent=2)
-	print(f"[INFO] Metrics JSON saved -> {metrics_path}")
+	log.info("Metrics JSON saved", extra={"path": metrics_path})
 
-	search_tool = SearchToolManager.initialize_search_tool()
-	agent_manager = AIAgentManager(agents_cfg, search_tool)
-	
-	print("[STAGE] Generating doctor report...")
-	doctor_report = agent_manager.generate_doctor_report(scores, disclaimer)
-	print(f"[DONE] Doctor report generated (length: {len(doctor_report)} chars)")
-	
-	print("[STAGE] Generating summary...")
-	summary_text = agent_manager.generate_summary(doctor_report, disclaimer)
-	print(f"[DONE] Summary generated (length: {len(summary_text)} chars)")
-	
-	print("[STAGE] Generating email...")
-	email_text = agent_manager.generate_email(summary_text, disclaimer)
-	print(f"[DONE] Email text generated (length: {len(email_text)} chars)")
-
-	timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-	pdf_path = os.path.join(output_dir, f"doctor_report_{timestamp}.pdf")
-	summary_path = os.path.join(output_dir, f"summary_{timestamp}.txt")
-	email_path = os.path.join(output_dir, f"email_{timestamp}.txt")
-
-	print("[STAGE] Generating PDF...")
-	PDFGenerator.generate_pdf(
-		logo_path=os.path.join(os.path.dirname(__file__), "public", "logo.jpg"),
-		title="ForeKnow", 
-		doctor_report=doctor_report, 
-		output_path=pdf_path, 
-		disclaimer=disclaimer,
-	)
+	doctor_report = summary_text = email_text = None
+	ai_service_status = "available"
+	if fast:
+		log.info("Fast mode requested; using template report")
+		ai_service_status = "bypassed"
+	else:
+		if llm_deadline is None:
+			llm_deadline = _llm_deadline_from_env()
+		deadline_at = time.monotonic() + llm_deadline if llm_deadline else None
+		# Stages that overrun the deadline keep running in the background; their result is discarded.
+		executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-stage")
+		try:
+			search_tool = SearchToolManager.initialize_search_tool()
+			agent_manager = AIAgentManager(agents_cfg, search_tool)
+
+			log.info("Generating doctor report")
+			with span("llm_doctor"):
+				doctor_report = _run_stage_with_deadline(executor, lambda: agent_manager.generate_doctor_report(scores, disclaimer), deadline_at, "llm_doctor")
+			log.info("Doctor report generated", extra={"chars": len(doctor_report)})
+
+			log.info("Generating summary")
+			with span("llm_summary"):
+				summary_text = _run_stage_with_deadline(executor, lambda: agent_manager.generate_summary(doctor_report, disclaimer), deadline_at, "llm_summary")
+			log.info("Summary generated", extra={"chars": len(summary_text)})
+
+			log.info("Generating email")
+			with span("llm_email"):
+				email_text = _run_stage_with_deadline(executor, lambda: agent_manager.generate_email(summary_text, disclaimer), deadline_at, "llm_email")
+			log.info("Email text generated", extra={"chars": len(email_text)})
+		except FutureTimeoutError:
+			log.warning("LLM deadline expired; using template for remaining outputs", extra={"deadline_seconds": llm_deadline})
+			ai_service_status = "timeout"
+		except Exception as e:
+			log.warning("AI generation failed; using template for remaining outputs", extra={"error": str(e)})
+			ai_service_status = "unavailable"
+		finally:
+			executor.shutdown(wait=False)
+
+	fallback_mode = doctor_report is None or summary_text is None or email_text is None
+	if doctor_report is None:
+		doctor_report = TemplateReportGenerator.generate_doctor_report(scores, disclaimer)
+	if summary_text is None:
+		summary_text = TemplateReportGenerator.generate_summary(scores, disclaimer)
+	if email_text is None:
+		email_text = TemplateReportGenerator.generate_email(scores, disclaimer)
+	if fallback_mode:
+		log.info("Assessment completed using fallback mode")
+
+	assessment_id = new_assessment_id()
+	bind_assessment(assessment_id)
+	pdf_path = os.path.join(output_dir, f"doctor_report_{assessment_id}.pdf")
+	summary_path = os.path.join(output_dir, f"summary_{assessment_id}.txt")
+	email_path = os.path.join(output_dir, f"email_{assessment_id}.txt")
+
+	cancellation.check("pdf_render")
+	if lazy_pdf is None:
+		lazy_pdf = os.getenv("PDF_RENDER_MODE", "eager").lower() == "lazy"
+	if lazy_pdf:
+		log.info("Storing report source; PDF renders on first download")
+		with span("artifact_write"):
+			PDFGenerator.save_report_source(pdf_path, title="ForeKnow", doctor_report=doctor_report, disclaimer=disclaimer)
+	else:
+		log.info("Generating PDF")
+		# Profiled runs render in-process so the layout code shows up in the profile.
+		render = PDFGenerator.generate_pdf if profiling.active() else PDFGenerator.render_in_pool
+		with span("pdf_render"):
+			render(
+				logo_path=LOGO_PATH,
+				title="ForeKnow", 
+				doctor_report=doctor_report, 
+				output_path=pdf_path, 
+				disclaimer=disclaimer,
+			)
 	
-	print("[STAGE] Saving text outputs...")
-	with open(summary_path, "w", encoding="utf-8") as sf:
-		sf.write(summary_text)
-	with open(email_path, "w", encoding="utf-8") as ef:
-		ef.write(email_text)
-
-	print("[OUTPUT] PDF report ->", pdf_path)
-	print("[OUTPUT] Summary text ->", summary_path)
-	print("[OUTPUT] Email text ->", email_path)
+	log.info("Saving text outputs")
+	assessment_metrics_path = os.path.join(output_dir, f"metrics_{assessment_id}.json")
+	with span("artifact_write"):
+		with open(summary_path, "w", encoding="utf-8") as sf:
+			sf.write(summary_text)
+		with open(email_path, "w", encoding="utf-8") as ef:
+			ef.write(email_text)
+		with open(assessment_metrics_path, "w", encoding="utf-8") as mf:
+			json.dump(scores, mf, indent=2)
+
+	artifacts = {"summary": summary_path, "email": email_path, "metrics": assessment_metrics_path, "pdf": pdf_path}
+	if lazy_pdf:
+		artifacts["pdf_source"] = PDFGenerator.source_path_for(pdf_path)
+	with span("index_write"):
+		AssessmentStore.for_output_dir(output_dir).record(assessment_id, scores, artifacts, risk=risk, fallback_mode=fallback_mode)
+		MetricsHistory.for_output_dir(output_dir).append(user_id, assessment_id, scores)
+	ASSESSMENTS.inc(ai_service_status=ai_service_status)
+
+	log.info("Assessment outputs written", extra={"pdf": pdf_path, "summary": summary_path, "email": email_path})
 	
 	return {
+		"assessment_id": assessment_id,
 		"scores": scores,
+		"risk": risk,
 		"doctor_report": doctor_report,
 		"summary": summary_text,
 		"email": email_text,
@@ -78,7 +182,8 @@ def run_pipeline(scores: dict[str, int], audio_path: list[str], sentiment_dir: O
 		"summary_path": summary_path,
 		"email_path": email_path,
 		"metrics_path": metrics_path,
-		"ai_service_status": "available"
+		"fallback_mode": fallback_mode,
+		"ai_service_status": ai_service_status,
 	}
 
 
@@ -1,16 +1,26 @@
+from typing import List, Sequence, Tuple
+
+from game_scoring import GameScorer
+
+
 class Marks:
-    def __init__(self,actual_words: list[str],guessed_words: list[str]):
+    """Word-recall credit: every guessed word that matches a target word scores once per target occurrence."""
+
+    def __init__(self, actual_words: list[str], guessed_words: list[str]):
         self.score: int = 0
-        self.actual_words = actual_words
-        self.guessed_words = guessed_words
+        self.actual_words = list(actual_words)
+        self.guessed_words = list(guessed_words)
+
+    @staticmethod
+    def credit_batch(pairs: Sequence[Tuple[Sequence[str], Sequence[str]]]) -> List[int]:
+        """Credits for many (actual_words, guessed_words) pairs in one vectorised call."""
+        sessions = [[{"target": list(actual), "response": list(guessed)}] for actual, guessed in pairs]
+        return [row["items_correct"] for row in GameScorer.score_memory(sessions)]
+
+    def add_score(self) -> int:
+        # Recomputed from the word lists, so repeated calls do not accumulate.
+        self.score = self.credit_batch([(self.actual_words, self.guessed_words)])[0]
+        return self.score
 
-    def add_score(self):
-        words_comp : dict[str, int] = {}
-        for word in self.actual_words:
-            words_comp[word] = words_comp.get(word, 0) + 1
-        for word in self.guessed_words:
-            if word in words_comp and words_comp[word] == 1:
-                self.score += 1
-    
     def return_score(self) -> int:
         return self.score
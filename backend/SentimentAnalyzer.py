@@ -1,57 +1,37 @@
 from typing import Any, Dict
 import os
-import shutil
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from SpeechToText import SpeechToTextAnalyzer
+from model_artifacts import DEFAULT_SENTIMENT_MODEL, ArtifactError, load_sentiment, sentiment_dir
+from model_cache import MODEL_CACHE
+from structured_logging import get_logger
+
+log = get_logger("sentiment")
 
 
 class SentimentAnalyzer:
-    def __init__(self, model_name: str = "tabularisai/multilingual-sentiment-analysis", cache_dir: str | None = None, offline: bool = False) -> None:
-        env_dir = os.getenv("SENTIMENT_MODEL_DIR")
-        if cache_dir is None and env_dir:
-            cache_dir = env_dir
-        if cache_dir is None:
-            cache_dir = r"D:\\Models\\Sentiment"
+    def __init__(self, model_name: str = DEFAULT_SENTIMENT_MODEL, cache_dir: str | None = None, offline: bool = False) -> None:
         self.model_name = model_name
-        self.cache_dir = cache_dir
+        self.cache_dir = cache_dir or sentiment_dir()
+        # Loading never downloads any more; offline only changes how loudly a missing model is logged.
         self.offline = offline or bool(os.getenv("SENTIMENT_OFFLINE"))
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.labels = ["very negative", "negative", "neutral", "positive", "very positive"]
         self.weights = [0.2, 0.4, 0.6, 0.8, 1.0]
 
-    def _snapshot_root(self) -> str:
-        return os.path.join(self.cache_dir, "models--" + self.model_name.replace("/", "--"))
-
     def ensure_model(self) -> Any:
-        os.makedirs(self.cache_dir, exist_ok=True)
-        print(f"[SENTIMENT] Using cache dir: {self.cache_dir}")
-        # Check for existing model files to avoid unnecessary downloads
-        snapshot_root = self._snapshot_root()
-        force_download = False
-        if not os.path.isdir(snapshot_root):
-            print("[SENTIMENT] Local snapshot not found.")
-        else:
-            print("[SENTIMENT] Found existing snapshot; loading without forced download.")
-        local_only_flag = self.offline
-        if self.offline and not os.path.isdir(snapshot_root):
-            print("[SENTIMENT] Offline mode AND model not present -> will use fallback heuristic sentiment.")
-            return None, None
+        """(tokenizer, model) shared through MODEL_CACHE; the heuristic fallback (None, None) is not cached."""
+        key = ("sentiment", self.model_name, self.device, os.path.abspath(self.cache_dir))
+        return MODEL_CACHE.get_or_load(key, self._load_model, cache_if=lambda loaded: loaded[1] is not None)
+
+    def _load_model(self) -> Any:
         try:
-            tok = AutoTokenizer.from_pretrained(self.model_name, cache_dir=self.cache_dir, local_files_only=local_only_flag)
-            mdl = AutoModelForSequenceClassification.from_pretrained(self.model_name, cache_dir=self.cache_dir, torch_dtype=torch.float32, local_files_only=local_only_flag)
-        except OSError as e:
-            if self.offline:
-                print(f"[SENTIMENT] Offline load failed: {e}; using fallback heuristic sentiment.")
-                return None, None
-            print(f"[SENTIMENT] Standard load failed: {e}")
-            if os.path.isdir(snapshot_root):
-                print("[SENTIMENT] Corrupted snapshot detected; removing and retrying download.")
-                shutil.rmtree(snapshot_root, ignore_errors=True)
-            tok = AutoTokenizer.from_pretrained(self.model_name, cache_dir=self.cache_dir, force_download=True)
-            mdl = AutoModelForSequenceClassification.from_pretrained(self.model_name, cache_dir=self.cache_dir, force_download=True, torch_dtype=torch.float32)
-        mdl.to(self.device)
-        return tok, mdl
+            return load_sentiment(self.cache_dir, self.model_name, self.device)
+        except (ArtifactError, OSError) as e:
+            # Never delete or re-download here; a bad snapshot is replaced with `python -m model_artifacts fetch`.
+            level = log.warning if self.offline else log.error
+            level("Sentiment model unavailable; using fallback heuristic sentiment", extra={"cache_dir": self.cache_dir, "error": str(e)})
+            return None, None
 
     def get_text(self) -> str:
         stt = SpeechToTextAnalyzer()
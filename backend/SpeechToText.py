@@ -1,23 +1,44 @@
 import os
 import shutil
+import threading
+import weakref
 from typing import Any, Dict, Optional
 import json as js
 import numpy as np
 import torch
-import whisper as ws
+
+from model_artifacts import load_whisper, whisper_dir, whisper_size
+from model_cache import MODEL_CACHE
+from structured_logging import get_logger
+
+log = get_logger("stt")
+
+# Whisper's decoder installs kv-cache hooks on the model for each transcribe call, so a model
+# shared through MODEL_CACHE must only transcribe one file at a time.
+_transcribe_locks: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+_transcribe_locks_guard = threading.Lock()
+
+
+def _transcribe_lock(model: Any) -> threading.Lock:
+    with _transcribe_locks_guard:
+        lock = _transcribe_locks.get(model)
+        if lock is None:
+            lock = _transcribe_locks[model] = threading.Lock()
+        return lock
+
 
 class SpeechToTextAnalyzer:
 
     def __init__(
         self,
         audio_path: str = r"d:\ForeKnow\backend\audio\audio2.mp3",
-        cache_dir: str = r"D:\Models\whisper_cache",
-        model_size: str = "small",
+        cache_dir: Optional[str] = None,
+        model_size: Optional[str] = None,
         save_json_path: Optional[str] = "transcription.json",
     ) -> None:
         self.audio_path = audio_path
-        self.cache_dir = cache_dir
-        self.model_size = model_size
+        self.cache_dir = cache_dir or whisper_dir()
+        self.model_size = model_size or whisper_size()
         self.save_json_path = save_json_path
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
 
@@ -33,28 +54,24 @@ class SpeechToTextAnalyzer:
         }
         return info
 
-    def _model_file_path(self) -> str:
-        return os.path.join(self.cache_dir, f"{self.model_size}.pt")
-
     def ensure_model(self) -> Any:
-        os.makedirs(self.cache_dir, exist_ok=True)
-        model_file = self._model_file_path()
-        if not os.path.exists(model_file):
-            print(f"Model weights not found -> downloading to {model_file}...")
-        else:
-            print(f"Model weights found at {model_file} -> loading without download.")
+        """Whisper model for this size/device, loaded once per process and shared through MODEL_CACHE."""
+        key = ("whisper", self.model_size, self.device, os.path.abspath(self.cache_dir))
+        return MODEL_CACHE.get_or_load(key, self._load_model)
 
-        model = ws.load_model(self.model_size, device=self.device, download_root=self.cache_dir)
-        return model
+    def _load_model(self) -> Any:
+        # Local files only: weights are fetched ahead of time with `python -m model_artifacts fetch`.
+        return load_whisper(self.cache_dir, self.model_size, self.device)
 
     def transcribe(self, model: Any) -> Dict[str, Any]:
         if not os.path.exists(self.audio_path):
             raise FileNotFoundError(f"Audio file not found: {self.audio_path}")
-        result: Dict[str, Any] = model.transcribe(
-            self.audio_path,
-            fp16=False,
-            word_timestamps=True,
-        ) 
+        with _transcribe_lock(model):
+            result: Dict[str, Any] = model.transcribe(
+                self.audio_path,
+                fp16=False,
+                word_timestamps=True,
+            )
         if self.save_json_path:
             with open(self.save_json_path, "w", encoding="utf-8") as f:
                 js.dump(result, f, ensure_ascii=False, indent=4)
@@ -134,7 +151,7 @@ class SpeechToTextAnalyzer:
         setup = self.get_setup_info()
         model = self.ensure_model()
         transcription = self.transcribe(model)
-        print(f"{transcription}")
+        log.debug("Transcription", extra={"transcription": transcription})
         results = self.compute_metrics(transcription)
         return {"setup": setup, "results": results}
 
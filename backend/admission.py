@@ -0,0 +1,127 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from structured_logging import get_logger
+from telemetry import REGISTRY, current_timings
+
+
+log = get_logger("admission")
+
+ADMISSION_WAIT = REGISTRY.histogram("foreknow_admission_wait_seconds", "Time assessment requests waited for a pipeline slot.")
+ADMISSION_REJECTIONS = REGISTRY.counter("foreknow_admission_rejections_total", "Assessment requests turned away with 429 by reason (queue_full, wait_timeout).", ("reason",))
+
+# Used for Retry-After until the first pipeline run has been timed.
+DEFAULT_SERVICE_SECONDS = 30.0
+_SERVICE_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+	"""Raised when a request cannot get a pipeline slot; retry_after is whole seconds."""
+
+	def __init__(self, reason: str, retry_after: int):
+		super().__init__(f"Server is at capacity ({reason}); retry in {retry_after}s")
+		self.reason = reason
+		self.retry_after = retry_after
+
+
+class AdmissionController:
+	"""Bounded concurrency for the assessment pipeline with a bounded FIFO wait queue.
+
+	At most `slots` requests run the pipeline at once and at most `queue_size` wait for a slot, each
+	for up to `max_wait` seconds. Anything beyond that is rejected immediately with a Retry-After
+	estimated from how long recent runs held their slot. State lives on the event loop, so limits
+	are per worker process. slots <= 0 admits everything.
+	"""
+
+	def __init__(self, slots: int, queue_size: int, max_wait: float):
+		self.slots = slots
+		self.queue_size = queue_size
+		self.max_wait = max_wait
+		self.active = 0
+		self._waiters: Deque[asyncio.Future] = deque()
+		self._service_seconds: Optional[float] = None
+
+	@property
+	def queued(self) -> int:
+		return len(self._waiters)
+
+	def retry_after(self) -> int:
+		"""Seconds until a request arriving now could expect a slot: the queue ahead of it drained by all slots."""
+		service = self._service_seconds or DEFAULT_SERVICE_SECONDS
+		return max(1, math.ceil((self.queued + 1) * service / max(1, self.slots)))
+
+	def _reject(self, reason: str) -> AdmissionRejected:
+		ADMISSION_REJECTIONS.inc(reason=reason)
+		retry_after = self.retry_after()
+		log.warning("Assessment rejected", extra={"reason": reason, "active": self.active, "queued": self.queued, "retry_after": retry_after})
+		return AdmissionRejected(reason, retry_after)
+
+	async def acquire(self) -> float:
+		"""Wait for a pipeline slot and return when it was granted; raises AdmissionRejected."""
+		started = time.perf_counter()
+		if self.slots <= 0 or (self.active < self.slots and not self._waiters):
+			self.active += 1
+		elif len(self._waiters) >= self.queue_size:
+			raise self._reject("queue_full")
+		else:
+			waiter = asyncio.get_running_loop().create_future()
+			self._waiters.append(waiter)
+			try:
+				await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+			except asyncio.TimeoutError:
+				if self._abandon(waiter):
+					raise self._reject("wait_timeout")
+			except asyncio.CancelledError:
+				if not self._abandon(waiter):
+					self._release_slot()
+				raise
+		granted = time.perf_counter()
+		ADMISSION_WAIT.observe(granted - started)
+		timings = current_timings()
+		if timings is not None:
+			timings.add("admission_wait", granted - started)
+		return granted
+
+	def _abandon(self, waiter: asyncio.Future) -> bool:
+		"""Leave the queue; False when a slot was handed to this waiter just before it gave up."""
+		if waiter.done():
+			return False
+		waiter.cancel()
+		if waiter in self._waiters:
+			self._waiters.remove(waiter)
+		return True
+
+	def release(self, granted: float) -> None:
+		held = time.perf_counter() - granted
+		self._service_seconds = held if self._service_seconds is None else (1 - _SERVICE_EWMA_ALPHA) * self._service_seconds + _SERVICE_EWMA_ALPHA * held
+		self._release_slot()
+
+	def _release_slot(self) -> None:
+		# Hand the slot straight to the oldest waiter so a new arrival cannot overtake the queue.
+		while self._waiters:
+			waiter = self._waiters.popleft()
+			if not waiter.done():
+				# Thread-safe because the waiter may belong to another event loop (e.g. TestClient).
+				waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+				return
+		self.active -= 1
+
+	def _hand_over(self, waiter: asyncio.Future) -> None:
+		if waiter.done():
+			# It gave up between being picked and being woken; pass the slot on.
+			self._release_slot()
+		else:
+			waiter.set_result(None)
+
+
+PIPELINE_ADMISSION = AdmissionController(
+	slots=int(os.getenv("PIPELINE_SLOTS", "2")),
+	queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "8")),
+	max_wait=float(os.getenv("PIPELINE_QUEUE_TIMEOUT_SECONDS", "120")),
+)
+REGISTRY.gauge("foreknow_admission_active", "Assessment pipelines currently running.", callback=lambda: PIPELINE_ADMISSION.active)
+REGISTRY.gauge("foreknow_admission_queue_depth", "Assessment requests waiting for a pipeline slot.", callback=lambda: PIPELINE_ADMISSION.queued)
@@ -1,8 +1,16 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from crewai import LLM, Agent, Task, Crew
 
 from retry_manager import RetryManager
 from prompt_builder import PromptBuilder
+from structured_logging import get_logger
+
+
+log = get_logger("agents")
+
+
+# LLM clients are keyed by model name and shared by every request and stage.
+_llm_cache: Dict[str, LLM] = {}
 
 
 class AIAgentManager:
@@ -11,14 +19,20 @@ class AIAgentManager:
 		self.agents_config = agents_config
 		self.search_tool = search_tool
 	
-	def _create_agent(self, section: str, verbose: bool = False):
+	def _stage_search(self) -> Optional[Any]:
+		"""The search tool for one generate_* call. It is created outside the retried closure, so its call budget covers every attempt."""
+		return self.search_tool.for_stage() if self.search_tool else None
+
+	def _create_agent(self, section: str, search: Optional[Any] = None, verbose: bool = False):
 		spec = self.agents_config[section]
 		llm_name = spec["llm"]
-		print(f"[AGENT] Initializing {section} with model {llm_name}")
-		llm = LLM(model=llm_name)
+		llm = _llm_cache.get(llm_name)
+		if llm is None:
+			log.info("Initializing LLM client", extra={"section": section, "model": llm_name})
+			llm = _llm_cache.setdefault(llm_name, LLM(model=llm_name))
 		kwargs = {}
-		if self.search_tool:
-			kwargs["tools"] = [self.search_tool]
+		if search is not None:
+			kwargs["tools"] = [search.as_crewai_tool()]
 		return Agent(
 			role=spec["role"],
 			goal=spec["goal"],
@@ -31,8 +45,10 @@ class AIAgentManager:
 
     #TODO: Fix it
 	def generate_doctor_report(self, scores: Dict[str, Any], disclaimer: str) -> str:
+		search = self._stage_search()
+
 		def run_doctor_analysis() -> str:
-			evaluator_agent = self._create_agent("clinical_evaluator", verbose=True)
+			evaluator_agent = self._create_agent("clinical_evaluator", search, verbose=True)
 			doctor_task = Task(
 				description=PromptBuilder.build_doctor_prompt(scores, disclaimer),
 				agent=evaluator_agent,
@@ -41,43 +57,47 @@ class AIAgentManager:
 					"Heuristic Cognitive Risk Assessment, Integrated Interpretation, Recommendations, Disclaimer"
 				),
 			)
-			print("[STAGE] Running clinical evaluator agent...")
+			log.info("Running clinical evaluator agent")
 			crew_doctor = Crew(agents=[evaluator_agent], tasks=[doctor_task])
 			return str(crew_doctor.kickoff())
 		
-		result = RetryManager.retry_with_backoff(run_doctor_analysis, max_retries=3)
+		result = RetryManager.retry_with_backoff(run_doctor_analysis, max_retries=3, stage="llm_doctor")
 		if result is None:
 			raise Exception("Doctor report generation failed after all retries")
 		return str(result)
 	
 	def generate_summary(self, doctor_report: str, disclaimer: str) -> str:
+		search = self._stage_search()
+
 		def run_summary_analysis():
-			summary_agent = self._create_agent("summary_analyst")
+			summary_agent = self._create_agent("summary_analyst", search)
 			summary_task = Task(
 				description=PromptBuilder.build_summary_prompt(doctor_report, disclaimer),
 				agent=summary_agent,
 				expected_output="Summary paragraph, bullet highlights, checklist, disclaimer",
 			)
-			print("[STAGE] Running summary agent...")
+			log.info("Running summary agent")
 			return str(Crew(agents=[summary_agent], tasks=[summary_task]).kickoff())
 		
-		result = RetryManager.retry_with_backoff(run_summary_analysis, max_retries=2)
+		result = RetryManager.retry_with_backoff(run_summary_analysis, max_retries=2, stage="llm_summary")
 		if result is None:
 			raise Exception("Summary generation failed after all retries")
 		return str(result)
 	
 	def generate_email(self, summary_text: str, disclaimer: str) -> str:
+		search = self._stage_search()
+
 		def run_email_analysis():
-			email_agent = self._create_agent("email_composer")
+			email_agent = self._create_agent("email_composer", search)
 			email_task = Task(
 				description=PromptBuilder.build_email_prompt(summary_text, disclaimer),
 				agent=email_agent,
 				expected_output="A concise, empathetic email with disclaimer",
 			)
-			print("[STAGE] Running email agent...")
+			log.info("Running email agent")
 			return str(Crew(agents=[email_agent], tasks=[email_task]).kickoff())
 		
-		result = RetryManager.retry_with_backoff(run_email_analysis, max_retries=2)
+		result = RetryManager.retry_with_backoff(run_email_analysis, max_retries=2, stage="llm_email")
 		if result is None:
 			raise Exception("Email generation failed after all retries")
 		return str(result)
\ No newline at end of file
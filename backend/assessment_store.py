@@ -0,0 +1,318 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from structured_logging import get_logger
+
+
+log = get_logger("store")
+
+
+# Ids are the UTC creation time plus a random suffix, so runs finishing in the same second (threads,
+# queue workers, batch processes) never share an index row or artifact filenames. Ids from before
+# the suffix was added have none and are still accepted.
+ASSESSMENT_ID_FORMAT = "%Y%m%d_%H%M%S"
+ASSESSMENT_ID_RE = re.compile(r"^\d{8}_\d{6}(_[0-9a-f]{8})?$")
+ARTIFACT_PREFIXES = {
+	"pdf": "doctor_report_",
+	"summary": "summary_",
+	"email": "email_",
+	"metrics": "metrics_",
+}
+# Optional per-request profiles (profiling.py) share the "profile_" prefix and differ by extension.
+PROFILE_ARTIFACT_SUFFIXES = {
+	"profile_folded": ".folded",
+	"profile_pstats": ".prof",
+	"profile_report": ".txt",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+	id TEXT PRIMARY KEY,
+	created_at TEXT NOT NULL,
+	stroop_colour REAL,
+	memory_game REAL,
+	image_recall REAL,
+	risk_category TEXT,
+	risk_probability REAL,
+	fallback_mode INTEGER NOT NULL DEFAULT 0,
+	risk_model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_assessments_created_at ON assessments(created_at);
+CREATE TABLE IF NOT EXISTS artifacts (
+	assessment_id TEXT NOT NULL REFERENCES assessments(id) ON DELETE CASCADE,
+	kind TEXT NOT NULL,
+	path TEXT NOT NULL,
+	size_bytes INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (assessment_id, kind)
+);
+CREATE TABLE IF NOT EXISTS meta (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+"""
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit.
+_IN_CHUNK = 900
+
+# Columns added after the first release; ALTERed into existing databases on open.
+_ADDED_COLUMNS = {
+	"assessments": [("risk_model_version", "TEXT")],
+}
+
+
+def new_assessment_id(now: Optional[datetime] = None) -> str:
+	return f"{(now or datetime.utcnow()).strftime(ASSESSMENT_ID_FORMAT)}_{uuid.uuid4().hex[:8]}"
+
+
+def assessment_created_at(assessment_id: str) -> Optional[datetime]:
+	"""The creation time encoded in an assessment id, or None if it is not one."""
+	if not ASSESSMENT_ID_RE.match(assessment_id):
+		return None
+	try:
+		return datetime.strptime(assessment_id[:15], ASSESSMENT_ID_FORMAT)
+	except ValueError:
+		return None
+
+
+class AssessmentStore:
+	"""SQLite index of assessments and their artifacts in the output directory."""
+
+	_instances: Dict[str, "AssessmentStore"] = {}
+	_instances_lock = threading.Lock()
+
+	def __init__(self, output_dir: str, db_path: Optional[str] = None):
+		self.output_dir = output_dir
+		self.db_path = db_path or os.path.join(output_dir, "assessments.db")
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+		self._conn.row_factory = sqlite3.Row
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA foreign_keys=ON")
+		self._conn.executescript(_SCHEMA)
+		self._migrate()
+		if self._meta("backfilled") is None:
+			self.backfill_from_directory()
+
+	@classmethod
+	def for_output_dir(cls, output_dir: str) -> "AssessmentStore":
+		with cls._instances_lock:
+			store = cls._instances.get(output_dir)
+			if store is None:
+				store = cls._instances[output_dir] = cls(output_dir)
+			return store
+
+	def _migrate(self) -> None:
+		for table, columns in _ADDED_COLUMNS.items():
+			existing = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+			for name, column_type in columns:
+				if name not in existing:
+					self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+	def _meta(self, key: str) -> Optional[str]:
+		row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+		return row["value"] if row else None
+
+	@staticmethod
+	def _file_size(path: str) -> int:
+		try:
+			return os.path.getsize(path)
+		except OSError:
+			return 0
+
+	def record(self, assessment_id: str, scores: Dict[str, Any], artifacts: Dict[str, str], risk: Optional[Dict[str, Any]] = None, fallback_mode: bool = False) -> None:
+		"""Insert or replace an assessment and its artifact paths/sizes in one transaction."""
+		created_at = assessment_created_at(assessment_id)
+		if created_at is None:
+			raise ValueError(f"Not an assessment id: {assessment_id!r}")
+		risk = risk or {}
+		with self._lock, self._conn:
+			self._conn.execute("DELETE FROM artifacts WHERE assessment_id = ?", (assessment_id,))
+			self._conn.execute(
+				"INSERT OR REPLACE INTO assessments (id, created_at, stroop_colour, memory_game, image_recall, risk_category, risk_probability, fallback_mode, risk_model_version) "
+				"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				(
+					assessment_id, created_at.isoformat(),
+					scores.get("stroop_colour"), scores.get("memory_game"), scores.get("image_recall"),
+					risk.get("category"), risk.get("probability"), int(bool(fallback_mode)), risk.get("model_version"),
+				),
+			)
+			self._conn.executemany(
+				"INSERT INTO artifacts (assessment_id, kind, path, size_bytes) VALUES (?, ?, ?, ?)",
+				[(assessment_id, kind, path, self._file_size(path)) for kind, path in artifacts.items()],
+			)
+
+	def add_artifacts(self, assessment_id: str, artifacts: Dict[str, str]) -> None:
+		"""Attach artifacts written after the assessment was recorded (e.g. its profile)."""
+		with self._lock, self._conn:
+			self._conn.executemany(
+				"INSERT OR REPLACE INTO artifacts (assessment_id, kind, path, size_bytes) VALUES (?, ?, ?, ?)",
+				[(assessment_id, kind, path, self._file_size(path)) for kind, path in artifacts.items()],
+			)
+
+	def update_artifact_size(self, assessment_id: str, kind: str) -> None:
+		with self._lock, self._conn:
+			row = self._conn.execute("SELECT path FROM artifacts WHERE assessment_id = ? AND kind = ?", (assessment_id, kind)).fetchone()
+			if row:
+				self._conn.execute(
+					"UPDATE artifacts SET size_bytes = ? WHERE assessment_id = ? AND kind = ?",
+					(self._file_size(row["path"]), assessment_id, kind),
+				)
+
+	def update_risk(self, results: Dict[str, Dict[str, Any]]) -> None:
+		"""Overwrite the stored risk of each assessment id, e.g. after re-scoring with a new model."""
+		with self._lock, self._conn:
+			self._conn.executemany(
+				"UPDATE assessments SET risk_category = ?, risk_probability = ?, risk_model_version = ? WHERE id = ?",
+				[(r.get("category"), r.get("probability"), r.get("model_version"), i) for i, r in results.items()],
+			)
+
+	def artifact_paths(self, ids: List[str], kind: str) -> Dict[str, str]:
+		paths: Dict[str, str] = {}
+		with self._lock:
+			for offset in range(0, len(ids), _IN_CHUNK):
+				chunk = ids[offset:offset + _IN_CHUNK]
+				rows = self._conn.execute(
+					f"SELECT assessment_id, path FROM artifacts WHERE kind = ? AND assessment_id IN ({','.join('?' * len(chunk))})",
+					[kind, *chunk],
+				).fetchall()
+				paths.update((row["assessment_id"], row["path"]) for row in rows)
+		return paths
+
+	def _with_artifacts(self, rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+		if not rows:
+			return []
+		ids = [row["id"] for row in rows]
+		placeholders = ",".join("?" * len(ids))
+		artifacts: Dict[str, Dict[str, Any]] = {i: {} for i in ids}
+		for art in self._conn.execute(f"SELECT * FROM artifacts WHERE assessment_id IN ({placeholders})", ids):
+			artifacts[art["assessment_id"]][art["kind"]] = {"filename": os.path.basename(art["path"]), "size_bytes": art["size_bytes"]}
+		results = []
+		for row in rows:
+			item = dict(row)
+			item["fallback_mode"] = bool(item["fallback_mode"])
+			item["artifacts"] = artifacts[row["id"]]
+			results.append(item)
+		return results
+
+	def latest(self) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			rows = self._conn.execute("SELECT * FROM assessments ORDER BY created_at DESC, id DESC LIMIT 1").fetchall()
+			results = self._with_artifacts(rows)
+		return results[0] if results else None
+
+	def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			rows = self._conn.execute("SELECT * FROM assessments WHERE id = ?", (assessment_id,)).fetchall()
+			results = self._with_artifacts(rows)
+		return results[0] if results else None
+
+	def list_assessments(self, limit: int = 20, before: Optional[str] = None) -> List[Dict[str, Any]]:
+		"""Newest first, keyset-paginated: pass the last id of a page as `before` for the next one.
+
+		Ties on created_at (several assessments in one second) are broken by id, so none is skipped.
+		"""
+		with self._lock:
+			if before:
+				rows = self._conn.execute(
+					"SELECT * FROM assessments WHERE (created_at, id) < (SELECT created_at, id FROM assessments WHERE id = ?) "
+					"ORDER BY created_at DESC, id DESC LIMIT ?",
+					(before, limit),
+				).fetchall()
+			else:
+				rows = self._conn.execute("SELECT * FROM assessments ORDER BY created_at DESC, id DESC LIMIT ?", (limit,)).fetchall()
+			return self._with_artifacts(rows)
+
+	def select_ids(self, ids: Optional[List[str]] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+		clauses, params = [], []
+		if ids:
+			clauses.append(f"id IN ({','.join('?' * len(ids))})")
+			params.extend(ids)
+		if start:
+			clauses.append("created_at >= ?")
+			params.append(start.replace(tzinfo=None).isoformat())
+		if end:
+			clauses.append("created_at <= ?")
+			params.append(end.replace(tzinfo=None).isoformat())
+		where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+		with self._lock:
+			rows = self._conn.execute(f"SELECT id FROM assessments {where} ORDER BY created_at, id", params).fetchall()
+		return [row["id"] for row in rows]
+
+	def total_size(self) -> int:
+		with self._lock:
+			return int(self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM artifacts").fetchone()[0])
+
+	def evict(self, max_age_days: Optional[float] = None, max_total_bytes: Optional[int] = None) -> List[str]:
+		"""Delete the oldest assessments (files and rows) beyond the age or total-size budget."""
+		evicted: List[str] = []
+		with self._lock:
+			rows = self._conn.execute(
+				"SELECT a.id, a.created_at, COALESCE(SUM(f.size_bytes), 0) AS size FROM assessments a "
+				"LEFT JOIN artifacts f ON f.assessment_id = a.id GROUP BY a.id ORDER BY a.created_at"
+			).fetchall()
+			total = sum(row["size"] for row in rows)
+			cutoff = (datetime.utcnow() - timedelta(days=max_age_days)).isoformat() if max_age_days is not None else None
+			for row in rows:
+				too_old = cutoff is not None and row["created_at"] < cutoff
+				too_big = max_total_bytes is not None and total > max_total_bytes
+				if not (too_old or too_big):
+					break
+				evicted.append(row["id"])
+				total -= row["size"]
+			if not evicted:
+				return evicted
+			placeholders = ",".join("?" * len(evicted))
+			paths = [r["path"] for r in self._conn.execute(f"SELECT path FROM artifacts WHERE assessment_id IN ({placeholders})", evicted)]
+			with self._conn:
+				self._conn.execute(f"DELETE FROM assessments WHERE id IN ({placeholders})", evicted)
+		for path in paths:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+		log.info("Evicted assessments", extra={"count": len(evicted)})
+		return evicted
+
+	@staticmethod
+	def _is_assessment_id(value: str) -> bool:
+		return assessment_created_at(value) is not None
+
+	def backfill_from_directory(self) -> None:
+		"""Index artifacts written before the store existed; runs once per database."""
+		found: Dict[str, Dict[str, str]] = {}
+		for name in os.listdir(self.output_dir):
+			if name.startswith("profile_"):
+				for kind, suffix in PROFILE_ARTIFACT_SUFFIXES.items():
+					assessment_id = name[len("profile_"):-len(suffix)]
+					if name.endswith(suffix) and self._is_assessment_id(assessment_id):
+						found.setdefault(assessment_id, {})[kind] = os.path.join(self.output_dir, name)
+				continue
+			for kind, prefix in ARTIFACT_PREFIXES.items():
+				if not name.startswith(prefix):
+					continue
+				assessment_id = name[len(prefix):].split(".", 1)[0]
+				if not self._is_assessment_id(assessment_id):
+					continue
+				if name.endswith(".source.json"):
+					kind = "pdf_source"
+				found.setdefault(assessment_id, {})[kind] = os.path.join(self.output_dir, name)
+		for assessment_id, artifacts in found.items():
+			scores: Dict[str, Any] = {}
+			if "metrics" in artifacts:
+				try:
+					with open(artifacts["metrics"], "r", encoding="utf-8") as f:
+						scores = json.load(f)
+				except (OSError, ValueError):
+					scores = {}
+			if "pdf" not in artifacts and "pdf_source" in artifacts:
+				artifacts["pdf"] = artifacts["pdf_source"][:-len(".source.json")] + ".pdf"
+			self.record(assessment_id, scores, artifacts, risk=scores.get("risk"))
+		with self._lock, self._conn:
+			self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', ?)", (datetime.utcnow().isoformat(),))
+		log.info("Indexed existing assessments", extra={"count": len(found), "output_dir": self.output_dir})
@@ -0,0 +1,585 @@
+"""
+Batch assessment: run the speech, sentiment and risk pipeline over recorded datasets.
+
+    cd backend
+    python -m batch_assess recordings/ --output runs/study1
+    python -m batch_assess manifest.csv --output runs/study1 --workers 4 --llm
+
+The input is a directory, where every audio file below it is one item, or a manifest (.csv or
+.jsonl) with one assessment per row: `id`, `audio` (one path, several separated by ";", or a list
+in JSONL) and optionally `user_id`, `stroop_colour`, `memory_game` and `image_recall`. Relative
+paths are resolved against the manifest's directory.
+
+Items are handed out one at a time to a pool of worker processes, each of which loads Whisper and
+the sentiment model once when it starts. The results are written under --output as numbered parts
+(Parquet when pyarrow is installed, otherwise CSV), and each part is appended to
+_checkpoint.jsonl once it is on disk. Running the same command again skips the items already
+recorded there, so an interrupted run picks up where it stopped; items that failed are not tried
+again unless --retry-failed is given. A retried item's new row replaces its failed one: the earlier
+part is rewritten without it, so every id appears in exactly one part. Ctrl-C (or SIGTERM) finishes the items in progress, writes
+them out and exits; a second Ctrl-C stops the workers at once. Progress, including files per
+minute, is printed every --progress-seconds.
+
+Without --llm each item is transcribed, measured, given a sentiment and scored for risk, and
+nothing else is written. With --llm each item runs AiAgent.run_pipeline as the API does: LLM
+reports, PDF, text artifacts and the assessment index under output/.
+
+Environment: BATCH_WORKERS (default 2), TORCH_THREADS_PER_WORKER (default: CPU count / workers),
+LOG_LEVEL (default WARNING here, for the workers' pipeline logs).
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+	import pyarrow  # type: ignore
+	import pyarrow.parquet  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+	pyarrow = None
+
+from metrics_history import HISTORY_METRICS
+from risk_scoring import RiskModel, feature_matrix
+from serve import set_torch_threads, threads_per_worker
+from structured_logging import LogPipeline, correlation, get_logger
+
+
+log = get_logger("batch")
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".webm", ".m4a", ".ogg", ".flac")
+GAME_SCORES = ("stroop_colour", "memory_game", "image_recall")
+CHECKPOINT_FILE = "_checkpoint.jsonl"
+
+# Output columns and their types; every part has exactly these, so the parts read as one table.
+COLUMNS: List[Tuple[str, str]] = [
+	("id", "str"),
+	("user_id", "str"),
+	("audio", "str"),
+	("audio_files", "int"),
+	("transcribed_files", "int"),
+	("status", "str"),
+	("error", "str"),
+	("seconds", "float"),
+	("worker", "int"),
+	*((name, "float") for name in HISTORY_METRICS),
+	("sentiment_label", "str"),
+	("sentiment_mode", "str"),
+	("risk_probability", "float"),
+	("risk_category", "str"),
+	("risk_model_version", "str"),
+	("transcript", "str"),
+]
+LLM_COLUMNS: List[Tuple[str, str]] = [
+	("assessment_id", "str"),
+	("ai_service_status", "str"),
+	("summary", "str"),
+	("pdf_path", "str"),
+]
+
+# Parts of a ScoreCollector bundle the output is built from; the rest stays in the worker.
+_BUNDLE_KEYS = (*GAME_SCORES, "speech_metrics", "combined_sentiment", "transcribed_text")
+
+
+class BatchInputError(ValueError):
+	pass
+
+
+def _item(item_id: str, audio: List[str], user_id: Optional[str] = None, scores: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+	return {"id": item_id, "audio": audio, "user_id": user_id, "scores": scores or {}}
+
+
+def items_from_directory(root: str) -> List[Dict[str, Any]]:
+	"""One item per audio file below root, identified by its path relative to root."""
+	items = []
+	for dirpath, dirnames, filenames in os.walk(root):
+		dirnames.sort()
+		for name in sorted(filenames):
+			if name.lower().endswith(AUDIO_EXTENSIONS):
+				path = os.path.join(dirpath, name)
+				items.append(_item(os.path.relpath(path, root).replace(os.sep, "/"), [os.path.abspath(path)]))
+	return items
+
+
+def _manifest_rows(path: str) -> Iterable[Tuple[int, Dict[str, Any]]]:
+	with open(path, encoding="utf-8", newline="") as f:
+		if path.lower().endswith(".jsonl"):
+			for line_no, line in enumerate(f, 1):
+				if line.strip():
+					try:
+						yield line_no, json.loads(line)
+					except json.JSONDecodeError as e:
+						raise BatchInputError(f"{path}:{line_no}: not valid JSON ({e})") from e
+		else:
+			for line_no, row in enumerate(csv.DictReader(f), 2):
+				yield line_no, row
+
+
+def items_from_manifest(path: str) -> List[Dict[str, Any]]:
+	base = os.path.dirname(os.path.abspath(path))
+	items = []
+	for line_no, row in _manifest_rows(path):
+		audio = row.get("audio") or []
+		if isinstance(audio, str):
+			audio = [part.strip() for part in audio.split(";") if part.strip()]
+		item_id = str(row.get("id") or "").strip()
+		if not item_id or not audio:
+			raise BatchInputError(f"{path}:{line_no}: every row needs an id and at least one audio file")
+		scores = {}
+		for name in GAME_SCORES:
+			value = row.get(name)
+			if value not in (None, ""):
+				try:
+					scores[name] = float(value)
+				except (TypeError, ValueError):
+					raise BatchInputError(f"{path}:{line_no}: {name} is not a number: {value!r}") from None
+		user_id = row.get("user_id") or None
+		items.append(_item(item_id, [os.path.join(base, p) for p in audio], str(user_id) if user_id is not None else None, scores))
+	return items
+
+
+def load_items(source: str) -> List[Dict[str, Any]]:
+	if os.path.isdir(source):
+		items = items_from_directory(source)
+	elif os.path.isfile(source):
+		items = items_from_manifest(source)
+	else:
+		raise BatchInputError(f"No such file or directory: {source}")
+	seen: Set[str] = set()
+	for item in items:
+		if item["id"] in seen:
+			raise BatchInputError(f"Duplicate id in {source}: {item['id']}")
+		seen.add(item["id"])
+	return items
+
+
+# --- worker side ---------------------------------------------------------------------------
+
+
+def _setup_worker(threads: int, warm: bool) -> None:
+	if warm:
+		from score_collector import ScoreCollector
+
+		set_torch_threads(threads)
+		ScoreCollector.preload_models()
+
+
+def _init_worker(threads: int, warm: bool) -> None:
+	# The parent decides how Ctrl-C stops the run: it lets the items in progress finish first.
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	LogPipeline.configure()
+	_setup_worker(threads, warm)
+
+
+def process_item(item: Dict[str, Any], llm: bool) -> Dict[str, Any]:
+	"""Assess one item; a failure is returned as a row with status "failed", never raised."""
+	started = time.perf_counter()
+	row: Dict[str, Any] = {"id": item["id"], "user_id": item.get("user_id"), "audio": ";".join(item["audio"]), "audio_files": len(item["audio"]), "worker": os.getpid()}
+	try:
+		missing = [path for path in item["audio"] if not os.path.isfile(path)]
+		if missing:
+			raise FileNotFoundError(f"No such audio file: {missing[0]}")
+		with correlation(request_id=f"batch:{item['id']}"):
+			if llm:
+				from AiAgent import run_pipeline
+
+				result = run_pipeline(scores=dict(item["scores"]), audio_path=item["audio"], user_id=item.get("user_id"))
+				bundle = result["scores"]
+				row.update({name: result.get(name) for name, _ in LLM_COLUMNS})
+			else:
+				from score_collector import ScoreCollector
+
+				bundle = ScoreCollector.collect_scores(dict(item["scores"]), audio_path=item["audio"])
+		# collect_scores fills game scores the input did not have with 0; leave them empty instead,
+		# so they do not count as real (and very low) scores in the output or the risk score.
+		row["bundle"] = {key: bundle.get(key) for key in _BUNDLE_KEYS if key not in GAME_SCORES or key in item["scores"]}
+		row["transcribed_files"] = sum(1 for metrics in bundle.get("speech_metrics") or [] if metrics)
+		row["status"] = "ok"
+	except Exception as e:
+		row["status"] = "failed"
+		row["error"] = f"{type(e).__name__}: {e}"
+	row["seconds"] = round(time.perf_counter() - started, 3)
+	return row
+
+
+# --- output --------------------------------------------------------------------------------
+
+
+def result_columns(rows: List[Dict[str, Any]], llm: bool) -> Dict[str, List[Any]]:
+	"""Column-oriented output for a part; metrics are flattened and risk is scored for all rows at once."""
+	bundles = [row.get("bundle") or {} for row in rows]
+	columns: Dict[str, List[Any]] = {name: [row.get(name) for row in rows] for name, _ in COLUMNS + (LLM_COLUMNS if llm else [])}
+	matrix = feature_matrix(bundles, list(HISTORY_METRICS))
+	for j, name in enumerate(HISTORY_METRICS):
+		columns[name] = [None if math.isnan(value) else value for value in matrix[:, j].tolist()]
+	sentiments = [bundle.get("combined_sentiment") or {} for bundle in bundles]
+	columns["sentiment_label"] = [s.get("label") for s in sentiments]
+	columns["sentiment_mode"] = [s.get("mode", "model") if s else None for s in sentiments]
+	columns["transcript"] = [bundle.get("transcribed_text") if row.get("status") == "ok" else None for row, bundle in zip(rows, bundles)]
+	ok = [i for i, row in enumerate(rows) if row.get("status") == "ok"]
+	risk = dict(zip(ok, RiskModel.current().score_batch([bundles[i] for i in ok])))
+	columns["risk_probability"] = [risk[i]["probability"] if i in risk else None for i in range(len(rows))]
+	columns["risk_category"] = [risk[i]["category"] if i in risk else None for i in range(len(rows))]
+	columns["risk_model_version"] = [risk[i]["model_version"] if i in risk else None for i in range(len(rows))]
+	return columns
+
+
+def _arrow_schema(columns: List[Tuple[str, str]]) -> "pyarrow.Schema":
+	types = {"str": pyarrow.string(), "int": pyarrow.int64(), "float": pyarrow.float64()}
+	return pyarrow.schema([(name, types[kind]) for name, kind in columns])
+
+
+def write_part(path: str, columns: Dict[str, List[Any]], schema: List[Tuple[str, str]]) -> None:
+	"""Write one part atomically: readers and resumed runs never see a half-written file."""
+	tmp = f"{path}.tmp"
+	if path.endswith(".parquet"):
+		table = pyarrow.Table.from_pydict({name: columns[name] for name, _ in schema}, schema=_arrow_schema(schema))
+		pyarrow.parquet.write_table(table, tmp)
+	else:
+		with open(tmp, "w", encoding="utf-8", newline="") as f:
+			writer = csv.writer(f)
+			writer.writerow([name for name, _ in schema])
+			writer.writerows(zip(*(columns[name] for name, _ in schema)))
+	os.replace(tmp, path)
+
+
+def drop_rows(path: str, ids: Set[str]) -> None:
+	"""Rewrite a part without the rows of ids, atomically as write_part does."""
+	tmp = f"{path}.tmp"
+	if path.endswith(".parquet"):
+		table = pyarrow.parquet.read_table(path)
+		keep = pyarrow.array([row_id not in ids for row_id in table.column("id").to_pylist()], type=pyarrow.bool_())
+		pyarrow.parquet.write_table(table.filter(keep), tmp)
+	else:
+		with open(path, encoding="utf-8", newline="") as f:
+			reader = csv.reader(f)
+			header = next(reader)
+			id_index = header.index("id")
+			rows = [row for row in reader if row[id_index] not in ids]
+		with open(tmp, "w", encoding="utf-8", newline="") as f:
+			writer = csv.writer(f)
+			writer.writerow(header)
+			writer.writerows(rows)
+	os.replace(tmp, path)
+
+
+class BatchCheckpoint:
+	"""The parts of a run that are complete, one JSON line each in <output>/_checkpoint.jsonl.
+
+	The first line holds the run's options, so a resumed run writes parts the earlier ones can be
+	read with. A part is recorded only after its file has been renamed into place, and the line is
+	fsynced; a part file without a line (the run died in between) is removed on resume. Rows a later
+	part replaced (retried items) are dropped from their earlier part, and a "pruned" line records it.
+	"""
+
+	def __init__(self, output_dir: str):
+		self.output_dir = output_dir
+		self.path = os.path.join(output_dir, CHECKPOINT_FILE)
+		self.options: Optional[Dict[str, Any]] = None
+		self.parts: List[str] = []
+		self.done: Set[str] = set()
+		self.failed: Set[str] = set()
+		self._ids: Dict[str, List[str]] = {}
+		self._latest: Dict[str, str] = {}
+		self._pruned: Dict[str, Set[str]] = {}
+		if os.path.exists(self.path):
+			with open(self.path, encoding="utf-8") as f:
+				for line in f:
+					try:
+						entry = json.loads(line)
+					except json.JSONDecodeError:
+						break  # a line cut short by a crash; the part it described is an orphan
+					if "options" in entry:
+						self.options = entry["options"]
+					elif "pruned" in entry:
+						self._pruned.setdefault(entry["pruned"], set()).update(entry["ids"])
+					else:
+						self._add(entry["part"], entry["ids"], entry.get("failed", []))
+
+	def _append(self, entry: Dict[str, Any]) -> None:
+		with open(self.path, "a", encoding="utf-8") as f:
+			f.write(json.dumps(entry) + "\n")
+			f.flush()
+			os.fsync(f.fileno())
+
+	def start(self, options: Dict[str, Any]) -> Dict[str, Any]:
+		"""Record the options of a new run, or return those of the run being resumed."""
+		if self.options is None:
+			self.options = dict(options)
+			self._append({"options": self.options})
+		return self.options
+
+	def next_part(self) -> str:
+		return f"part-{len(self.parts):05d}.{self.options['format']}"
+
+	def _add(self, part: str, ids: List[str], failed: List[str]) -> None:
+		self.parts.append(part)
+		self._ids[part] = ids
+		self._latest.update((i, part) for i in ids)
+		self.done.update(ids)
+		self.failed.difference_update(ids)
+		self.failed.update(failed)
+
+	def record(self, part: str, ids: List[str], failed: List[str]) -> None:
+		self._append({"part": part, "ids": ids, "failed": failed})
+		self._add(part, ids, failed)
+
+	def superseded(self) -> Dict[str, Set[str]]:
+		"""Ids each part still holds a row for although a later part replaced it."""
+		stale: Dict[str, Set[str]] = {}
+		for part in self.parts:
+			ids = {i for i in self._ids[part] if self._latest[i] != part} - self._pruned.get(part, set())
+			if ids:
+				stale[part] = ids
+		return stale
+
+	def prune(self) -> None:
+		"""Drop superseded rows from their parts; a run that died half way through finishes it on resume."""
+		for part, ids in self.superseded().items():
+			drop_rows(os.path.join(self.output_dir, part), ids)
+			self._append({"pruned": part, "ids": sorted(ids)})
+			self._pruned.setdefault(part, set()).update(ids)
+
+	def remove_orphans(self) -> List[str]:
+		recorded = set(self.parts)
+		orphans = [name for name in os.listdir(self.output_dir) if name.startswith("part-") and name not in recorded]
+		for name in orphans:
+			os.remove(os.path.join(self.output_dir, name))
+		return orphans
+
+
+# --- progress ------------------------------------------------------------------------------
+
+
+class BatchProgress:
+	"""Running totals of a batch run; reports files per minute overall and over the last interval."""
+
+	def __init__(self, items: int, files: int, out: Optional[TextIO] = None, clock: Callable[[], float] = time.monotonic):
+		self.items, self.files = items, files
+		self.items_done = self.files_done = self.failed = 0
+		self.out = out or sys.stdout
+		self.clock = clock
+		self.started = self._last_time = clock()
+		self._last_files = 0
+
+	def add(self, row: Dict[str, Any]) -> None:
+		self.items_done += 1
+		self.files_done += row.get("audio_files") or 0
+		self.failed += row.get("status") != "ok"
+
+	def rates(self) -> Tuple[float, float]:
+		"""(files/min since the start, files/min since the last report)."""
+		now = self.clock()
+		overall = self.files_done * 60 / max(now - self.started, 1e-9)
+		recent = (self.files_done - self._last_files) * 60 / max(now - self._last_time, 1e-9)
+		return overall, recent
+
+	def line(self) -> str:
+		overall, recent = self.rates()
+		remaining = self.files - self.files_done
+		eta = f"{remaining / overall:.1f} min" if overall > 0 else "unknown"
+		return f"{self.items_done}/{self.items} items  {self.files_done}/{self.files} files  {overall:.1f} files/min ({recent:.1f} recent)  {self.failed} failed  ETA {eta}"
+
+	def report(self) -> None:
+		print(self.line(), file=self.out, flush=True)
+		self._last_time, self._last_files = self.clock(), self.files_done
+
+	def summary(self) -> str:
+		overall, _ = self.rates()
+		minutes = (self.clock() - self.started) / 60
+		return f"Done {self.items_done}/{self.items} items ({self.files_done} files) in {minutes:.1f} min: {overall:.1f} files/min, {self.failed} failed"
+
+
+# --- driver --------------------------------------------------------------------------------
+
+
+def _terminate_workers() -> None:
+	for child in multiprocessing.active_children():
+		child.terminate()
+
+
+def run_batch(
+	items: List[Dict[str, Any]],
+	output_dir: str,
+	workers: int = 2,
+	llm: bool = False,
+	fmt: Optional[str] = None,
+	retry_failed: bool = False,
+	flush_every: int = 50,
+	progress_seconds: float = 10.0,
+	process: Optional[Callable[[Dict[str, Any], bool], Dict[str, Any]]] = None,
+	out: Optional[TextIO] = None,
+) -> Dict[str, Any]:
+	"""Assess the items not yet in output_dir's checkpoint; returns counts for this invocation.
+
+	workers=0 runs the items in this process. process replaces process_item (and skips loading the
+	models); it must be importable by the worker processes.
+	"""
+	out = out or sys.stdout
+	os.makedirs(output_dir, exist_ok=True)
+	checkpoint = BatchCheckpoint(output_dir)
+	options = checkpoint.start({"format": fmt or ("parquet" if pyarrow is not None else "csv"), "llm": llm})
+	if fmt and options["format"] != fmt:
+		raise BatchInputError(f"{output_dir} holds {options['format']} parts; use --format {options['format']} or another --output")
+	if options["llm"] != llm:
+		raise BatchInputError(f"{output_dir} holds a run {'with' if options['llm'] else 'without'} --llm; use another --output")
+	if options["format"] == "parquet" and pyarrow is None:
+		raise BatchInputError(f"{output_dir} holds Parquet parts; install pyarrow to continue it")
+	schema = COLUMNS + (LLM_COLUMNS if llm else [])
+	for name in checkpoint.remove_orphans():
+		log.warning("Removed a part missing from the checkpoint", extra={"part": name})
+	checkpoint.prune()
+
+	skip = checkpoint.done - checkpoint.failed if retry_failed else checkpoint.done
+	todo = [item for item in items if item["id"] not in skip]
+	progress = BatchProgress(len(todo), sum(len(item["audio"]) for item in todo), out)
+	print(f"{len(items) - len(todo)} of {len(items)} items already done; {len(todo)} to go ({workers or 'no'} worker processes, format {options['format']}, LLM stages {'on' if llm else 'off'})", file=out, flush=True)
+
+	rows: List[Dict[str, Any]] = []
+	written = 0
+
+	def flush() -> None:
+		nonlocal rows, written
+		if rows:
+			part = checkpoint.next_part()
+			write_part(os.path.join(output_dir, part), result_columns(rows, llm), schema)
+			checkpoint.record(part, [row["id"] for row in rows], [row["id"] for row in rows if row.get("status") != "ok"])
+			checkpoint.prune()
+			written += len(rows)
+			rows = []
+
+	def collect(row: Dict[str, Any]) -> None:
+		rows.append(row)
+		progress.add(row)
+		if len(rows) >= flush_every:
+			flush()
+
+	stopping = threading.Event()
+
+	def on_signal(signum, frame):
+		if stopping.is_set():
+			raise KeyboardInterrupt
+		stopping.set()
+		print("Stopping after the items in progress (Ctrl-C again to stop now)", file=out, flush=True)
+
+	handlers = {}
+	if threading.current_thread() is threading.main_thread():
+		for sig in (signal.SIGINT, signal.SIGTERM):
+			handlers[sig] = signal.signal(sig, on_signal)
+
+	warm = process is None
+	process = process or process_item
+	threads = threads_per_worker(max(workers, 1))
+	next_report = time.monotonic() + progress_seconds
+	pool: Optional[ProcessPoolExecutor] = None
+	try:
+		if workers <= 0:
+			_setup_worker(threads, warm)
+			for item in todo:
+				if stopping.is_set():
+					break
+				collect(process(item, llm))
+				if time.monotonic() >= next_report:
+					progress.report()
+					next_report = time.monotonic() + progress_seconds
+		else:
+			# spawn, not fork: each worker imports torch and loads its models itself, on every platform.
+			pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(threads, warm))
+			pending = iter(todo)
+			inflight: Set[Future] = set()
+			while True:
+				# A couple of items queued per worker keeps them busy without handing out the whole
+				# dataset up front, so stopping only waits for what is already running.
+				while not stopping.is_set() and len(inflight) < workers * 2:
+					item = next(pending, None)
+					if item is None:
+						break
+					inflight.add(pool.submit(process, item, llm))
+				if not inflight:
+					break
+				done, inflight = wait(inflight, timeout=max(0.0, next_report - time.monotonic()), return_when=FIRST_COMPLETED)
+				for future in done:
+					collect(future.result())
+				if time.monotonic() >= next_report:
+					progress.report()
+					next_report = time.monotonic() + progress_seconds
+	except BaseException:
+		if pool is not None:
+			pool.shutdown(wait=False, cancel_futures=True)
+			_terminate_workers()
+			pool = None
+		raise
+	finally:
+		for sig, handler in handlers.items():
+			signal.signal(sig, handler)
+		# Whatever finished is kept, however the run ends.
+		flush()
+		if pool is not None:
+			pool.shutdown()
+	print(progress.summary(), file=out, flush=True)
+	return {"processed": written, "failed": progress.failed, "remaining": len(todo) - written, "stopped": stopping.is_set()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(prog="python -m batch_assess", description="Assess a directory or manifest of recordings in parallel, resumably.")
+	parser.add_argument("source", help="directory of recordings, or a .csv/.jsonl manifest")
+	parser.add_argument("--output", required=True, help="directory for the result parts and the checkpoint")
+	parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "2")), help="worker processes, each with its own models (0: run in this process)")
+	parser.add_argument("--llm", action="store_true", help="also run the LLM reports, PDF and assessment index for every item")
+	parser.add_argument("--format", choices=("parquet", "csv"), help="output format (default: parquet if pyarrow is installed, else csv)")
+	parser.add_argument("--retry-failed", action="store_true", help="run items that failed in an earlier invocation again")
+	parser.add_argument("--flush-every", type=int, default=50, help="items per output part (default 50)")
+	parser.add_argument("--progress-seconds", type=float, default=10.0, help="seconds between progress lines (default 10)")
+	args = parser.parse_args(argv)
+
+	if args.format == "parquet" and pyarrow is None:
+		print("Parquet output needs pyarrow: pip install pyarrow (or use --format csv)", file=sys.stderr)
+		return 2
+	# Per-item pipeline logs from several workers drown the progress lines; opt back in with LOG_LEVEL.
+	os.environ.setdefault("LOG_LEVEL", "WARNING")
+	LogPipeline.configure()
+	try:
+		from model_artifacts import DEFAULT_SENTIMENT_MODEL, verify_all, whisper_size
+
+		# Fail up front rather than fill the output with empty transcripts or heuristic sentiment.
+		status = verify_all(whisper_size(), DEFAULT_SENTIMENT_MODEL, always_hash=False)
+		problems = {name: result for name, result in status.items() if result not in ("ok", "legacy")}
+		if problems:
+			for name, result in problems.items():
+				print(f"{name} model: {result}", file=sys.stderr)
+			print("Run `python -m model_artifacts fetch` first.", file=sys.stderr)
+			return 2
+		items = load_items(args.source)
+		summary = run_batch(items, args.output, workers=args.workers, llm=args.llm, fmt=args.format, retry_failed=args.retry_failed, flush_every=max(1, args.flush_every), progress_seconds=args.progress_seconds)
+	except BatchInputError as e:
+		print(str(e), file=sys.stderr)
+		return 2
+	except KeyboardInterrupt:
+		print("Stopped; the items that finished are saved. Run the same command to resume.", file=sys.stderr)
+		return 130
+	except Exception as e:
+		# e.g. BrokenProcessPool when a worker is killed for running out of memory.
+		print(f"Batch run failed: {type(e).__name__}: {e}. Finished items are saved; run the same command to resume.", file=sys.stderr)
+		return 1
+	finally:
+		LogPipeline.shutdown()
+	if summary["stopped"]:
+		print(f"Stopped with {summary['remaining']} items left; run the same command to resume.", file=sys.stderr)
+		return 130
+	return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GameScorer: scoring batches of synthetic Stroop sessions (60 trials
+each) one session per call against one vectorised call for the whole batch.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from game_scoring import GameScorer
+
+COLOURS = ["red", "blue", "green", "yellow", "purple", "orange"]
+
+
+def synthetic_sessions(count: int, trials: int = 60, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        word = [rng.choice(COLOURS) for _ in range(trials)]
+        ink = [rng.choice(COLOURS) for _ in range(trials)]
+        response = [i if rng.random() < 0.9 else rng.choice(COLOURS) for i in ink]
+        rt_ms = [rng.gauss(650 if w == i else 780, 120) for w, i in zip(word, ink)]
+        sessions.append({"word": word, "ink": ink, "response": response, "rt_ms": rt_ms})
+    return sessions
+
+
+def main():
+    print(f"{'sessions':>9} {'per-session (s)':>16} {'batch (s)':>10} {'speedup':>8}  identical")
+    for count in (100, 1_000, 10_000):
+        sessions = synthetic_sessions(count)
+        t0 = time.perf_counter()
+        single = [GameScorer.score_stroop([s])[0] for s in sessions]
+        single_t = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        batch = GameScorer.score_stroop(sessions)
+        batch_t = time.perf_counter() - t0
+        print(f"{count:>9} {single_t:>16.3f} {batch_t:>10.3f} {single_t / batch_t:>7.1f}x  {single == batch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for request-path logging overhead. Each simulated request emits the ~25 records a
+pipeline run logs plus one DEBUG record carrying the full score bundle (as the doctor prompt
+builder does), from 8 concurrent request threads. The sink is a stdout-like stream that costs
+0.2 ms per write, standing in for a terminal or a busy log shipper. Compares print(), a
+synchronous logging handler, the queue-backed structured logger, and logging off.
+"""
+
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from structured_logging import JsonFormatter, LogPipeline, correlation, get_logger
+
+REQUESTS = 400
+THREADS = 8
+LINES_PER_REQUEST = 25
+SINK_WRITE_SECONDS = 0.0002
+SCORES = {
+    "stroop_colour": 210,
+    "memory_game": 6,
+    "speech_metrics": [{"Pause density (%)": 22.5, "Lexical diversity (%)": 61.0}] * 4,
+    "transcriptions": [{"text": "the quick brown fox " * 200, "segments": []}] * 4,
+}
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            time.sleep(SINK_WRITE_SECONDS)
+        return len(text)
+
+
+def request_with_print(sink):
+    for i in range(LINES_PER_REQUEST):
+        print(f"[STAGE] Pipeline step {i}", file=sink)
+    print(SCORES, file=sink)
+
+
+def request_with_logging(log):
+    for i in range(LINES_PER_REQUEST):
+        log.info("Pipeline step", extra={"step": i})
+    log.debug("Building doctor prompt", extra={"scores": SCORES})
+
+
+def run(label, handler_setup, func):
+    latencies = []
+
+    def one(n):
+        with correlation(request_id=f"req-{n}"):
+            t0 = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - t0)
+
+    handler_setup()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(one, range(REQUESTS)))
+    wall = time.perf_counter() - start
+    LogPipeline.shutdown()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{label:<28} {p50:>12.3f} {p99:>12.3f} {REQUESTS / wall:>10.0f}")
+
+
+def main():
+    sink = SlowSink()
+    log = get_logger("bench")
+
+    def reset():
+        LogPipeline.shutdown()
+        root = logging.getLogger("foreknow")
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+    def sync_handler(level):
+        def setup():
+            reset()
+            root = logging.getLogger("foreknow")
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(JsonFormatter())
+            root.addHandler(handler)
+            root.setLevel(level)
+        return setup
+
+    def queued(level):
+        def setup():
+            reset()
+            LogPipeline.configure(level=level, fmt="json", stream=sink, queue_size=100_000)
+        return setup
+
+    print(f"{'mode':<28} {'p50 ms/req':>12} {'p99 ms/req':>12} {'req/s':>10}  (time spent in the request thread)")
+    run("print()", lambda: None, lambda: request_with_print(sink))
+    run("sync handler (DEBUG)", sync_handler("DEBUG"), lambda: request_with_logging(log))
+    run("queue logger (DEBUG)", queued("DEBUG"), lambda: request_with_logging(log))
+    run("queue logger (INFO)", queued("INFO"), lambda: request_with_logging(log))
+    run("logging off (CRITICAL)", queued("CRITICAL"), lambda: request_with_logging(log))
+    reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark for MetricsHistory: per-user trend latency as the history grows from
+10k to 1M rows spread over many users. Trends are measured for probe users whose
+100 points are interleaved with everyone else's in the first 10k rows, so every
+query covers the same number of points. Uses a temporary database.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from metrics_history import MetricsHistory
+
+USERS = 5_000
+PROBES = 20
+BATCH = 50_000
+
+
+def synthetic_entries(count: int, rng: random.Random, start: datetime, probes: bool = False) -> list:
+    entries = []
+    for i in range(count):
+        user = f"probe{(i // 5) % PROBES}" if probes and i % 5 == 0 else f"user{rng.randrange(USERS)}"
+        entries.append((
+            user,
+            None,
+            {
+                "stroop_colour": rng.randint(0, 350),
+                "memory_game": rng.randint(0, 12),
+                "image_recall": rng.randint(0, 60),
+                "pause_density": rng.uniform(0, 60),
+                "lexical_diversity": rng.uniform(20, 100),
+                "sentiment_score": rng.uniform(20, 80),
+                "risk": {"probability": rng.random()},
+            },
+            start + timedelta(minutes=i),
+        ))
+    return entries
+
+
+def main():
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = MetricsHistory(os.path.join(tmp, "metrics_history.db"))
+        total = 0
+        print(f"{'rows':>9} {'insert rows/s':>14} {'trend ms (p50)':>15} {'db MB':>7}")
+        for target in (10_000, 100_000, 1_000_000):
+            t0 = time.perf_counter()
+            inserted = 0
+            while total < target:
+                n = min(BATCH, target - total)
+                history.append_many(synthetic_entries(n, rng, start + timedelta(minutes=total), probes=total == 0))
+                total += n
+                inserted += n
+            insert_rate = inserted / (time.perf_counter() - t0)
+            timings = []
+            for _ in range(50):
+                user = f"probe{rng.randrange(PROBES)}"
+                t0 = time.perf_counter()
+                history.trends(user, limit=100, window=3)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            size_mb = os.path.getsize(history.db_path) / 1024 / 1024
+            print(f"{total:>9} {insert_rate:>14.0f} {timings[len(timings) // 2]:>15.3f} {size_mb:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cold model loads: Whisper and the sentiment model, each loaded in a fresh
+interpreter so nothing is cached in-process, from every artifact format present on this machine.
+Compares the previous loaders (whisper.load_model, which re-hashes and copies the .pt; Hugging
+Face from_pretrained on its cache) with load_whisper and load_sentiment on the verified
+safetensors: memory-mapped, with no weight initialisation. The OS page cache stays warm across
+runs, so the first load after a reboot is slower for every format. Peak RSS growth needs the
+resource module and is not reported on Windows. Run `python -m model_artifacts fetch` first to
+have the safetensors artifacts.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model_artifacts
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUNS = 3
+WHISPER_SIZE = model_artifacts.whisper_size()
+
+
+def load(case: str) -> None:
+    import torch
+
+    size, model_name = WHISPER_SIZE, model_artifacts.DEFAULT_SENTIMENT_MODEL
+    if case == "whisper/whisper.load_model":
+        import whisper
+
+        whisper.load_model(size, device="cpu", download_root=model_artifacts.whisper_dir())
+    elif case == "whisper/safetensors":
+        model_artifacts.load_whisper(model_artifacts.whisper_dir(), size, "cpu")
+    elif case == "sentiment/from_pretrained":
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        AutoTokenizer.from_pretrained(model_name, cache_dir=model_artifacts.sentiment_dir(), local_files_only=True)
+        AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=model_artifacts.sentiment_dir(), local_files_only=True, torch_dtype=torch.float32)
+    elif case == "sentiment/safetensors":
+        model_artifacts.load_sentiment(model_artifacts.sentiment_dir(), model_name, "cpu")
+
+
+def available_cases() -> list:
+    _, whisper_manifest, whisper_pt = model_artifacts._whisper_paths(model_artifacts.whisper_dir(), WHISPER_SIZE)
+    _, sentiment_manifest, hf_cache = model_artifacts._sentiment_paths(model_artifacts.sentiment_dir(), model_artifacts.DEFAULT_SENTIMENT_MODEL)
+    cases = []
+    if os.path.exists(whisper_pt):
+        cases.append("whisper/whisper.load_model")
+    if os.path.exists(whisper_manifest):
+        cases.append("whisper/safetensors")
+    if os.path.isdir(hf_cache):
+        cases.append("sentiment/from_pretrained")
+    if os.path.exists(sentiment_manifest):
+        cases.append("sentiment/safetensors")
+    return cases
+
+
+def child(case: str) -> None:
+    import torch
+
+    torch.set_num_threads(1)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    start = time.perf_counter()
+    load(case)
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if resource:
+        # ru_maxrss is in KiB on Linux and bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) * scale / 1024 / 1024
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb}))
+
+
+def main():
+    cases = available_cases()
+    if not cases:
+        print("No model artifacts found; run `python -m model_artifacts fetch` first.")
+        return
+    print(f"{'model / loader':<28} {'load s (p50)':>13} {'min s':>8} {'peak RSS +MB':>12}")
+    for case in cases:
+        runs = []
+        for _ in range(RUNS):
+            out = subprocess.run([sys.executable, __file__, "--child", case], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__) or ".")
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        seconds = [r["seconds"] for r in runs]
+        peak = f"{statistics.median(r['peak_mb'] for r in runs):.0f}" if runs[0]["peak_mb"] is not None else "n/a"
+        print(f"{case:<28} {statistics.median(seconds):>13.2f} {min(seconds):>8.2f} {peak:>12}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
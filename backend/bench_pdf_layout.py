@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for PDF line breaking: the previous word-by-word get_string_width loop
+against TextLayout.break_lines, on synthetic reports of 10k-100k words.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fpdf import FPDF
+
+from text_layout import TextLayout
+
+WORDS = (
+    "memory recall stroop colour interference pause density lexical diversity sentiment "
+    "assessment cognitive the a of and speech fluency recommendation neurologist follow-up"
+).split() + ["https://example.org/" + "very-long-reference-path/" * 5]
+
+
+def legacy_break_lines(pdf: FPDF, text: str, page_width: float) -> list:
+    """Line breaking as done by PDFGenerator._add_text_with_wrapping before TextLayout."""
+    lines = []
+    current_line = ""
+    for word in text.split():
+        while len(word) > 50:
+            part = word[:50]
+            word = word[50:]
+            test_line = current_line + (" " if current_line else "") + part
+            pdf.set_font(pdf.font_family, pdf.font_style, int(pdf.font_size_pt))
+            if pdf.get_string_width(test_line) <= page_width or not current_line:
+                current_line = test_line
+            else:
+                lines.append(current_line)
+                current_line = part
+        test_line = current_line + (" " if current_line else "") + word
+        pdf.set_font(pdf.font_family, pdf.font_style, int(pdf.font_size_pt))
+        if pdf.get_string_width(test_line) <= page_width or not current_line:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def synthetic_report(word_count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    paragraphs = []
+    remaining = word_count
+    while remaining > 0:
+        n = min(remaining, rng.randint(40, 200))
+        paragraphs.append(" ".join(rng.choice(WORDS) for _ in range(n)))
+        remaining -= n
+    return paragraphs
+
+
+def timed(fn, pdf, paragraphs, width):
+    t0 = time.perf_counter()
+    out = [fn(pdf, p, width) for p in paragraphs]
+    return time.perf_counter() - t0, out
+
+
+def main():
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", "", 10)
+    width = pdf.w - pdf.l_margin - pdf.r_margin - 5
+
+    print(f"{'words':>8} {'legacy (s)':>12} {'layout (s)':>12} {'speedup':>9}  identical")
+    for word_count in (10_000, 25_000, 50_000, 100_000):
+        paragraphs = synthetic_report(word_count)
+        legacy_t, legacy_lines = timed(legacy_break_lines, pdf, paragraphs, width)
+        layout_t, layout_lines = timed(TextLayout.break_lines, pdf, paragraphs, width)
+        same = legacy_lines == layout_lines
+        print(f"{word_count:>8} {legacy_t:>12.3f} {layout_t:>12.3f} {legacy_t / layout_t:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /api/submit-tests response payloads: the previous full score bundle
+serialised with json.dumps against the slim ScoreSummary serialised by
+response_models (orjson when installed), with and without gzip.
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from response_models import RiskResult, ScoreSummary, SubmitTestsResponse, dump_model, dumps
+
+WORDS = "the patient described the picture a kitchen with a boy taking cookies while the sink overflows".split()
+
+
+def synthetic_transcription(rng: random.Random, seconds: int) -> dict:
+    segments = []
+    t = 0.0
+    while t < seconds:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+        seg_words = []
+        for w in words:
+            seg_words.append({"word": f" {w}", "start": round(t, 2), "end": round(t + 0.3, 2), "probability": round(rng.random(), 4)})
+            t += 0.35
+        segments.append({
+            "id": len(segments), "seek": 0, "start": seg_words[0]["start"], "end": seg_words[-1]["end"],
+            "text": " ".join(words), "tokens": [rng.randint(0, 50000) for _ in words],
+            "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.4, "no_speech_prob": 0.01,
+            "words": seg_words,
+        })
+    return {"text": " ".join(s["text"] for s in segments), "segments": segments, "language": "en"}
+
+
+def synthetic_bundle(seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    transcriptions = [synthetic_transcription(rng, 90) for _ in range(4)]
+    metrics = {"pause_density": 12.5, "repeated_words": 14, "filler_count": 6, "lexical_diversity": 0.41, "wpm": 118.0}
+    sentiment = {"label": "neutral", "probs": [0.2, 0.6, 0.2], "weighted_score": 50.0}
+    return {
+        "stroop_colour": 8, "memory_game": 6, "image_recall": 5,
+        "speech_metrics": [dict(metrics) for _ in transcriptions],
+        "transcriptions": transcriptions,
+        "transcribed_text": " ".join(t["text"] for t in transcriptions),
+        "sentiment": [dict(sentiment) for _ in transcriptions],
+        "combined_sentiment": dict(sentiment),
+    }
+
+
+def legacy_payload(bundle: dict) -> dict:
+    return {
+        "memory_score": 6, "stroop_score": 8, "image_recall_score": 5,
+        "audio_files": ["q1.webm", "q2.webm", "q3.webm", "q4.webm"],
+        "summary_report": "summary " * 200, "doctor_report": "report " * 600, "email_content": "email " * 150,
+        "cognitive_risk": {"category": "low", "probability": 0.1}, "pdf_filename": "doctor_report_x.pdf",
+        "all_scores": bundle, "status": "completed", "ai_analysis_success": True, "ai_error": None,
+        "fallback_mode": False, "ai_service_status": "ok",
+    }
+
+
+def slim_payload(bundle: dict, include_transcripts: bool = False) -> dict:
+    legacy = legacy_payload(bundle)
+    legacy["cognitive_risk"] = RiskResult(**legacy["cognitive_risk"])
+    legacy["all_scores"] = ScoreSummary.from_bundle(bundle, include_transcripts)
+    return dump_model(SubmitTestsResponse(**legacy))
+
+
+def timed(fn, repeat: int = 50):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - t0) / repeat * 1000, out
+
+
+def main():
+    bundle = synthetic_bundle()
+    legacy_ms, legacy_body = timed(lambda: json.dumps(legacy_payload(bundle), ensure_ascii=False).encode("utf-8"))
+    full_ms, full_body = timed(lambda: dumps(slim_payload(bundle, include_transcripts=True)))
+    slim_ms, slim_body = timed(lambda: dumps(slim_payload(bundle)))
+
+    print(f"{'payload':<28} {'bytes':>10} {'gzip bytes':>11} {'ms':>8}")
+    for name, body, ms in (
+        ("legacy full bundle", legacy_body, legacy_ms),
+        ("include_transcripts=true", full_body, full_ms),
+        ("default (slim)", slim_body, slim_ms),
+    ):
+        print(f"{name:<28} {len(body):>10} {len(gzip.compress(body, compresslevel=5)):>11} {ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark for RiskModel: scoring stored-style records one at a time against a
+single vectorised score_batch call, for 1k-100k synthetic assessments. The
+matrix column is the NumPy scoring alone, without feature extraction.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from risk_scoring import RiskModel
+
+
+def synthetic_records(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        metrics = [
+            {"Pause density (%)": rng.uniform(0, 60), "Filler frequency (%)": rng.uniform(0, 15), "Lexical diversity (%)": rng.uniform(20, 100)}
+            for _ in range(rng.randint(0, 4))
+        ]
+        records.append({
+            "stroop_colour": rng.randint(0, 350),
+            "memory_game": rng.randint(0, 12),
+            "image_recall": rng.randint(0, 60),
+            "speech_metrics": metrics,
+            "combined_sentiment": {"weighted_score": rng.uniform(20, 80)} if metrics else {},
+        })
+    return records
+
+
+def main():
+    model = RiskModel.current()
+    print(f"model {model.version}")
+    print(f"{'records':>8} {'single (s)':>11} {'batch (s)':>10} {'us/record':>10} {'speedup':>8} {'matrix (ms)':>12}  identical")
+    for count in (1_000, 10_000, 100_000):
+        records = synthetic_records(count)
+        t0 = time.perf_counter()
+        single = [model.score(r) for r in records]
+        single_t = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        batch = model.score_batch(records, explain=True)
+        batch_t = time.perf_counter() - t0
+        matrix = model.feature_matrix(records)
+        t0 = time.perf_counter()
+        model.score_matrix(matrix)
+        matrix_t = time.perf_counter() - t0
+        print(f"{count:>8} {single_t:>11.3f} {batch_t:>10.3f} {batch_t / count * 1e6:>10.2f} {single_t / batch_t:>7.1f}x {matrix_t * 1000:>12.2f}  {single == batch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from structured_logging import get_logger
+from telemetry import REGISTRY
+
+
+log = get_logger("cancellation")
+
+PIPELINE_CANCELLATIONS = REGISTRY.counter("foreknow_pipeline_cancellations_total", "Pipeline runs stopped early, by why they were cancelled and the checkpoint that stopped them.", ("reason", "stage"))
+
+_current: contextvars.ContextVar[Optional["CancellationToken"]] = contextvars.ContextVar("foreknow_cancellation", default=None)
+
+# Upper bound on how long a cancelled run keeps blocking on a stage it handed to another thread.
+_POLL_SECONDS = 0.5
+
+
+class PipelineCancelled(BaseException):
+	"""Raised at a checkpoint once the run's token is cancelled.
+
+	A BaseException, like asyncio.CancelledError, so the pipeline's `except Exception` fallbacks
+	(template reports, empty audio analysis) do not turn a cancelled run into a completed one.
+	"""
+
+	def __init__(self, reason: str, stage: str):
+		super().__init__(f"Cancelled ({reason}) before {stage}")
+		self.reason = reason
+		self.stage = stage
+
+
+class CancellationToken:
+	"""Cooperative cancellation for one pipeline run, shared by every thread working on it."""
+
+	def __init__(self):
+		self.reason: Optional[str] = None
+		self._event = threading.Event()
+		self._lock = threading.Lock()
+		self._stopped = False
+
+	@property
+	def cancelled(self) -> bool:
+		return self._event.is_set()
+
+	def cancel(self, reason: str) -> bool:
+		"""Request cancellation; returns False if it was already cancelled."""
+		with self._lock:
+			if self._event.is_set():
+				return False
+			self.reason = reason
+			self._event.set()
+		return True
+
+	def check(self, stage: str) -> None:
+		if not self._event.is_set():
+			return
+		with self._lock:
+			first, self._stopped = not self._stopped, True
+		if first:
+			PIPELINE_CANCELLATIONS.inc(reason=self.reason or "unknown", stage=stage)
+			log.info("Pipeline cancelled", extra={"reason": self.reason, "stage": stage})
+		raise PipelineCancelled(self.reason or "unknown", stage)
+
+	def sleep(self, seconds: float, stage: str) -> None:
+		"""time.sleep that wakes up and raises as soon as the token is cancelled."""
+		self._event.wait(seconds)
+		self.check(stage)
+
+
+@contextmanager
+def scope(token: CancellationToken) -> Iterator[CancellationToken]:
+	"""Make token the current one for this context (and contexts copied from it, e.g. telemetry.bind)."""
+	reset = _current.set(token)
+	try:
+		yield token
+	finally:
+		_current.reset(reset)
+
+
+def current() -> Optional[CancellationToken]:
+	return _current.get()
+
+
+def check(stage: str) -> None:
+	"""Checkpoint: raise PipelineCancelled if the current run was cancelled; a no-op outside a run."""
+	token = _current.get()
+	if token is not None:
+		token.check(stage)
+
+
+def sleep(seconds: float, stage: str) -> None:
+	token = _current.get()
+	if token is None:
+		time.sleep(seconds)
+	else:
+		token.sleep(seconds, stage)
+
+
+def wait_result(future: Future, timeout: Optional[float], stage: str) -> Any:
+	"""future.result(timeout) that gives up early, raising PipelineCancelled, once the current run is cancelled.
+
+	The work behind the future keeps running to its own end; only the wait is abandoned.
+	"""
+	token = _current.get()
+	if token is None:
+		return future.result(timeout=timeout)
+	deadline = None if timeout is None else time.monotonic() + timeout
+	while True:
+		token.check(stage)
+		remaining = _POLL_SECONDS if deadline is None else min(_POLL_SECONDS, deadline - time.monotonic())
+		if remaining <= 0:
+			raise FutureTimeoutError()
+		done, _ = wait([future], timeout=remaining)
+		if done:
+			return future.result()
+
+
+class CancellationRegistry:
+	"""Tokens of runs that can be cancelled by id (e.g. from another request)."""
+
+	def __init__(self):
+		self._tokens: Dict[str, CancellationToken] = {}
+		self._lock = threading.Lock()
+
+	def register(self, run_id: str, token: CancellationToken) -> None:
+		with self._lock:
+			self._tokens[run_id] = token
+
+	def unregister(self, run_id: str, token: CancellationToken) -> None:
+		with self._lock:
+			if self._tokens.get(run_id) is token:
+				del self._tokens[run_id]
+
+	def cancel(self, run_id: str, reason: str) -> bool:
+		with self._lock:
+			token = self._tokens.get(run_id)
+		return token is not None and token.cancel(reason)
+
+
+CANCELLABLE = CancellationRegistry()
@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from cancellation import CancellationToken, scope
+from structured_logging import current_request_id, get_logger
+from telemetry import REGISTRY
+
+
+log = get_logger("coalescing")
+
+COALESCED = REGISTRY.counter("foreknow_inflight_submissions_total", "Assessment submissions that started a pipeline run (leader) or joined an identical one in flight (joined).", ("role",))
+
+
+def submission_fingerprint(params: Dict[str, Any], uploads: Iterable[Any]) -> str:
+	"""Key for a submission: its pipeline parameters plus the form field and content hash of each upload.
+
+	Upload paths and file names differ between copies of the same submission and are left out.
+	"""
+	digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+	for upload in sorted(uploads, key=lambda u: u.field):
+		digest.update(f"\0{upload.field}\0{upload.sha256}".encode("ascii"))
+	return digest.hexdigest()
+
+
+class _Inflight:
+	def __init__(self, leader_request_id: str):
+		self.future: Future = Future()
+		self.token = CancellationToken()
+		self.leader_request_id = leader_request_id
+		self.waiters = 0
+
+
+def _deliver(done: Future, waiter: asyncio.Future) -> None:
+	if waiter.done():
+		return
+	if done.exception() is not None:
+		waiter.set_exception(done.exception())
+	else:
+		waiter.set_result(done.result())
+
+
+class InflightCoalescer:
+	"""Runs one computation per key at a time; identical calls made while it runs wait for and share its result.
+
+	Nothing is kept once the computation finishes, so a later identical call runs again. The
+	computation runs on a worker thread under its own CancellationToken. It keeps going while any
+	caller still waits for it, including after the caller that started it has gone. It is cancelled
+	once every caller has been cancelled.
+	"""
+
+	def __init__(self):
+		self._inflight: Dict[str, _Inflight] = {}
+		self._lock = threading.Lock()
+
+	def inflight(self) -> int:
+		with self._lock:
+			return len(self._inflight)
+
+	async def run(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+		"""Return func()'s result and whether it came from an identical call already in flight.
+
+		Cancel the awaiting task with a reason (task.cancel("client_disconnected")) to withdraw
+		from the computation; the reason is passed on to its token when nobody is left waiting.
+		"""
+		with self._lock:
+			entry = self._inflight.get(key)
+			joined = entry is not None
+			if not joined:
+				entry = self._inflight[key] = _Inflight(current_request_id() or "")
+			entry.waiters += 1
+		COALESCED.inc(role="joined" if joined else "leader")
+		if joined:
+			log.info("Joined identical submission in flight", extra={"leader_request_id": entry.leader_request_id})
+		else:
+			def compute() -> None:
+				try:
+					with scope(entry.token):
+						result = func()
+				except BaseException as e:
+					self._finish(key, entry)
+					entry.future.set_exception(e)
+				else:
+					self._finish(key, entry)
+					entry.future.set_result(result)
+
+			# A plain executor thread rather than run_in_threadpool, whose wait cannot be cancelled.
+			asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, compute)
+		# A waiter of our own rather than wrap_future, which would pass this caller's cancellation on
+		# to the shared future, and whose result would go unretrieved once this caller has left.
+		loop = asyncio.get_running_loop()
+		waiter = loop.create_future()
+		entry.future.add_done_callback(lambda done: loop.is_closed() or loop.call_soon_threadsafe(_deliver, done, waiter))
+		try:
+			return await waiter, joined
+		except asyncio.CancelledError as e:
+			self._leave(key, entry, e.args[0] if e.args else "abandoned")
+			raise
+
+	def _leave(self, key: str, entry: _Inflight, reason: str) -> None:
+		with self._lock:
+			entry.waiters -= 1
+			abandoned = entry.waiters == 0 and not entry.future.done()
+			if abandoned and self._inflight.get(key) is entry:
+				# A new identical submission starts afresh instead of joining a run being cancelled.
+				del self._inflight[key]
+		if abandoned:
+			entry.token.cancel(reason)
+
+	def _finish(self, key: str, entry: _Inflight) -> None:
+		with self._lock:
+			if self._inflight.get(key) is entry:
+				del self._inflight[key]
+
+
+PIPELINE_COALESCER = InflightCoalescer()
+REGISTRY.gauge("foreknow_inflight_submissions", "Distinct assessment submissions currently running.", callback=PIPELINE_COALESCER.inflight)
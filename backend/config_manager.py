@@ -1,9 +1,99 @@
+import os
+import threading
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from structured_logging import get_logger
+
+
+AGENTS_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "Agents", "agent.yaml")
+RISK_MODEL_PATH = os.path.join(os.path.dirname(__file__), "risk_model.yaml")
+
+log = get_logger("config")
 
 
 class ConfigManager:
+	REQUIRED_AGENT_SECTIONS = ("clinical_evaluator", "summary_analyst", "email_composer")
+	REQUIRED_AGENT_KEYS = ("llm", "role", "goal", "backstory")
+
+	_lock = threading.Lock()
+	_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+	_env_loaded = False
+	reload_count = 0
+
 	@staticmethod
 	def load_agents_config(path: str) -> Dict[str, Any]:
 		with open(path, "r", encoding="utf-8") as f:
-			return yaml.safe_load(f)
\ No newline at end of file
+			return yaml.safe_load(f)
+
+	@staticmethod
+	def validate_agents_config(config: Any, path: str = "") -> None:
+		if not isinstance(config, dict):
+			raise ValueError(f"Agents config {path} must be a mapping")
+		for section in ConfigManager.REQUIRED_AGENT_SECTIONS:
+			spec = config.get(section)
+			if not isinstance(spec, dict):
+				raise ValueError(f"Agents config {path} is missing section '{section}'")
+			for key in ConfigManager.REQUIRED_AGENT_KEYS:
+				if not isinstance(spec.get(key), str) or not spec[key].strip():
+					raise ValueError(f"Agents config {path}: '{section}.{key}' must be a non-empty string")
+		if not isinstance(config.get("disclaimer_line", ""), str):
+			raise ValueError(f"Agents config {path}: 'disclaimer_line' must be a string")
+
+	@staticmethod
+	def validate_risk_model_config(config: Any, path: str = "") -> None:
+		if not isinstance(config, dict):
+			raise ValueError(f"Risk model config {path} must be a mapping")
+		if not isinstance(config.get("version"), str) or not config["version"].strip():
+			raise ValueError(f"Risk model config {path}: 'version' must be a non-empty string")
+		if not isinstance(config.get("features"), dict) or not config["features"]:
+			raise ValueError(f"Risk model config {path}: 'features' must be a non-empty mapping")
+		for name, spec in config["features"].items():
+			if not isinstance(spec, dict) or any(not isinstance(spec.get(k), (int, float)) for k in ("reference", "scale", "weight")):
+				raise ValueError(f"Risk model config {path}: feature '{name}' needs numeric reference, scale and weight")
+			if spec["scale"] <= 0:
+				raise ValueError(f"Risk model config {path}: feature '{name}' scale must be positive")
+		thresholds = config.get("thresholds")
+		if not isinstance(thresholds, list) or not thresholds:
+			raise ValueError(f"Risk model config {path}: 'thresholds' must be a non-empty list")
+		bounds = [t.get("max_probability") if isinstance(t, dict) else None for t in thresholds]
+		if any(not isinstance(b, (int, float)) for b in bounds) or bounds != sorted(bounds) or bounds[-1] < 1.0:
+			raise ValueError(f"Risk model config {path}: threshold max_probability values must be ascending and end at 1.0")
+
+	@classmethod
+	def _get_cached(cls, path: str, validate: Callable[[Any, str], None], label: str) -> Dict[str, Any]:
+		"""Return the parsed YAML file, re-reading it only when its mtime or size changes."""
+		st = os.stat(path)
+		version = (st.st_mtime_ns, st.st_size)
+		cached = cls._cache.get(path)
+		if cached is not None and cached[0] == version:
+			return cached[1]
+		with cls._lock:
+			cached = cls._cache.get(path)
+			if cached is not None and cached[0] == version:
+				return cached[1]
+			config = cls.load_agents_config(path)
+			validate(config, path)
+			cls._cache[path] = (version, config)
+			cls.reload_count += 1
+			log.info("Loaded config", extra={"config": label, "path": path, "reload": cls.reload_count})
+			return config
+
+	@classmethod
+	def get_agents_config(cls, path: str = AGENTS_CONFIG_PATH) -> Dict[str, Any]:
+		return cls._get_cached(path, cls.validate_agents_config, "agents")
+
+	@classmethod
+	def get_risk_model_config(cls, path: Optional[str] = None) -> Dict[str, Any]:
+		return cls._get_cached(path or os.getenv("RISK_MODEL_PATH") or RISK_MODEL_PATH, cls.validate_risk_model_config, "risk model")
+
+	@classmethod
+	def load_env_once(cls) -> None:
+		if cls._env_loaded:
+			return
+		with cls._lock:
+			if not cls._env_loaded:
+				load_dotenv()
+				cls._env_loaded = True
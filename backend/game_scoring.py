@@ -0,0 +1,276 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Stroop points per correct answer, as awarded by the frontend (before its time bonus).
+STROOP_POINTS_PER_CORRECT = 10
+RT_QUANTILES = (0.1, 0.5, 0.9)
+
+
+def _columns(session: Any, fields: Sequence[str], game: str) -> Dict[str, list]:
+	"""Accept a session as {"trials": [{...}, ...]}, a bare list of trial dicts, or columnar {field: [...]}."""
+	if isinstance(session, dict) and "trials" in session:
+		session = session["trials"]
+	if isinstance(session, list):
+		if not all(isinstance(t, dict) for t in session):
+			raise ValueError(f"{game} trials must be objects")
+		return {f: [t.get(f) for t in session] for f in fields}
+	if isinstance(session, dict):
+		lengths = {len(session[f]) for f in fields if isinstance(session.get(f), list)}
+		if len(lengths) > 1:
+			raise ValueError(f"{game} trial arrays must have equal lengths")
+		n = lengths.pop() if lengths else 0
+		return {f: session[f] if isinstance(session.get(f), list) else [None] * n for f in fields}
+	raise ValueError(f"{game} session must be a list of trials or an object of trial arrays")
+
+
+def _float_array(values: list) -> np.ndarray:
+	# None becomes NaN in the float conversion.
+	return np.asarray(values, dtype=np.float64)
+
+
+def _label_codes(values: list, vocabulary: Dict[str, int]) -> np.ndarray:
+	"""Integer codes for case/whitespace-normalised labels; normalises each distinct value once."""
+	codes = {v: vocabulary.setdefault("" if v is None else str(v).strip().lower(), len(vocabulary)) for v in set(values)}
+	return np.array(list(map(codes.__getitem__, values)), dtype=np.int64)
+
+
+def _item_lists(values: list, game: str) -> List[List[str]]:
+	items = []
+	for v in values:
+		if v is None:
+			items.append([])
+		elif isinstance(v, (list, tuple)):
+			items.append([str(x).strip().lower() for x in v])
+		else:
+			raise ValueError(f"{game} item lists must be arrays")
+	return items
+
+
+def _grouped_mean_std(values: np.ndarray, groups: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+	valid = ~np.isnan(values)
+	g, v = groups[valid], values[valid]
+	counts = np.bincount(g, minlength=n_groups)
+	sums = np.bincount(g, weights=v, minlength=n_groups)
+	squares = np.bincount(g, weights=v * v, minlength=n_groups)
+	with np.errstate(invalid="ignore", divide="ignore"):
+		mean = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+		var = np.where(counts > 1, (squares - counts * mean * mean) / np.maximum(counts - 1, 1), np.nan)
+	return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def _grouped_quantiles(values: np.ndarray, groups: np.ndarray, n_groups: int, quantiles: Sequence[float]) -> np.ndarray:
+	"""(n_groups, len(quantiles)) linear-interpolated quantiles of the non-NaN values in each group."""
+	valid = ~np.isnan(values)
+	g, v = groups[valid], values[valid]
+	order = np.lexsort((v, g))
+	g, v = g[order], v[order]
+	counts = np.bincount(g, minlength=n_groups)
+	starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+	result = np.full((n_groups, len(quantiles)), np.nan)
+	has = counts > 0
+	for k, q in enumerate(quantiles):
+		pos = starts[has] + q * (counts[has] - 1)
+		lo = np.floor(pos).astype(np.int64)
+		hi = np.ceil(pos).astype(np.int64)
+		result[has, k] = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+	return result
+
+
+def _multiset_overlap(targets: List[List[str]], responses: List[List[str]]) -> np.ndarray:
+	"""Per trial, how many response items match a target item, each target occurrence credited once."""
+	n = len(targets)
+	vocabulary = {}
+	def encode(lists: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+		trial = np.repeat(np.arange(n), [len(x) for x in lists])
+		codes = np.array([vocabulary.setdefault(item, len(vocabulary)) for x in lists for item in x], dtype=np.int64)
+		return trial, codes
+	t_trial, t_code = encode(targets)
+	r_trial, r_code = encode(responses)
+	size = max(len(vocabulary), 1)
+	t_keys, t_counts = np.unique(t_trial * size + t_code, return_counts=True)
+	r_keys, r_counts = np.unique(r_trial * size + r_code, return_counts=True)
+	shared, t_idx, r_idx = np.intersect1d(t_keys, r_keys, assume_unique=True, return_indices=True)
+	matched = np.minimum(t_counts[t_idx], r_counts[r_idx])
+	return np.bincount(shared // size, weights=matched, minlength=n).astype(np.int64)
+
+
+def _round(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+	return [None if v != v else round(v, digits) for v in values.tolist()]
+
+
+def _rows(columns: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+	return [{name: values[i] for name, values in columns.items()} for i in range(n)]
+
+
+class GameScorer:
+	"""Vectorised scoring of raw Stroop, memory and image-recall trials, for one session or a batch."""
+
+	@staticmethod
+	def _flatten(sessions: List[Any], fields: Sequence[str], game: str) -> Tuple[Dict[str, list], np.ndarray]:
+		merged: Dict[str, list] = {f: [] for f in fields}
+		sizes = []
+		for session in sessions:
+			columns = _columns(session, fields, game)
+			sizes.append(len(columns[fields[0]]))
+			for f in fields:
+				merged[f].extend(columns[f])
+		return merged, np.repeat(np.arange(len(sessions)), sizes)
+
+	@staticmethod
+	def score_stroop(sessions: List[Any]) -> List[Dict[str, Any]]:
+		"""Trials carry word, ink, response and rt_ms; a trial is congruent when word == ink."""
+		columns, session = GameScorer._flatten(sessions, ("word", "ink", "response", "rt_ms"), "stroop")
+		n = len(sessions)
+		vocabulary: Dict[str, int] = {}
+		word, ink, response = (_label_codes(columns[f], vocabulary) for f in ("word", "ink", "response"))
+		rt = _float_array(columns["rt_ms"])
+		correct = response == ink
+		congruent = word == ink
+
+		def count(mask: np.ndarray) -> np.ndarray:
+			return np.bincount(session[mask], minlength=n)
+
+		trials, hits = count(np.ones_like(correct, dtype=bool)), count(correct)
+		con_trials, inc_trials = count(congruent), count(~congruent)
+		con_hits, inc_hits = count(correct & congruent), count(correct & ~congruent)
+		correct_rt = np.where(correct, rt, np.nan)
+		mean_rt, sd_rt = _grouped_mean_std(correct_rt, session, n)
+		# One grouped pass for all trials, congruent and incongruent: group = session * 3 + kind.
+		kinds = np.concatenate((session * 3, session * 3 + np.where(congruent, 1, 2)))
+		grouped = _grouped_quantiles(np.concatenate((correct_rt, correct_rt)), kinds, 3 * n, RT_QUANTILES).reshape(n, 3, len(RT_QUANTILES))
+		quantiles, con_median, inc_median = grouped[:, 0], grouped[:, 1, 1], grouped[:, 2, 1]
+		with np.errstate(invalid="ignore", divide="ignore"):
+			accuracy = np.where(trials > 0, hits / np.maximum(trials, 1), np.nan)
+			con_accuracy = np.where(con_trials > 0, con_hits / np.maximum(con_trials, 1), np.nan)
+			inc_accuracy = np.where(inc_trials > 0, inc_hits / np.maximum(inc_trials, 1), np.nan)
+
+		return _rows({
+			"score": (hits * STROOP_POINTS_PER_CORRECT).tolist(),
+			"trials": trials.tolist(),
+			"correct": hits.tolist(),
+			"accuracy": _round(accuracy),
+			"congruent_accuracy": _round(con_accuracy),
+			"incongruent_accuracy": _round(inc_accuracy),
+			"accuracy_interference": _round(con_accuracy - inc_accuracy),
+			"mean_rt_ms": _round(mean_rt, 1),
+			"sd_rt_ms": _round(sd_rt, 1),
+			"p10_rt_ms": _round(quantiles[:, 0], 1),
+			"median_rt_ms": _round(quantiles[:, 1], 1),
+			"p90_rt_ms": _round(quantiles[:, 2], 1),
+			"congruent_median_rt_ms": _round(con_median, 1),
+			"incongruent_median_rt_ms": _round(inc_median, 1),
+			"interference_cost_ms": _round(inc_median - con_median, 1),
+		}, n)
+
+	@staticmethod
+	def score_memory(sessions: List[Any]) -> List[Dict[str, Any]]:
+		"""Trials carry target and response item lists (sequence or word recall) and optional rt_ms."""
+		columns, session = GameScorer._flatten(sessions, ("target", "response", "rt_ms"), "memory")
+		n = len(sessions)
+		targets, responses = _item_lists(columns["target"], "memory"), _item_lists(columns["response"], "memory")
+		rt = _float_array(columns["rt_ms"])
+		target_len = np.array([len(t) for t in targets], dtype=np.int64)
+		response_len = np.array([len(r) for r in responses], dtype=np.int64)
+		matched = _multiset_overlap(targets, responses) if targets else np.zeros(0, dtype=np.int64)
+
+		width = int(max(target_len.max(initial=0), response_len.max(initial=0)))
+		vocabulary: Dict[str, int] = {}
+		padded_t = np.full((len(targets), width), -1, dtype=np.int64)
+		padded_r = np.full((len(targets), width), -2, dtype=np.int64)
+		for i, (t, r) in enumerate(zip(targets, responses)):
+			padded_t[i, :len(t)] = [vocabulary.setdefault(x, len(vocabulary)) for x in t]
+			padded_r[i, :len(r)] = [vocabulary.setdefault(x, len(vocabulary)) for x in r]
+		positional = (padded_t == padded_r).sum(axis=1)
+		exact = (positional == target_len) & (target_len == response_len) & (target_len > 0)
+
+		def total(values: np.ndarray) -> np.ndarray:
+			return np.bincount(session, weights=values, minlength=n).astype(np.int64)
+
+		items, items_correct = total(target_len), total(matched)
+		span = np.zeros(n, dtype=np.int64)
+		np.maximum.at(span, session[exact], target_len[exact])
+		mean_rt, _ = _grouped_mean_std(rt, session, n)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			item_accuracy = np.where(items > 0, items_correct / np.maximum(items, 1), np.nan)
+			positional_accuracy = np.where(items > 0, total(positional) / np.maximum(items, 1), np.nan)
+
+		return _rows({
+			"score": total(exact).tolist(),
+			"trials": np.bincount(session, minlength=n).tolist(),
+			"levels_completed": total(exact).tolist(),
+			"span": span.tolist(),
+			"items": items.tolist(),
+			"items_correct": items_correct.tolist(),
+			"intrusions": (total(response_len) - items_correct).tolist(),
+			"item_accuracy": _round(item_accuracy),
+			"positional_accuracy": _round(positional_accuracy),
+			"mean_rt_ms": _round(mean_rt, 1),
+		}, n)
+
+	@staticmethod
+	def score_image_recall(sessions: List[Any]) -> List[Dict[str, Any]]:
+		"""Levels carry study and selected item lists, optional options (study + distractors) and rt_ms."""
+		columns, session = GameScorer._flatten(sessions, ("study", "selected", "options", "rt_ms"), "image_recall")
+		n = len(sessions)
+		study = [list(dict.fromkeys(x)) for x in _item_lists(columns["study"], "image_recall")]
+		selected = [list(dict.fromkeys(x)) for x in _item_lists(columns["selected"], "image_recall")]
+		options = [list(dict.fromkeys(x)) for x in _item_lists(columns["options"], "image_recall")]
+		rt = _float_array(columns["rt_ms"])
+		study_len = np.array([len(x) for x in study], dtype=np.int64)
+		selected_len = np.array([len(x) for x in selected], dtype=np.int64)
+		distractors = np.array([len(o) - len(s) if o else -1 for o, s in zip(options, study)], dtype=np.int64)
+		level_hits = _multiset_overlap(study, selected) if study else np.zeros(0, dtype=np.int64)
+		level_false_alarms = selected_len - level_hits
+
+		def total(values: np.ndarray) -> np.ndarray:
+			return np.bincount(session, weights=values, minlength=n).astype(np.int64)
+
+		hits, false_alarms, targets = total(level_hits), total(level_false_alarms), total(study_len)
+		known = distractors >= 0
+		lures = np.bincount(session[known], weights=distractors[known], minlength=n)
+		lure_false_alarms = np.bincount(session[known], weights=level_false_alarms[known], minlength=n)
+		mean_rt, _ = _grouped_mean_std(rt, session, n)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			hit_rate = np.where(targets > 0, hits / np.maximum(targets, 1), np.nan)
+			false_alarm_rate = np.where(lures > 0, lure_false_alarms / np.maximum(lures, 1), np.nan)
+
+		return _rows({
+			"score": total(np.maximum(level_hits - level_false_alarms, 0)).tolist(),
+			"levels": np.bincount(session, minlength=n).tolist(),
+			"hits": hits.tolist(),
+			"misses": (targets - hits).tolist(),
+			"false_alarms": false_alarms.tolist(),
+			"hit_rate": _round(hit_rate),
+			"false_alarm_rate": _round(false_alarm_rate),
+			"discrimination": _round(hit_rate - false_alarm_rate),
+			"mean_rt_ms": _round(mean_rt, 1),
+		}, n)
+
+	SCORERS = {
+		"stroop": ("stroop_colour", "score_stroop"),
+		"memory": ("memory_game", "score_memory"),
+		"image_recall": ("image_recall", "score_image_recall"),
+	}
+
+	@classmethod
+	def score_batch(cls, batch: Dict[str, List[Any]]) -> Dict[str, List[Dict[str, Any]]]:
+		"""{"stroop": [session, ...], "memory": [...], "image_recall": [...]} -> metrics per session."""
+		unknown = set(batch) - set(cls.SCORERS)
+		if unknown:
+			raise ValueError(f"Unknown games: {sorted(unknown)}")
+		results = {}
+		for game, sessions in batch.items():
+			if not isinstance(sessions, list):
+				raise ValueError(f"{game} must be a list of sessions")
+			results[game] = getattr(cls, cls.SCORERS[game][1])(sessions) if sessions else []
+		return results
+
+	@classmethod
+	def score_session(cls, trials: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+		"""Score one assessment's raw trials; returns (metrics per game, bundle score overrides)."""
+		results = cls.score_batch({game: [session] for game, session in trials.items() if session is not None})
+		metrics = {game: rows[0] for game, rows in results.items()}
+		overrides = {cls.SCORERS[game][0]: m["score"] for game, m in metrics.items()}
+		return metrics, overrides
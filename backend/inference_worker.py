@@ -0,0 +1,177 @@
+"""
+Inference worker: runs assessment pipelines taken from the job queue.
+
+    cd backend
+    python -m inference_worker
+
+Start any number of these next to an API started with INFERENCE_MODE=queue. Each worker loads the
+models once, then claims one job at a time from JobQueue (output/jobs.db or JOB_QUEUE_DB), runs
+AiAgent.run_pipeline on it and writes the result back. The lease on a running job is extended by a
+heartbeat every few seconds; if the worker dies, another worker picks the job up once the lease
+runs out. A job cancelled while it runs (or whose lease was lost) stops at the pipeline's next
+cancellation checkpoint. SIGTERM/SIGINT finish the current job and exit.
+
+Environment: JOB_VISIBILITY_TIMEOUT_SECONDS (default 120), JOB_POLL_SECONDS (default 1),
+JOB_MAX_ATTEMPTS (default 3), JOB_RETENTION_HOURS (default 168), PRELOAD_MODELS (default 1),
+WORKER_METRICS_PORT (serve this worker's /metrics on that port; off by default).
+"""
+
+import contextvars
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import cancellation
+from cancellation import CancellationToken, PipelineCancelled
+from job_queue import CANCELLED, Job, JobQueue
+from structured_logging import LogPipeline, correlation, get_logger
+import telemetry
+
+
+log = get_logger("worker")
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
+
+
+def _run_assessment(payload: Dict[str, Any]) -> Dict[str, Any]:
+	from AiAgent import run_pipeline
+
+	return run_pipeline(**payload)
+
+
+# Job kind -> handler taking the job payload and returning a JSON-serialisable result.
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+	"assessment": _run_assessment,
+}
+
+
+class InferenceWorker:
+	def __init__(self, queue: JobQueue, worker_id: Optional[str] = None, visibility_timeout: float = 120, poll_interval: float = 1.0):
+		self.queue = queue
+		self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+		self.visibility_timeout = visibility_timeout
+		self.poll_interval = poll_interval
+		self.stopping = threading.Event()
+
+	def _heartbeat(self, job: Job, done: threading.Event, token: CancellationToken) -> None:
+		# Frequent enough that a cancelled job stops within seconds, whatever the lease length.
+		while not done.wait(min(self.visibility_timeout / 3, 5.0)):
+			if not self.queue.heartbeat(job.id, self.worker_id, self.visibility_timeout):
+				current = self.queue.get(job.id)
+				if current is not None and current.status == CANCELLED:
+					token.cancel("job_cancelled")
+				else:
+					log.warning("Lost the lease on a running job", extra={"job_id": job.id})
+					token.cancel("lease_lost")
+				return
+
+	def process(self, job: Job) -> None:
+		handler = JOB_HANDLERS.get(job.kind)
+		done = threading.Event()
+		token = CancellationToken()
+		beat = threading.Thread(target=self._heartbeat, args=(job, done, token), name="job-heartbeat", daemon=True)
+		with correlation(request_id=job.request_id), cancellation.scope(token):
+			log.info("Job started", extra={"job_id": job.id, "kind": job.kind, "attempt": job.attempts})
+			beat.start()
+			started = time.perf_counter()
+			try:
+				if handler is None:
+					raise ValueError(f"No handler for job kind {job.kind!r}")
+				result = handler(job.payload)
+			except PipelineCancelled as e:
+				done.set()
+				log.info("Job stopped", extra={"job_id": job.id, "reason": e.reason, "stage": e.stage})
+			except Exception as e:
+				done.set()
+				self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}")
+			else:
+				done.set()
+				if self.queue.complete(job.id, self.worker_id, result):
+					with correlation(assessment_id=result.get("assessment_id")):
+						log.info("Job completed", extra={"job_id": job.id, "seconds": round(time.perf_counter() - started, 2)})
+			finally:
+				beat.join()
+
+	def run_once(self) -> bool:
+		"""Process one job if any is ready; returns whether one was."""
+		job = self.queue.claim(self.worker_id, self.visibility_timeout)
+		if job is None:
+			return False
+		# A fresh context per job, so ids the pipeline binds do not leak into the next job's logs.
+		contextvars.copy_context().run(self.process, job)
+		return True
+
+	def run(self, retention_seconds: Optional[float] = None) -> None:
+		log.info("Worker waiting for jobs", extra={"worker": self.worker_id, "queue": self.queue.db_path})
+		next_purge = 0.0
+		while not self.stopping.is_set():
+			if retention_seconds and time.monotonic() >= next_purge:
+				purged = self.queue.purge_finished(retention_seconds)
+				if purged:
+					log.info("Purged finished jobs", extra={"count": purged})
+				next_purge = time.monotonic() + 3600
+			if not self.run_once():
+				self.stopping.wait(self.poll_interval)
+		log.info("Worker stopped", extra={"worker": self.worker_id})
+
+
+def serve_metrics(port: int) -> None:
+	"""Expose this worker's stage and job metrics for Prometheus, since workers have no API."""
+	from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+	class MetricsHandler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path != "/metrics":
+				self.send_error(404)
+				return
+			body = telemetry.REGISTRY.render().encode("utf-8")
+			self.send_response(200)
+			self.send_header("Content-Type", telemetry.CONTENT_TYPE)
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+	threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+	log.info("Serving worker metrics", extra={"port": port})
+
+
+def main() -> None:
+	LogPipeline.configure()
+	metrics_port = int(os.getenv("WORKER_METRICS_PORT", "0"))
+	if metrics_port:
+		serve_metrics(metrics_port)
+	if os.getenv("PRELOAD_MODELS", "1") != "0":
+		from score_collector import ScoreCollector
+
+		ScoreCollector.preload_models()
+	worker = InferenceWorker(
+		JobQueue.for_output_dir(OUTPUT_DIR),
+		visibility_timeout=float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120")),
+		poll_interval=float(os.getenv("JOB_POLL_SECONDS", "1")),
+	)
+
+	def stop(signum, frame):
+		log.info("Stopping after the current job", extra={"signal": signum})
+		worker.stopping.set()
+
+	signal.signal(signal.SIGTERM, stop)
+	signal.signal(signal.SIGINT, stop)
+	try:
+		worker.run(retention_seconds=float(os.getenv("JOB_RETENTION_HOURS", "168")) * 3600)
+	finally:
+		LogPipeline.shutdown()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import cancellation
+from structured_logging import get_logger
+from telemetry import REGISTRY
+
+
+log = get_logger("jobs")
+
+JOB_EVENTS = REGISTRY.counter("foreknow_job_events_total", "Job queue transitions: enqueued, claimed, reclaimed, completed, retried, failed, cancelled.", ("event",))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+	id TEXT PRIMARY KEY,
+	kind TEXT NOT NULL,
+	payload TEXT NOT NULL,
+	status TEXT NOT NULL,
+	attempts INTEGER NOT NULL DEFAULT 0,
+	max_attempts INTEGER NOT NULL,
+	visible_at REAL NOT NULL,
+	lease_owner TEXT,
+	request_id TEXT,
+	result TEXT,
+	error TEXT,
+	created_at REAL NOT NULL,
+	updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, visible_at);
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobFailed(Exception):
+	"""A job exhausted its attempts; the message is the last error."""
+
+
+class JobCancelled(Exception):
+	"""A job was cancelled before it finished."""
+
+
+class Job:
+	def __init__(self, row: sqlite3.Row):
+		self.id = row["id"]
+		self.kind = row["kind"]
+		self.payload: Dict[str, Any] = json.loads(row["payload"])
+		self.status = row["status"]
+		self.attempts = row["attempts"]
+		self.max_attempts = row["max_attempts"]
+		self.visible_at = row["visible_at"]
+		self.lease_owner = row["lease_owner"]
+		self.request_id = row["request_id"]
+		self.result: Optional[Dict[str, Any]] = json.loads(row["result"]) if row["result"] else None
+		self.error = row["error"]
+		self.created_at = row["created_at"]
+		self.updated_at = row["updated_at"]
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"job_id": self.id,
+			"kind": self.kind,
+			"status": self.status,
+			"attempts": self.attempts,
+			"max_attempts": self.max_attempts,
+			"error": self.error,
+			"assessment_id": (self.result or {}).get("assessment_id"),
+			"created_at": self.created_at,
+			"updated_at": self.updated_at,
+		}
+
+
+class JobQueue:
+	"""Durable job queue in a local SQLite file, shared by the API and any number of worker processes.
+
+	A worker claims the oldest ready job and holds a lease on it for `visibility_timeout` seconds,
+	extended by heartbeats while it runs. A job whose lease runs out (its worker died or hung) is
+	claimed again by another worker. Failed attempts are retried with exponential backoff until
+	max_attempts, then the job is marked failed. Results are written back as JSON for the
+	submitter to read.
+	"""
+
+	_instances: Dict[str, "JobQueue"] = {}
+	_instances_lock = threading.Lock()
+
+	def __init__(self, db_path: str, max_attempts: int = 3):
+		self.db_path = db_path
+		self.max_attempts = max_attempts
+		self._lock = threading.Lock()
+		# Autocommit mode; writes take the database lock up front with BEGIN IMMEDIATE so two
+		# workers can never claim the same job.
+		self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+		self._conn.row_factory = sqlite3.Row
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.executescript(_SCHEMA)
+
+	@classmethod
+	def for_output_dir(cls, output_dir: str) -> "JobQueue":
+		db_path = os.getenv("JOB_QUEUE_DB") or os.path.join(output_dir, "jobs.db")
+		with cls._instances_lock:
+			queue = cls._instances.get(db_path)
+			if queue is None:
+				queue = cls._instances[db_path] = cls(db_path, max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+			return queue
+
+	@contextmanager
+	def _write(self) -> Iterator[sqlite3.Connection]:
+		with self._lock:
+			self._conn.execute("BEGIN IMMEDIATE")
+			try:
+				yield self._conn
+			except BaseException:
+				self._conn.execute("ROLLBACK")
+				raise
+			self._conn.execute("COMMIT")
+
+	def enqueue(self, kind: str, payload: Dict[str, Any], request_id: Optional[str] = None, max_attempts: Optional[int] = None) -> str:
+		job_id = uuid.uuid4().hex
+		now = time.time()
+		with self._write() as conn:
+			conn.execute(
+				"INSERT INTO jobs (id, kind, payload, status, max_attempts, visible_at, request_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				(job_id, kind, json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now, request_id, now, now),
+			)
+		JOB_EVENTS.inc(event="enqueued")
+		log.info("Job enqueued", extra={"job_id": job_id, "kind": kind})
+		return job_id
+
+	def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+		"""Lease the oldest ready job (queued, or running with an expired lease) to worker_id."""
+		while True:
+			now = time.time()
+			with self._write() as conn:
+				row = conn.execute(
+					"SELECT * FROM jobs WHERE status IN (?, ?) AND visible_at <= ? ORDER BY created_at LIMIT 1",
+					(QUEUED, RUNNING, now),
+				).fetchone()
+				if row is None:
+					return None
+				expired = row["status"] == RUNNING
+				if expired and row["attempts"] >= row["max_attempts"]:
+					conn.execute(
+						"UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated_at = ? WHERE id = ?",
+						(FAILED, f"Lease expired on the last attempt ({row['lease_owner']})", now, row["id"]),
+					)
+					JOB_EVENTS.inc(event="failed")
+					log.error("Job lease expired on its last attempt", extra={"job_id": row["id"], "worker": row["lease_owner"]})
+					continue
+				conn.execute(
+					"UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, visible_at = ?, updated_at = ? WHERE id = ?",
+					(RUNNING, worker_id, now + visibility_timeout, now, row["id"]),
+				)
+				job = Job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+			if expired:
+				JOB_EVENTS.inc(event="reclaimed")
+				log.warning("Reclaimed job after its lease expired", extra={"job_id": job.id, "previous_worker": row["lease_owner"], "attempt": job.attempts})
+			JOB_EVENTS.inc(event="claimed")
+			return job
+
+	def heartbeat(self, job_id: str, worker_id: str, visibility_timeout: float) -> bool:
+		"""Extend the lease; False when the worker no longer holds it."""
+		now = time.time()
+		with self._write() as conn:
+			cur = conn.execute(
+				"UPDATE jobs SET visible_at = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+				(now + visibility_timeout, now, job_id, RUNNING, worker_id),
+			)
+		return cur.rowcount == 1
+
+	def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+		with self._write() as conn:
+			cur = conn.execute(
+				"UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+				(DONE, json.dumps(result, default=str), time.time(), job_id, RUNNING, worker_id),
+			)
+		if cur.rowcount != 1:
+			log.warning("Finished job after losing its lease; result discarded", extra={"job_id": job_id})
+			return False
+		JOB_EVENTS.inc(event="completed")
+		return True
+
+	def fail(self, job_id: str, worker_id: str, error: str, base_delay: float = 5, max_delay: float = 300) -> Optional[str]:
+		"""Record a failed attempt: back to the queue after a backoff delay, or failed for good on the last attempt."""
+		now = time.time()
+		with self._write() as conn:
+			row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?", (job_id, RUNNING, worker_id)).fetchone()
+			if row is None:
+				return None
+			if row["attempts"] < row["max_attempts"]:
+				status, visible_at = QUEUED, now + min(base_delay * 2 ** (row["attempts"] - 1), max_delay)
+			else:
+				status, visible_at = FAILED, now
+			conn.execute(
+				"UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, visible_at = ?, updated_at = ? WHERE id = ?",
+				(status, error[:2000], visible_at, now, job_id),
+			)
+		JOB_EVENTS.inc(event="retried" if status == QUEUED else "failed")
+		log.warning("Job attempt failed", extra={"job_id": job_id, "attempt": row["attempts"], "status": status, "error": error[:200]})
+		return status
+
+	def cancel(self, job_id: Optional[str] = None, request_id: Optional[str] = None) -> int:
+		"""Cancel unfinished jobs by job id or by the id of the request that submitted them.
+
+		Queued jobs are never claimed. A worker running one sees the cancellation at its next
+		heartbeat and stops at the pipeline's next checkpoint. Returns how many jobs were cancelled.
+		"""
+		with self._write() as conn:
+			cur = conn.execute(
+				"UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ? WHERE (id = ? OR request_id = ?) AND status IN (?, ?)",
+				(CANCELLED, time.time(), job_id, request_id, QUEUED, RUNNING),
+			)
+		if cur.rowcount:
+			JOB_EVENTS.inc(cur.rowcount, event="cancelled")
+			log.info("Jobs cancelled", extra={"job_id": job_id, "count": cur.rowcount})
+		return cur.rowcount
+
+	def get(self, job_id: str) -> Optional[Job]:
+		with self._lock:
+			row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+		return Job(row) if row else None
+
+	def wait(self, job_id: str, timeout: float, poll_interval: float = 0.25) -> Dict[str, Any]:
+		"""Block until the job finishes and return its result; raises JobFailed, JobCancelled or TimeoutError.
+
+		When the waiting run is cancelled, or the wait times out, the job is cancelled too: nobody will
+		read its result, so no worker should spend a pipeline run on it.
+		"""
+		deadline = time.monotonic() + timeout
+		while True:
+			job = self.get(job_id)
+			if job is None:
+				raise KeyError(job_id)
+			if job.status == DONE:
+				return job.result or {}
+			if job.status == FAILED:
+				raise JobFailed(job.error or "job failed")
+			if job.status == CANCELLED:
+				raise JobCancelled(f"Job {job_id} was cancelled")
+			if time.monotonic() >= deadline:
+				self.cancel(job_id)
+				raise TimeoutError(f"Job {job_id} still {job.status} after {timeout:.0f}s")
+			try:
+				cancellation.sleep(poll_interval, "job_wait")
+			except cancellation.PipelineCancelled:
+				self.cancel(job_id)
+				raise
+
+	def counts(self) -> Dict[str, int]:
+		with self._lock:
+			rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+		return {row["status"]: row["n"] for row in rows}
+
+	def purge_finished(self, max_age_seconds: float) -> int:
+		"""Delete done, failed and cancelled jobs last updated more than max_age_seconds ago."""
+		with self._write() as conn:
+			cur = conn.execute("DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?", (DONE, FAILED, CANCELLED, time.time() - max_age_seconds))
+		return cur.rowcount
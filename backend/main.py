@@ -1,19 +1,69 @@
 import os
-import shutil
 import json
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Awaitable
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+if __name__ == "__main__":
+	# `python main.py` serves the app through uvicorn's own entry point rather than as this script.
+	# Spawned children (the PDF render workers) re-import the parent's __main__ script, and as this
+	# file that would load torch, Whisper and the agent stack into every one of them.
+	import signal
+	import subprocess
+	import sys
+	from dotenv import load_dotenv
+	load_dotenv()
+	server = subprocess.Popen([
+		sys.executable, "-m", "uvicorn", "main:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+		"--host", os.getenv("SERVER_HOST", "127.0.0.1"), "--port", os.getenv("SERVER_PORT", "8000"), "--reload",
+	])
+	# Ctrl+C reaches uvicorn as well; wait for its graceful shutdown instead of cutting it short.
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	signal.signal(signal.SIGTERM, lambda *_: server.terminate())
+	sys.exit(server.wait())
+
+from fastapi import Depends, FastAPI, UploadFile, File, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hmac
+import re
 import time
+import uuid
 
-from AiAgent import run_pipeline
+from AiAgent import run_pipeline, LOGO_PATH
+from pdf_generator import PDFGenerator
+from report_export import ReportExporter
+from assessment_store import AssessmentStore
+from upload_storage import UploadStorage
+from report_http import PRIVATE_CACHE_CONTROL, ReportFileResponder
+from response_models import (
+	RiskResult, ScoreSummary, SubmitTestsResponse, SpeechAssessmentResponse,
+	parse_fields, dump_model, json_response,
+)
+from config_manager import ConfigManager
+from risk_scoring import RiskModel
+from metrics_history import ANONYMOUS_USER, MetricsHistory, HISTORY_METRICS
+from game_scoring import GameScorer
+import telemetry
+from telemetry import span
+from structured_logging import LogPipeline, correlation, get_logger
+from profiling import PROFILE_HEADER, ProfileSession, RequestProfiler
+from admission import PIPELINE_ADMISSION, AdmissionRejected
+from coalescing import PIPELINE_COALESCER, submission_fingerprint
+from job_queue import JobCancelled, JobQueue
+from cancellation import CANCELLABLE, CancellationToken, PipelineCancelled
+from structured_logging import current_request_id
 
 load_dotenv()
+LogPipeline.configure()
+log = get_logger("api")
+# Parse and validate Agents/agent.yaml and risk_model.yaml at startup; requests reuse the cached copies.
+ConfigManager.get_agents_config()
+RiskModel.current()
 
 app = FastAPI(title="ForeKnow Cognitive Assessment API", version="0.1.0")
 
@@ -25,10 +75,11 @@ origins = [
 	os.getenv("FRONTEND_ORIGIN", "*")
 ]
 
-SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
-SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
 SUMMARY_FILE_PATH = os.getenv("SUMMARY_FILE_PATH", "backend/output/summary_20250924_041735.txt")
 UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "25"))
+UPLOAD_TTL_SECONDS = int(os.getenv("UPLOAD_TTL_SECONDS", "3600"))
+UPLOAD_ABANDONED_TTL_SECONDS = int(os.getenv("UPLOAD_ABANDONED_TTL_SECONDS", "86400"))
 
 app.add_middleware(
 	CORSMiddleware,
@@ -36,19 +87,84 @@ app.add_middleware(
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	expose_headers=["Server-Timing", "X-Request-ID", "X-Profile", "Retry-After"],
 )
 
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    print(f"🌐 {request.method} {request.url}")
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    print(f"✅ Response: {response.status_code} (took {process_time:.2f}s)")
+    start_time = time.perf_counter()
+    # Honour a caller-supplied X-Request-ID so logs can be joined with the frontend's.
+    request_id = request.headers.get("x-request-id", "")
+    if not _REQUEST_ID_RE.match(request_id):
+        request_id = uuid.uuid4().hex[:16]
+    with correlation(request_id=request_id):
+        log.info("Request started", extra={"method": request.method, "path": request.url.path})
+        timings, token = telemetry.begin_request()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            telemetry.end_request(token)
+            process_time = time.perf_counter() - start_time
+            # Label by route template rather than raw path so ids do not explode the series count.
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            telemetry.HTTP_REQUESTS.inc(method=request.method, route=route, status=str(status))
+            telemetry.HTTP_SECONDS.observe(process_time, method=request.method, route=route)
+            log.info("Request finished", extra={"method": request.method, "route": route, "status": status, "seconds": round(process_time, 3)})
+    response.headers["Server-Timing"] = timings.server_timing(process_time)
+    response.headers["X-Request-ID"] = request_id
     return response
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+store = AssessmentStore.for_output_dir(OUTPUT_DIR)
+history = MetricsHistory.for_output_dir(OUTPUT_DIR)
+# "queue" hands pipelines to `python -m inference_worker` processes instead of running them here.
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "inline").lower()
+JOB_RESULT_TIMEOUT_SECONDS = float(os.getenv("JOB_RESULT_TIMEOUT_SECONDS", "900"))
+jobs = JobQueue.for_output_dir(OUTPUT_DIR) if INFERENCE_MODE == "queue" else None
+if jobs is not None:
+	telemetry.REGISTRY.gauge("foreknow_job_queue_depth", "Assessment jobs waiting for an inference worker.", callback=lambda: jobs.counts().get("queued", 0))
+uploads = UploadStorage(
+	os.path.join(os.path.dirname(__file__), UPLOADS_DIR),
+	max_bytes=UPLOAD_MAX_MB * 1024 * 1024,
+	finished_ttl_seconds=UPLOAD_TTL_SECONDS,
+	abandoned_ttl_seconds=UPLOAD_ABANDONED_TTL_SECONDS,
+)
+
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0")) or None
+RETENTION_MAX_TOTAL_MB = float(os.getenv("RETENTION_MAX_TOTAL_MB", "0")) or None
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+
+
+async def _retention_loop():
+	max_total_bytes = int(RETENTION_MAX_TOTAL_MB * 1024 * 1024) if RETENTION_MAX_TOTAL_MB else None
+	while True:
+		try:
+			await run_in_threadpool(store.evict, RETENTION_MAX_AGE_DAYS, max_total_bytes)
+		except Exception as e:
+			log.error("Retention eviction failed", extra={"error": str(e)})
+		await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+
+
+async def _upload_janitor_loop():
+	while True:
+		try:
+			await run_in_threadpool(uploads.cleanup_expired)
+		except Exception as e:
+			log.error("Upload cleanup failed", extra={"error": str(e)})
+		await asyncio.sleep(max(60, min(UPLOAD_TTL_SECONDS, 900)))
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+	if RETENTION_MAX_AGE_DAYS or RETENTION_MAX_TOTAL_MB:
+		asyncio.create_task(_retention_loop())
+	asyncio.create_task(_upload_janitor_loop())
 
 
 class GameScores(BaseModel):
@@ -64,54 +180,189 @@ class AssessmentRequest(BaseModel):
 	offline_sentiment: bool = False
 
 
+class ReportExportRequest(BaseModel):
+	ids: List[str] = Field(default_factory=list)
+	start: Optional[datetime] = None
+	end: Optional[datetime] = None
+
+
+class GameScoreRequest(BaseModel):
+	stroop: List[Any] = Field(default_factory=list)
+	memory: List[Any] = Field(default_factory=list)
+	image_recall: List[Any] = Field(default_factory=list)
+
+
+class RiskScoreRequest(BaseModel):
+	records: List[Dict[str, Any]] = Field(default_factory=list)
+	ids: List[str] = Field(default_factory=list)
+	start: Optional[datetime] = None
+	end: Optional[datetime] = None
+	explain: bool = False
+	persist: bool = False
+
+
+EXPORT_MAX_ASSESSMENTS = int(os.getenv("EXPORT_MAX_ASSESSMENTS", "500"))
+RISK_BATCH_MAX_RECORDS = int(os.getenv("RISK_BATCH_MAX_RECORDS", "100000"))
+GAME_BATCH_MAX_SESSIONS = int(os.getenv("GAME_BATCH_MAX_SESSIONS", "10000"))
+
+
+def _parse_trials(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+	"""Parse and validate the submit-tests `trials` JSON so malformed input fails with 400 up front."""
+	if not raw:
+		return None
+	try:
+		parsed = json.loads(raw)
+		if not isinstance(parsed, dict):
+			raise ValueError("trials must be a JSON object keyed by game")
+		GameScorer.score_session(parsed)
+	except (ValueError, TypeError) as e:
+		raise HTTPException(status_code=400, detail=f"Invalid trials: {e}")
+	return parsed
+
+
+@app.get("/metrics")
+def metrics():
+	return Response(content=telemetry.REGISTRY.render(), media_type=telemetry.CONTENT_TYPE)
+
+
 @app.get("/api/health")
 def health():
-	return {"status": "ok"}
+	return {"status": "ok", "config_reloads": ConfigManager.reload_count}
+
+async def pipeline_slot():
+	"""Hold a pipeline slot for the whole request (upload save through response); 429 when none is free in time."""
+	try:
+		granted = await PIPELINE_ADMISSION.acquire()
+	except AdmissionRejected as e:
+		raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+	try:
+		yield
+	finally:
+		PIPELINE_ADMISSION.release(granted)
+
+
+async def _run_pipeline_for(request: Request, saved_uploads: List[Any], **kwargs: Any) -> Tuple[Dict[str, Any], Optional[ProfileSession]]:
+	"""Run the pipeline in the threadpool, under a profile when the request opts in or is sampled.
+
+	An identical submission (same parameters and audio content) already running is joined and its
+	result shared, so double-clicks and client retries do not run the models and LLMs again.
+	Profiled requests always get a run of their own, but are cancelled like any other. With
+	INFERENCE_MODE=queue the pipeline runs on the inference workers, so nothing is profiled here.
+	"""
+	if jobs is not None:
+		if request.headers.get(PROFILE_HEADER):
+			log.info("Profiling skipped: pipelines run on the inference workers")
+		profile = None
+	else:
+		profile = RequestProfiler.for_request(request.headers)
+	if profile is None:
+		key = submission_fingerprint({k: v for k, v in kwargs.items() if k != "audio_path"}, saved_uploads)
+		result, _ = await _unless_abandoned(request, PIPELINE_COALESCER.run(key, lambda: _run_pipeline(kwargs)))
+		return result, None
+	# A key nobody else has: the run is not shared, but gets the coalescer's cancellable thread.
+	result, _ = await _unless_abandoned(request, PIPELINE_COALESCER.run(f"profiled:{uuid.uuid4().hex}", lambda: profile.run(run_pipeline, **kwargs)))
+	paths = await run_in_threadpool(profile.write, OUTPUT_DIR, result["assessment_id"])
+	store.add_artifacts(result["assessment_id"], paths)
+	return result, profile
+
+
+# nginx's status for a client that closed the connection before the response was ready.
+CLIENT_CLOSED_REQUEST = 499
+_ABANDON_POLL_SECONDS = 0.5
+
+
+async def _unless_abandoned(request: Request, pipeline: Awaitable[Any]) -> Any:
+	"""Await the pipeline, but stop as soon as the client disconnects or the request is cancelled by id.
+
+	The request then returns at once and frees its pipeline slot. The run itself stops at its next
+	cancellation checkpoint unless an identical submission is still waiting on it.
+	"""
+	task = asyncio.ensure_future(pipeline)
+	# request.is_disconnected() never sees the disconnect through the HTTP middleware, so listen for it.
+	gone = asyncio.ensure_future(_client_gone(request))
+	request_id = current_request_id() or ""
+	token = CancellationToken()
+	CANCELLABLE.register(request_id, token)
+	try:
+		while True:
+			await asyncio.wait({task, gone}, timeout=_ABANDON_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+			if task.done():
+				break
+			if gone.done():
+				token.cancel("client_disconnected")
+			if token.cancelled:
+				task.cancel(token.reason)
+				log.info("Assessment abandoned", extra={"reason": token.reason})
+				if token.reason == "client_disconnected":
+					raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+				raise HTTPException(status_code=409, detail="Assessment cancelled")
+		try:
+			return task.result()
+		except (PipelineCancelled, JobCancelled):
+			raise HTTPException(status_code=409, detail="Assessment cancelled")
+	finally:
+		gone.cancel()
+		if not task.done():
+			task.cancel("abandoned")
+		CANCELLABLE.unregister(request_id, token)
+
+
+async def _client_gone(request: Request) -> None:
+	"""Return once the client disconnects; the request body must already have been read."""
+	while (await request.receive())["type"] != "http.disconnect":
+		pass
+
+
+def _run_pipeline(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+	"""Run the pipeline in this process, or with INFERENCE_MODE=queue enqueue it for the inference workers and wait for the result."""
+	if jobs is None:
+		return run_pipeline(**kwargs)
+	job_id = jobs.enqueue("assessment", kwargs, request_id=current_request_id())
+	return jobs.wait(job_id, timeout=JOB_RESULT_TIMEOUT_SECONDS)
+
 
-@app.post("/api/submit-tests")
+def _profile_link(result: Dict[str, Any]) -> str:
+	return f"/api/assessments/{result['assessment_id']}/profile"
+
+
+@app.post("/api/submit-tests", response_model=SubmitTestsResponse)
 async def submit_tests(
+	request: Request,
 	memory_score: int = Form(...),
 	stroop_score: int = Form(...), 
 	image_recall_score: int = Form(...),
 	audio_q1: Optional[UploadFile] = File(None),
 	audio_q2: Optional[UploadFile] = File(None),
 	audio_q3: Optional[UploadFile] = File(None),
-	audio_q4: Optional[UploadFile] = File(None)
+	audio_q4: Optional[UploadFile] = File(None),
+	fast: bool = Form(False),
+	user_id: Optional[str] = Form(None),
+	trials: Optional[str] = Form(None, description="JSON object of raw trials per game (stroop, memory, image_recall)"),
+	fields: Optional[str] = Query(None, description="Comma-separated top-level response fields to return"),
+	include_transcripts: bool = Query(False, description="Include Whisper transcriptions in all_scores"),
+	_slot: None = Depends(pipeline_slot),
 ):
+	selected_fields = parse_fields(SubmitTestsResponse, fields)
+	raw_trials = _parse_trials(trials)
 	try:
-		print(f"🔥 Backend /api/submit-tests endpoint hit!")
-		print(f"Received scores - Memory: {memory_score}, Stroop: {stroop_score}, Image Recall: {image_recall_score}")
+		log.info("Received test scores", extra={"memory_score": memory_score, "stroop_score": stroop_score, "image_recall_score": image_recall_score})
 		if memory_score is None or stroop_score is None or image_recall_score is None:
 			raise HTTPException(status_code=400, detail="All numeric scores (memory_score, stroop_score, image_recall_score) are required")
 		
-		uploads_path = os.path.join(os.path.dirname(__file__), UPLOADS_DIR)
-		os.makedirs(uploads_path, exist_ok=True)
-		
-		audio_files = []
-		audio_uploads = [
-			("audio_q1", audio_q1),
-			("audio_q2", audio_q2), 
-			("audio_q3", audio_q3),
-			("audio_q4", audio_q4)
-		]
-		
-		for _, audio_file in audio_uploads:
-			if audio_file and audio_file.filename:
-				file_path = os.path.join(uploads_path, audio_file.filename)
-				with open(file_path, "wb") as buffer:
-					shutil.copyfileobj(audio_file.file, buffer)
-				audio_files.append(audio_file.filename)
-				print(f"Saved audio file: {audio_file.filename}")
-
-		audio_file_paths: list[str] = []
-		if audio_files:
-			for filename in audio_files:
-				file_path = os.path.join(uploads_path, filename)
-				audio_file_paths.append(file_path)
-				print(f"Prepared audio file for AI analysis: {file_path}")
-
-		print("🤖 Running AI analysis pipeline...")
+		saved_uploads = await uploads.save_all({
+			"audio_q1": audio_q1,
+			"audio_q2": audio_q2,
+			"audio_q3": audio_q3,
+			"audio_q4": audio_q4,
+		})
+		submission_dir = UploadStorage.submission_dir_of(saved_uploads)
+		audio_files = [u.original_name for u in saved_uploads]
+		audio_file_paths: list[str] = [u.path for u in saved_uploads]
+		for u in saved_uploads:
+			log.info("Saved audio file", extra={"file_name": u.original_name, "bytes": u.size, "sha256": u.sha256[:12]})
+
 		ai_result = {}
+		profile = None
 		try:
 			if not audio_files:
 				raise ValueError("Audio files are required for cognitive assessment")
@@ -120,42 +371,56 @@ async def submit_tests(
 				"memory_game": memory_score,
 				"image_recall": image_recall_score,
 			}
-			ai_result = run_pipeline(
-				sentiment_dir="D:/Models/Sentiment",
+			ai_result, profile = await _run_pipeline_for(
+				request,
+				saved_uploads,
 				scores=scores,
 				audio_path=audio_file_paths,
-				offline_sentiment=False
+				offline_sentiment=False,
+				fast=fast,
+				user_id=user_id,
+				trials=raw_trials,
 			)
 			
 			
-			print("✅ AI analysis completed successfully")
-			print(f"Generated files: PDF={os.path.basename(ai_result.get('pdf_path', 'none'))}")
+			log.info("AI analysis completed", extra={"pdf": os.path.basename(ai_result.get("pdf_path", "none"))})
 			
+		except HTTPException:
+			raise
 		except Exception as ai_error:
-			print(f"❌ AI analysis failed: {str(ai_error)}")
-		response_data = {
-			"memory_score": memory_score,
-			"stroop_score": stroop_score,
-			"image_recall_score": image_recall_score,
-			"audio_files": audio_files,
-			"summary_report": ai_result.get("summary", "Analysis completed"),
-			"doctor_report": ai_result.get("doctor_report", "Report generated"),
-			"email_content": ai_result.get("email", "Assessment completed"),
-			"cognitive_risk": ai_result.get("risk", {"category": "unknown", "probability": 0.0}),
-			"pdf_filename": os.path.basename(ai_result.get("pdf_path", "")) if ai_result.get("pdf_path") else None,
-			"all_scores": ai_result.get("scores", {}),
-			"status": "completed",
-			"ai_analysis_success": "ai_error" not in ai_result,
-			"ai_error": ai_result.get("ai_error", None),
-			"fallback_mode": ai_result.get("fallback_mode", False),
-			"ai_service_status": ai_result.get("ai_service_status", "unknown")
-		}
+			log.error("AI analysis failed", extra={"error": str(ai_error)})
+		finally:
+			UploadStorage.mark_finished(submission_dir)
+		final_scores = ai_result.get("scores", {})
+		response_model = SubmitTestsResponse(
+			assessment_id=ai_result.get("assessment_id"),
+			memory_score=final_scores.get("memory_game", memory_score),
+			stroop_score=final_scores.get("stroop_colour", stroop_score),
+			image_recall_score=final_scores.get("image_recall", image_recall_score),
+			audio_files=audio_files,
+			summary_report=ai_result.get("summary", "Analysis completed"),
+			doctor_report=ai_result.get("doctor_report", "Report generated"),
+			email_content=ai_result.get("email", "Assessment completed"),
+			cognitive_risk=RiskResult(**ai_result.get("risk", {"category": "unknown", "probability": 0.0})),
+			pdf_filename=os.path.basename(ai_result.get("pdf_path", "")) if ai_result.get("pdf_path") else None,
+			all_scores=ScoreSummary.from_bundle(ai_result["scores"], include_transcripts) if ai_result.get("scores") else None,
+			status="completed",
+			ai_analysis_success="ai_error" not in ai_result,
+			ai_error=ai_result.get("ai_error", None),
+			fallback_mode=ai_result.get("fallback_mode", False),
+			ai_service_status=ai_result.get("ai_service_status", "unknown"),
+		)
+		response_data = json_response(request, dump_model(response_model, include=selected_fields))
+		if profile is not None:
+			response_data.headers["X-Profile"] = _profile_link(ai_result)
 		
-		print(f"Assessment submission completed successfully. Audio files: {len(audio_files)}")
+		log.info("Assessment submission completed", extra={"audio_files": len(audio_files)})
 		return response_data
 		
+	except HTTPException:
+		raise
 	except Exception as e:
-		print(f"Unexpected error in submit_tests: {str(e)}")
+		log.exception("Unexpected error in submit_tests")
 		raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
@@ -164,58 +429,261 @@ async def create_assessment(payload: AssessmentRequest):
 	raise HTTPException(status_code=400, detail="Audio files are required for cognitive assessment. Use /api/submit-tests endpoint instead.")
 
 
-@app.post("/api/assessment/speech")
+@app.post("/api/assessment/speech", response_model=SpeechAssessmentResponse)
 async def create_speech_assessment(
+	request: Request,
 	audio: UploadFile = File(...),
 	stroop_colour: int = Form(0),
 	memory_game: int = Form(0),
 	image_recall: int = Form(0),
 	offline_sentiment: bool = Form(False),
+	fast: bool = Form(False),
+	user_id: Optional[str] = Form(None),
+	fields: Optional[str] = Query(None, description="Comma-separated top-level response fields to return"),
+	include_transcripts: bool = Query(False, description="Include Whisper transcriptions in scores"),
+	_slot: None = Depends(pipeline_slot),
 ):
+	selected_fields = parse_fields(SpeechAssessmentResponse, fields)
 	scores: dict[str, int] = {
 		"stroop_colour": stroop_colour,
 		"memory_game": memory_game,
 		"image_recall": image_recall,
 	}
-	audio_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-	os.makedirs(audio_dir, exist_ok=True)
 	if not audio.filename:
 		raise HTTPException(status_code=400, detail="Audio file must have a filename.")
-	target_path:list[str] = []
-	for existing_file in os.listdir(audio_dir):
-		target_path.append(os.path.join(audio_dir, existing_file))
-		try:
-			if os.path.isfile(existing_file):
-				os.remove(existing_file)
-		except Exception as e:
-			print(f"Error deleting file {existing_file}: {e}")
+	saved_uploads = await uploads.save_all({"audio": audio})
+	submission_dir = UploadStorage.submission_dir_of(saved_uploads)
+	target_path: list[str] = [u.path for u in saved_uploads]
 
-	result = run_pipeline(scores=scores, sentiment_dir="D:/Models/Sentiment", audio_path=target_path, offline_sentiment=offline_sentiment)
-	return {
-		"summary": result.get("summary"),
-		"scores": result.get("scores"),
-		"audio_file": os.path.basename(target_path[0]) if target_path else None,
-	}
+	try:
+		result, profile = await _run_pipeline_for(request, saved_uploads, scores=scores, audio_path=target_path, offline_sentiment=offline_sentiment, fast=fast, user_id=user_id)
+	finally:
+		UploadStorage.mark_finished(submission_dir)
+	response_model = SpeechAssessmentResponse(
+		assessment_id=result.get("assessment_id"),
+		summary=result.get("summary"),
+		scores=ScoreSummary.from_bundle(result["scores"], include_transcripts) if result.get("scores") else None,
+		audio_file=audio.filename,
+	)
+	response = json_response(request, dump_model(response_model, include=selected_fields))
+	if profile is not None:
+		response.headers["X-Profile"] = _profile_link(result)
+	return response
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+	"""Cancel an assessment in progress by the X-Request-ID it was submitted with (or, in queue mode, its job id)."""
+	cancelled = CANCELLABLE.cancel(job_id, "cancel_request")
+	if jobs is not None:
+		# Reaches submissions held by other API processes too, through the shared queue.
+		cancelled = jobs.cancel(job_id=job_id, request_id=job_id) > 0 or cancelled
+	if not cancelled:
+		raise HTTPException(status_code=404, detail="No assessment in progress with that id")
+	return {"job_id": job_id, "status": "cancelling"}
 
 
 @app.get("/api/assessment/latest")
 def latest_assessment():
-	pdf_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("doctor_report_") and f.endswith('.pdf')]
-	if not pdf_files:
+	latest = store.latest()
+	if latest is None:
 		return JSONResponse(status_code=404, content={"detail": "No assessments found"})
-	pdf_files.sort(reverse=True)
-	latest_pdf = pdf_files[0]
-	return {"pdf": latest_pdf}
+	return {"pdf": latest["artifacts"].get("pdf", {}).get("filename"), "assessment": latest}
+
+
+@app.get("/api/assessments")
+def list_assessments(limit: int = Query(20, ge=1, le=200), before: Optional[str] = None):
+	items = store.list_assessments(limit=limit, before=before)
+	next_cursor = items[-1]["id"] if len(items) == limit else None
+	return {"items": items, "next": next_cursor}
+
+
+TRENDS_HEADER = "X-Trends-Token"
+
+
+def _trends_authorised(request: Request) -> bool:
+	# Trends are per-person health data and user ids are not secret, so only a trusted caller (the
+	# frontend server, which fills in the signed-in user's own id) may read them.
+	expected = os.getenv("TRENDS_TOKEN", "")
+	token = request.headers.get(TRENDS_HEADER, "")
+	return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+
+@app.get("/api/users/{user_id}/trends")
+def user_trends(
+	user_id: str,
+	request: Request,
+	limit: int = Query(100, ge=2, le=10000),
+	window: int = Query(3, ge=1, le=100),
+	since: Optional[datetime] = None,
+	metrics: Optional[str] = Query(None, description="Comma-separated metric names; all when omitted"),
+	include_series: bool = False,
+):
+	"""Deltas, rolling averages and per-day slopes over the user's newest `limit` assessments."""
+	if not _trends_authorised(request):
+		raise HTTPException(status_code=403, detail=f"A valid {TRENDS_HEADER} header is required")
+	if user_id == ANONYMOUS_USER:
+		# Pooled submissions of everyone without an account, not one person's history.
+		return JSONResponse(status_code=404, content={"detail": "No history for this user"})
+	selected = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else None
+	if selected:
+		unknown = set(selected) - {"risk_probability", *HISTORY_METRICS}
+		if unknown:
+			raise HTTPException(status_code=400, detail=f"Unknown metrics: {sorted(unknown)}")
+	trends = history.trends(user_id, limit=limit, window=window, since=since, include_series=include_series)
+	if not trends["points"]:
+		return JSONResponse(status_code=404, content={"detail": "No history for this user"})
+	if selected:
+		trends["metrics"] = {name: trends["metrics"][name] for name in selected if name in trends["metrics"]}
+	return trends
+
+
+@app.get("/api/assessments/{assessment_id}")
+def get_assessment(assessment_id: str):
+	assessment = store.get(assessment_id)
+	if assessment is None:
+		return JSONResponse(status_code=404, content={"detail": "Assessment not found"})
+	return assessment
+
+
+_pending_renders: Dict[str, "asyncio.Future[str]"] = {}
+
+
+def _render_and_index(file_path: str) -> str:
+	with span("pdf_render"):
+		PDFGenerator.render_from_source(LOGO_PATH, file_path)
+	assessment_id = os.path.basename(file_path)[len("doctor_report_"):-len(".pdf")]
+	store.update_artifact_size(assessment_id, "pdf")
+	return file_path
+
+
+async def _render_lazy_pdf(file_path: str) -> None:
+	"""Render a lazily stored report once, sharing the work between concurrent downloads."""
+	task = _pending_renders.get(file_path)
+	if task is None:
+		task = asyncio.ensure_future(run_in_threadpool(_render_and_index, file_path))
+		_pending_renders[file_path] = task
+		task.add_done_callback(lambda _: _pending_renders.pop(file_path, None))
+	await asyncio.shield(task)
+
+
+@app.get("/api/assessments/{assessment_id}/profile")
+def get_profile(
+	assessment_id: str,
+	request: Request,
+	format: str = Query("folded", pattern="^(folded|pstats|report)$", description="folded stacks, cProfile pstats, or text report"),
+):
+	"""Download a captured profile; needs the profiling token whenever PROFILE_TOKEN is set."""
+	if os.getenv("PROFILE_TOKEN") and not RequestProfiler.authorised(request.headers.get(PROFILE_HEADER)):
+		raise HTTPException(status_code=403, detail=f"A valid {PROFILE_HEADER} header is required")
+	kind = f"profile_{format}"
+	path = store.artifact_paths([assessment_id], kind).get(assessment_id)
+	if path is None or not os.path.isfile(path):
+		return JSONResponse(status_code=404, content={"detail": "Profile not found"})
+	media_type = "application/octet-stream" if kind == "profile_pstats" else "text/plain; charset=utf-8"
+	# Token-gated: never let a shared cache or CDN keep it and serve it to other clients.
+	return ReportFileResponder.respond(request, path, os.path.basename(path), media_type=media_type, cache_control=PRIVATE_CACHE_CONTROL)
 
 
 @app.get("/api/reports/{filename}")
-def get_report(filename: str):
-	file_path = os.path.join(OUTPUT_DIR, filename)
-	if not os.path.isfile(file_path):
+async def get_report(filename: str, request: Request):
+	file_path = ReportFileResponder.resolve(OUTPUT_DIR, filename)
+	if file_path is None:
 		return JSONResponse(status_code=404, content={"detail": "File not found"})
-	return FileResponse(file_path, media_type="application/pdf", filename=filename)
+	if not os.path.isfile(file_path):
+		if not os.path.isfile(PDFGenerator.source_path_for(file_path)):
+			return JSONResponse(status_code=404, content={"detail": "File not found"})
+		await _render_lazy_pdf(file_path)
+	return await run_in_threadpool(ReportFileResponder.respond, request, file_path, filename)
 
 
-if __name__ == "__main__":
-	import uvicorn
-	uvicorn.run("main:app", host=SERVER_HOST, port=SERVER_PORT, reload=True)
+@app.post("/api/reports/export")
+async def export_reports(payload: ReportExportRequest):
+	try:
+		ReportExporter.validate_ids(payload.ids)
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	ids = store.select_ids(ids=payload.ids, start=payload.start, end=payload.end)
+	if not ids:
+		return JSONResponse(status_code=404, content={"detail": "No assessments found"})
+	if len(ids) > EXPORT_MAX_ASSESSMENTS:
+		raise HTTPException(status_code=400, detail=f"Export is limited to {EXPORT_MAX_ASSESSMENTS} assessments; narrow the selection")
+
+	missing = [
+		ReportExporter.pdf_path(OUTPUT_DIR, i) for i in ids
+		if not os.path.isfile(ReportExporter.pdf_path(OUTPUT_DIR, i))
+		and os.path.isfile(PDFGenerator.source_path_for(ReportExporter.pdf_path(OUTPUT_DIR, i)))
+	]
+	if missing:
+		log.info("Rendering pending PDFs before export", extra={"count": len(missing)})
+		await asyncio.gather(*(_render_lazy_pdf(path) for path in missing))
+
+	export_name = f"foreknow_reports_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+	return StreamingResponse(
+		ReportExporter.stream_zip(OUTPUT_DIR, ids),
+		media_type="application/zip",
+		headers={"Content-Disposition": f'attachment; filename="{export_name}"'},
+	)
+
+
+def _load_stored_metrics(ids: List[str]) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+	paths = store.artifact_paths(ids, "metrics")
+	found_ids, records, missing = [], [], []
+	for assessment_id in ids:
+		try:
+			with open(paths[assessment_id], "r", encoding="utf-8") as f:
+				records.append(json.load(f))
+			found_ids.append(assessment_id)
+		except (KeyError, OSError, ValueError):
+			missing.append(assessment_id)
+	return found_ids, records, missing
+
+
+@app.post("/api/games/score")
+def score_games(payload: GameScoreRequest, request: Request):
+	"""Score batches of raw game sessions; each game's sessions are scored in one vectorised pass."""
+	batch = {"stroop": payload.stroop, "memory": payload.memory, "image_recall": payload.image_recall}
+	if sum(len(sessions) for sessions in batch.values()) > GAME_BATCH_MAX_SESSIONS:
+		raise HTTPException(status_code=400, detail=f"Game scoring is limited to {GAME_BATCH_MAX_SESSIONS} sessions per request")
+	try:
+		results = GameScorer.score_batch({game: sessions for game, sessions in batch.items() if sessions})
+	except (ValueError, TypeError) as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	return json_response(request, results)
+
+
+@app.post("/api/risk/score")
+def score_risk(payload: RiskScoreRequest, request: Request):
+	"""Score inline records, or stored assessments selected by ids/date range (all when empty), in one vectorised pass."""
+	model = RiskModel.current()
+	if payload.records:
+		if len(payload.records) > RISK_BATCH_MAX_RECORDS:
+			raise HTTPException(status_code=400, detail=f"Risk scoring is limited to {RISK_BATCH_MAX_RECORDS} records per request")
+		results = model.score_batch(payload.records, explain=payload.explain)
+		missing: List[str] = []
+	else:
+		try:
+			ReportExporter.validate_ids(payload.ids)
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=str(e))
+		ids = store.select_ids(ids=payload.ids, start=payload.start, end=payload.end)
+		if len(ids) > RISK_BATCH_MAX_RECORDS:
+			raise HTTPException(status_code=400, detail=f"Risk scoring is limited to {RISK_BATCH_MAX_RECORDS} records per request; narrow the selection")
+		ids, records, missing = _load_stored_metrics(ids)
+		results = model.score_batch(records, explain=payload.explain)
+		for assessment_id, result in zip(ids, results):
+			result["assessment_id"] = assessment_id
+		if payload.persist and results:
+			store.update_risk({r["assessment_id"]: r for r in results})
+
+	categories: Dict[str, int] = {}
+	for result in results:
+		categories[result["category"]] = categories.get(result["category"], 0) + 1
+	return json_response(request, {
+		"model_version": model.version,
+		"count": len(results),
+		"categories": categories,
+		"results": results,
+		"missing": missing,
+		"persisted": bool(payload.persist and not payload.records and results),
+	})
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+# (text, bold) runs making up the inline content of a block.
+Span = Tuple[str, bool]
+
+_BLOCK_RE = re.compile(
+	r"(?P<heading>#{1,3}) (?P<heading_text>.*)"
+	r"|[-*] (?P<bullet_text>.*)"
+	r"|\[(?P<check>[ xX])\] (?P<check_text>.*)"
+	r"|(?P<number>\d+\.)\s(?P<number_text>.*)"
+)
+_INLINE_RE = re.compile(r"\*\*(.*?)\*\*|\*(.*?)\*|`(.*?)`")
+
+_REPLACEMENTS = {
+	"“": '"', "”": '"',  # Smart quotes
+	"‘": "'", "’": "'",  # Smart apostrophes
+	"–": "-", "—": "-",  # En/em dashes
+	"…": "...",               # Ellipsis
+	"•": "*",                 # Bullet point
+	"◦": "-",                 # White bullet
+	"▪": "*",                 # Black small square
+	"▫": "-",                 # White small square
+	"☐": "[ ]",               # Checkbox empty
+	"☑": "[x]",               # Checkbox checked
+	"✓": "[x]",               # Check mark
+	"✗": "[x]",               # X mark
+	"→": "->",                # Right arrow
+	"←": "<-",                # Left arrow
+	"↑": "^",                 # Up arrow
+	"↓": "v",                 # Down arrow
+}
+
+
+class _Latin1Table(dict):
+	"""str.translate table: explicit replacements, latin-1 passes through, anything else is dropped."""
+
+	def __missing__(self, codepoint: int) -> Optional[int]:
+		value = codepoint if codepoint < 256 else None
+		self[codepoint] = value
+		return value
+
+
+_TRANSLATION = _Latin1Table({ord(k): v for k, v in _REPLACEMENTS.items()})
+
+
+@dataclass
+class Block:
+	kind: str  # heading | bullet | checkbox | numbered | paragraph | blank
+	spans: List[Span] = field(default_factory=list)
+	level: int = 0
+	marker: str = ""
+
+	@property
+	def text(self) -> str:
+		return "".join(text for text, _ in self.spans)
+
+	@property
+	def has_bold(self) -> bool:
+		return any(bold for _, bold in self.spans)
+
+
+class MarkdownTokenizer:
+	"""Turns LLM markdown into a flat block/inline token stream for the report renderers."""
+
+	@staticmethod
+	def normalize(text: str) -> str:
+		return text.translate(_TRANSLATION)
+
+	@staticmethod
+	def parse_inline(text: str) -> List[Span]:
+		spans: List[Span] = []
+		pos = 0
+		for m in _INLINE_RE.finditer(text):
+			if m.start() > pos:
+				spans.append((text[pos:m.start()], False))
+			bold_text = m.group(1)
+			if bold_text is not None:
+				if bold_text:
+					spans.append((bold_text, True))
+			else:
+				inner = m.group(2) if m.group(2) is not None else m.group(3)
+				if inner:
+					spans.append((inner, False))
+			pos = m.end()
+		if pos < len(text):
+			spans.append((text[pos:], False))
+		return spans
+
+	@staticmethod
+	def plain_text(text: str) -> str:
+		return "".join(t for t, _ in MarkdownTokenizer.parse_inline(MarkdownTokenizer.normalize(text)))
+
+	@staticmethod
+	def tokenize(text: str) -> List[Block]:
+		blocks: List[Block] = []
+		parse_inline = MarkdownTokenizer.parse_inline
+		for line in MarkdownTokenizer.normalize(text).splitlines():
+			stripped = line.strip()
+			if not stripped:
+				blocks.append(Block("blank"))
+				continue
+			m = _BLOCK_RE.match(line)
+			if m is None:
+				blocks.append(Block("paragraph", parse_inline(stripped)))
+			elif m.group("heading"):
+				blocks.append(Block("heading", parse_inline(m.group("heading_text").strip()), level=len(m.group("heading"))))
+			elif m.group("bullet_text") is not None:
+				blocks.append(Block("bullet", parse_inline(m.group("bullet_text").strip())))
+			elif m.group("check"):
+				blocks.append(Block("checkbox", parse_inline(m.group("check_text").strip()), marker=f"[{m.group('check').lower()}]"))
+			else:
+				blocks.append(Block("numbered", parse_inline(m.group("number_text").strip()), marker=m.group("number")))
+		return blocks
@@ -0,0 +1,128 @@
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+	import psutil  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+	psutil = None
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> Optional[int]:
+	"""Resident set size of this process in bytes, or None where it cannot be read."""
+	if psutil is not None:
+		return psutil.Process().memory_info().rss
+	try:
+		with open("/proc/self/statm", "rb") as f:
+			return int(f.read().split()[1]) * _PAGE_SIZE
+	except (OSError, ValueError, IndexError):
+		pass
+	try:
+		import resource
+	except ImportError:
+		return None
+	# Only the lifetime peak is available here; still an upper bound for the current RSS.
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == "darwin" else peak * 1024
+
+
+def memory_breakdown(pid: Optional[int] = None) -> Optional[Dict[str, int]]:
+	"""Resident memory of a process split into pages shared with other processes and pages private to it.
+
+	Returns bytes keyed rss, shared, private and pss (proportional set size: shared pages divided
+	by the number of processes mapping them), or None where the kernel does not expose it. Pages a
+	forked worker still shares copy-on-write with its parent count as shared.
+	"""
+	path = f"/proc/{pid or 'self'}/smaps_rollup"
+	try:
+		with open(path, "r", encoding="ascii") as f:
+			fields = {}
+			for line in f:
+				parts = line.split()
+				if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+					fields[parts[0][:-1]] = int(parts[1]) * 1024
+		return {
+			"rss": fields["Rss"],
+			"shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+			"private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+			"pss": fields.get("Pss", fields["Rss"]),
+		}
+	except (OSError, KeyError, ValueError):
+		pass
+	if psutil is None:
+		return None
+	try:
+		info = psutil.Process(pid).memory_full_info()
+	except (psutil.Error, OSError):
+		return None
+	private = getattr(info, "uss", info.rss)
+	return {"rss": info.rss, "shared": max(0, info.rss - private), "private": private, "pss": getattr(info, "pss", info.rss)}
+
+
+class RssTracker:
+	"""Highest RSS seen between start and finish of one stage."""
+
+	def __init__(self, start_rss: Optional[int]):
+		self.start = start_rss
+		self.peak = start_rss or 0
+
+	def observe(self, rss: Optional[int]) -> None:
+		if rss is not None and rss > self.peak:
+			self.peak = rss
+
+
+class RssWatcher:
+	"""Samples RSS on a background thread while any tracker is open, so short spikes inside a stage are caught."""
+
+	def __init__(self, interval: float = 0.05):
+		self.interval = interval
+		self._trackers: "set[RssTracker]" = set()
+		self._lock = threading.Lock()
+		self._wake = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def _loop(self) -> None:
+		while True:
+			self._wake.wait()
+			with self._lock:
+				trackers = list(self._trackers)
+				if not trackers:
+					self._wake.clear()
+					continue
+			rss = current_rss()
+			for tracker in trackers:
+				tracker.observe(rss)
+			time.sleep(self.interval)
+
+	def start(self) -> RssTracker:
+		tracker = RssTracker(current_rss())
+		with self._lock:
+			self._trackers.add(tracker)
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._loop, name="rss-watcher", daemon=True)
+				self._thread.start()
+		self._wake.set()
+		return tracker
+
+	def _after_fork_in_child(self) -> None:
+		# The sampling thread does not survive fork; the next tracker starts a new one.
+		self._lock = threading.Lock()
+		self._wake = threading.Event()
+		self._trackers = set()
+		self._thread = None
+
+	def finish(self, tracker: RssTracker) -> RssTracker:
+		tracker.observe(current_rss())
+		with self._lock:
+			self._trackers.discard(tracker)
+		return tracker
+
+
+WATCHER = RssWatcher(interval=float(os.getenv("MEMORY_SAMPLE_INTERVAL_MS", "50")) / 1000)
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=WATCHER._after_fork_in_child)
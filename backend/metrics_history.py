@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from risk_scoring import feature_matrix
+
+
+# One typed REAL column per tracked metric; names follow risk_scoring.FEATURE_SOURCES.
+HISTORY_METRICS = [
+	"stroop_colour",
+	"memory_game",
+	"image_recall",
+	"pause_density",
+	"filler_frequency",
+	"lexical_diversity",
+	"repeated_words",
+	"speech_fluency",
+	"sentiment_score",
+]
+ANONYMOUS_USER = "anonymous"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS metrics_history (
+	user_id TEXT NOT NULL,
+	recorded_at INTEGER NOT NULL,
+	assessment_id TEXT,
+	risk_probability REAL,
+	{", ".join(f"{name} REAL" for name in HISTORY_METRICS)}
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_history_user_time ON metrics_history(user_id, recorded_at);
+"""
+
+
+class MetricsHistory:
+	"""Append-only per-user metric history in SQLite with one typed column per metric."""
+
+	_instances: Dict[str, "MetricsHistory"] = {}
+	_instances_lock = threading.Lock()
+
+	def __init__(self, db_path: str):
+		self.db_path = db_path
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(db_path, check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.executescript(_SCHEMA)
+
+	@classmethod
+	def for_output_dir(cls, output_dir: str) -> "MetricsHistory":
+		db_path = os.path.join(output_dir, "metrics_history.db")
+		with cls._instances_lock:
+			history = cls._instances.get(db_path)
+			if history is None:
+				history = cls._instances[db_path] = cls(db_path)
+			return history
+
+	@staticmethod
+	def _rows(entries: List[Tuple[Optional[str], Optional[str], Dict[str, Any], Optional[datetime]]]) -> List[tuple]:
+		matrix = feature_matrix([bundle for _, _, bundle, _ in entries], HISTORY_METRICS)
+		rows = []
+		for (user_id, assessment_id, bundle, recorded_at), values in zip(entries, matrix.tolist()):
+			recorded_at = recorded_at or datetime.now(timezone.utc)
+			risk = (bundle.get("risk") or {}).get("probability")
+			rows.append((
+				user_id or ANONYMOUS_USER, int(recorded_at.timestamp()), assessment_id, risk,
+				*[None if v != v else v for v in values],
+			))
+		return rows
+
+	def append(self, user_id: Optional[str], assessment_id: Optional[str], bundle: Dict[str, Any], recorded_at: Optional[datetime] = None) -> None:
+		self.append_many([(user_id, assessment_id, bundle, recorded_at)])
+
+	def append_many(self, entries: List[Tuple[Optional[str], Optional[str], Dict[str, Any], Optional[datetime]]]) -> None:
+		"""Append (user_id, assessment_id, score bundle, recorded_at) entries in one transaction."""
+		if not entries:
+			return
+		rows = self._rows(entries)
+		placeholders = ",".join("?" * len(rows[0]))
+		with self._lock, self._conn:
+			self._conn.executemany(
+				f"INSERT INTO metrics_history (user_id, recorded_at, assessment_id, risk_probability, {', '.join(HISTORY_METRICS)}) VALUES ({placeholders})",
+				rows,
+			)
+
+	def series(self, user_id: str, limit: int = 100, since: Optional[datetime] = None) -> Tuple[np.ndarray, List[Optional[str]], np.ndarray]:
+		"""The user's newest `limit` points, oldest first: (timestamps, assessment ids, values matrix)."""
+		columns = ["risk_probability", *HISTORY_METRICS]
+		params: List[Any] = [user_id]
+		where = "user_id = ?"
+		if since is not None:
+			where += " AND recorded_at >= ?"
+			params.append(int(since.timestamp()))
+		params.append(limit)
+		# recorded_at is in whole seconds; rowid keeps points from the same second in insertion order.
+		with self._lock:
+			rows = self._conn.execute(
+				f"SELECT recorded_at, assessment_id, {', '.join(columns)} FROM metrics_history "
+				f"WHERE {where} ORDER BY recorded_at DESC, rowid DESC LIMIT ?",
+				params,
+			).fetchall()
+		rows.reverse()
+		timestamps = np.array([r[0] for r in rows], dtype=np.int64)
+		values = np.array([r[2:] for r in rows], dtype=np.float64).reshape(len(rows), len(columns))
+		return timestamps, [r[1] for r in rows], values
+
+	def trends(self, user_id: str, limit: int = 100, window: int = 3, since: Optional[datetime] = None, include_series: bool = False) -> Dict[str, Any]:
+		timestamps, assessment_ids, values = self.series(user_id, limit=limit, since=since)
+		metrics = ["risk_probability", *HISTORY_METRICS]
+		result: Dict[str, Any] = {"user_id": user_id, "points": int(len(timestamps)), "window": window, "metrics": {}}
+		if not len(timestamps):
+			return result
+		stats = TrendCalculator.compute(timestamps, values, window)
+		for j, name in enumerate(metrics):
+			if not stats["count"][j]:
+				continue
+			entry: Dict[str, Any] = {key: TrendCalculator.scalar(column[j]) for key, column in stats.items() if key not in ("count", "rolling")}
+			entry["count"] = int(stats["count"][j])
+			if include_series:
+				entry["values"] = [TrendCalculator.scalar(v) for v in values[:, j]]
+				entry["rolling_average"] = [TrendCalculator.scalar(v) for v in stats["rolling"][:, j]]
+			result["metrics"][name] = entry
+		result["first_recorded_at"] = datetime.fromtimestamp(int(timestamps[0]), tz=timezone.utc).isoformat()
+		result["last_recorded_at"] = datetime.fromtimestamp(int(timestamps[-1]), tz=timezone.utc).isoformat()
+		if include_series:
+			result["recorded_at"] = [datetime.fromtimestamp(int(t), tz=timezone.utc).isoformat() for t in timestamps]
+			result["assessment_ids"] = assessment_ids
+		return result
+
+
+class TrendCalculator:
+	"""NaN-aware trend statistics over a (points, metrics) matrix, all metrics at once."""
+
+	@staticmethod
+	def scalar(value: Any) -> Optional[float]:
+		value = float(value)
+		return None if value != value else round(value, 4)
+
+	@staticmethod
+	def _last_valid(values: np.ndarray, present: np.ndarray, skip: int = 0) -> np.ndarray:
+		"""Per column, the (skip+1)-th newest non-NaN value (NaN if there are not enough)."""
+		order = np.cumsum(present[::-1], axis=0)
+		hit = present[::-1] & (order == skip + 1)
+		found = hit.any(axis=0)
+		rows = values.shape[0] - 1 - hit.argmax(axis=0)
+		picked = values[rows, np.arange(values.shape[1])]
+		return np.where(found, picked, np.nan)
+
+	@staticmethod
+	def rolling_mean(values: np.ndarray, present: np.ndarray, window: int) -> np.ndarray:
+		filled = np.where(present, values, 0.0)
+		sums = np.cumsum(filled, axis=0)
+		counts = np.cumsum(present, axis=0)
+		if window < len(values):
+			sums[window:] = sums[window:] - sums[:-window]
+			counts[window:] = counts[window:] - counts[:-window]
+		with np.errstate(invalid="ignore", divide="ignore"):
+			return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+	@staticmethod
+	def slope(x: np.ndarray, values: np.ndarray, present: np.ndarray) -> np.ndarray:
+		"""Least-squares slope of each column against x, using only the non-NaN points."""
+		mask = present.astype(np.float64)
+		n = np.maximum(mask.sum(axis=0), 1)
+		x = x[:, None]
+		x_mean = (x * mask).sum(axis=0) / n
+		v_mean = np.where(present, values, 0.0).sum(axis=0) / n
+		dx = (x - x_mean) * mask
+		dv = np.where(present, values - v_mean, 0.0)
+		denominator = (dx * dx).sum(axis=0)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			return np.where(denominator > 0, (dx * dv).sum(axis=0) / denominator, np.nan)
+
+	@classmethod
+	def compute(cls, timestamps: np.ndarray, values: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+		present = ~np.isnan(values)
+		count = present.sum(axis=0)
+		latest = cls._last_valid(values, present)
+		previous = cls._last_valid(values, present, skip=1)
+		first = cls._last_valid(values[::-1], present[::-1])
+		rolling = cls.rolling_mean(values, present, max(window, 1))
+
+		days = (timestamps - timestamps[0]) / 86400.0
+		n = np.maximum(count, 1)
+		v_mean = np.where(present, values, 0.0).sum(axis=0) / n
+
+		return {
+			"count": count,
+			"latest": latest,
+			"mean": np.where(count > 0, v_mean, np.nan),
+			"delta_previous": latest - previous,
+			"delta_first": latest - first,
+			"rolling_average_latest": cls._last_valid(rolling, ~np.isnan(rolling)),
+			"slope_per_day": cls.slope(days, values, present),
+			"slope_per_assessment": cls.slope(np.arange(len(values), dtype=np.float64), values, present),
+			"rolling": rolling,
+		}
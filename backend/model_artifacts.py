@@ -0,0 +1,371 @@
+"""
+Model artifacts: fetch, verify and load the Whisper and sentiment model weights.
+
+    cd backend
+    python -m model_artifacts fetch     # download and convert, once per machine or image build
+    python -m model_artifacts verify
+
+Requests never download or delete model files. `fetch` downloads the weights, converts them to
+safetensors and writes a manifest of their SHA-256 checksums. Loading checks the files against the
+manifest, re-hashing a file only when its size or mtime changed since it was last verified. It then
+memory-maps the safetensors and assigns the tensors to a model built without weight
+initialisation, so the weights are neither initialised nor copied on the way in. Caches from
+earlier versions (Whisper's `<size>.pt`, the Hugging Face `models--*` cache) still load.
+
+Environment: MODELS_DIR (default: the per-user cache dir, e.g. ~/.cache/foreknow/models or
+%LOCALAPPDATA%\\ForeKnow\\models), WHISPER_MODEL_DIR, SENTIMENT_MODEL_DIR, WHISPER_MODEL_SIZE
+(default small), MODEL_VERIFY (cached, or always to re-hash on every load).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from structured_logging import LogPipeline, get_logger
+from telemetry import REGISTRY
+
+
+log = get_logger("artifacts")
+
+MODEL_LOAD_SECONDS = REGISTRY.histogram("foreknow_model_load_seconds", "Time to load a model from disk, by model and artifact format.", ("model", "format"))
+
+DEFAULT_WHISPER_SIZE = "small"
+DEFAULT_SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+
+_HASH_CHUNK = 1 << 20
+
+
+class ArtifactError(Exception):
+	"""A model artifact is missing or does not match its checksum."""
+
+
+def models_dir() -> str:
+	"""Root of the model artifacts: MODELS_DIR, else the platform's per-user cache directory."""
+	configured = os.getenv("MODELS_DIR")
+	if configured:
+		return configured
+	if sys.platform == "win32":
+		base = os.getenv("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+		return os.path.join(base, "ForeKnow", "models")
+	if sys.platform == "darwin":
+		return os.path.join(os.path.expanduser("~"), "Library", "Caches", "ForeKnow", "models")
+	return os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "foreknow", "models")
+
+
+def whisper_size() -> str:
+	return os.getenv("WHISPER_MODEL_SIZE", DEFAULT_WHISPER_SIZE)
+
+
+def whisper_dir() -> str:
+	return os.getenv("WHISPER_MODEL_DIR") or os.path.join(models_dir(), "whisper")
+
+
+def sentiment_dir() -> str:
+	return os.getenv("SENTIMENT_MODEL_DIR") or os.path.join(models_dir(), "sentiment")
+
+
+def file_sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return None
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+	tmp = f"{path}.{os.getpid()}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(data, f, indent=2, sort_keys=True)
+	os.replace(tmp, path)
+
+
+def _check_files(root: str, expected: Dict[str, Dict[str, Any]], stamp_path: str, always_hash: bool) -> None:
+	"""Compare files under root with their expected sha256 (and size, when known).
+
+	A file whose size, mtime and expected hash match its stamp from the last successful check is
+	not hashed again. Stamps are best effort: on a read-only model dir every load hashes.
+	"""
+	stamps = {} if always_hash else (_read_json(stamp_path) or {})
+	fresh: Dict[str, Any] = {}
+	for rel, entry in expected.items():
+		path = os.path.join(root, *rel.split("/"))
+		try:
+			st = os.stat(path)
+		except FileNotFoundError:
+			raise ArtifactError(f"{path} is missing")
+		if entry.get("size") is not None and st.st_size != entry["size"]:
+			raise ArtifactError(f"{path} is {st.st_size} bytes, expected {entry['size']}")
+		stamp = [st.st_size, st.st_mtime_ns, entry["sha256"]]
+		if stamps.get(rel) != stamp:
+			started = time.perf_counter()
+			digest = file_sha256(path)
+			if digest != entry["sha256"]:
+				raise ArtifactError(f"{path} has SHA-256 {digest}, expected {entry['sha256']}")
+			log.info("Verified model file", extra={"path": path, "seconds": round(time.perf_counter() - started, 2)})
+		fresh[rel] = stamp
+	if fresh != stamps:
+		try:
+			_write_json(stamp_path, fresh)
+		except OSError:
+			pass
+
+
+def _always_hash() -> bool:
+	return os.getenv("MODEL_VERIFY", "cached").lower() == "always"
+
+
+def write_manifest(manifest_path: str, files: Iterable[str], source: str) -> Dict[str, Any]:
+	"""Checksum files (paths relative to the manifest's directory, with "/") into manifest_path."""
+	root = os.path.dirname(manifest_path)
+	entries, stamps = {}, {}
+	for rel in sorted(files):
+		path = os.path.join(root, *rel.split("/"))
+		st = os.stat(path)
+		entries[rel] = {"sha256": file_sha256(path), "size": st.st_size}
+		stamps[rel] = [st.st_size, st.st_mtime_ns, entries[rel]["sha256"]]
+	manifest = {"version": 1, "source": source, "created_at": time.time(), "files": entries}
+	_write_json(manifest_path, manifest)
+	# Just hashed, so the first load does not hash them again.
+	_write_json(manifest_path + ".verified", stamps)
+	return manifest
+
+
+def verify_manifest(manifest_path: str, always_hash: Optional[bool] = None) -> Dict[str, Any]:
+	"""Check every file listed in the manifest; raises ArtifactError for the first one that is missing or differs."""
+	manifest = _read_json(manifest_path)
+	if manifest is None or not isinstance(manifest.get("files"), dict):
+		raise ArtifactError(f"No readable manifest at {manifest_path}")
+	always_hash = _always_hash() if always_hash is None else always_hash
+	_check_files(os.path.dirname(manifest_path), manifest["files"], manifest_path + ".verified", always_hash)
+	return manifest
+
+
+def _whisper_paths(directory: str, size: str) -> Tuple[str, str, str]:
+	return (
+		os.path.join(directory, f"{size}.safetensors"),
+		os.path.join(directory, f"{size}.manifest.json"),
+		os.path.join(directory, f"{size}.pt"),
+	)
+
+
+def _whisper_release(size: str) -> Tuple[str, str, Optional[str]]:
+	"""URL, SHA-256 and alignment heads Whisper publishes for a model size.
+
+	openai-whisper only exposes these as private module attributes; the checksum is part of the URL.
+	"""
+	import whisper
+
+	if size not in whisper._MODELS:
+		raise ArtifactError(f"Unknown Whisper model size {size!r}")
+	url = whisper._MODELS[size]
+	heads = whisper._ALIGNMENT_HEADS.get(size)
+	return url, url.split("/")[-2], heads.decode("ascii") if heads else None
+
+
+def _build_whisper(dims: Dict[str, Any], state: Dict[str, Any], alignment_heads: Optional[str], device: str) -> Any:
+	import numpy as np
+	import torch
+	from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+	dims = ModelDimensions(**dims)
+	# Whisper.__init__ with the encoder and decoder built on the meta device: their parameters take no
+	# memory and are never initialised before the loaded tensors replace them. Whisper itself cannot be
+	# built there, as its alignment-heads buffer needs an op meta tensors lack.
+	model = Whisper.__new__(Whisper)
+	torch.nn.Module.__init__(model)
+	model.dims = dims
+	with torch.device("meta"):
+		model.encoder = AudioEncoder(dims.n_mels, dims.n_audio_ctx, dims.n_audio_state, dims.n_audio_head, dims.n_audio_layer)
+		model.decoder = TextDecoder(dims.n_vocab, dims.n_text_ctx, dims.n_text_state, dims.n_text_head, dims.n_text_layer)
+	# Published checkpoints are float16 while the model runs in float32; only mismatched tensors are converted.
+	expected = model.state_dict()
+	state = {name: tensor.to(expected[name].dtype) if name in expected and tensor.dtype != expected[name].dtype else tensor for name, tensor in state.items()}
+	# assign=True keeps the loaded (memory-mapped) tensors instead of copying them into the new parameters.
+	model.load_state_dict(state, assign=True)
+	# Buffers checkpoints leave out are computed as Whisper does.
+	model.decoder.register_buffer("mask", torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1), persistent=False)
+	if alignment_heads:
+		model.set_alignment_heads(alignment_heads.encode("ascii"))
+	else:
+		heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+		heads[dims.n_text_layer // 2:] = True
+		model.register_buffer("alignment_heads", heads.to_sparse(), persistent=False)
+	unloaded = [name for name, tensor in [*model.named_parameters(), *model.named_buffers()] if tensor.is_meta]
+	if unloaded:
+		raise ArtifactError(f"Whisper tensors not in the checkpoint: {', '.join(unloaded)}")
+	return model.to(device)
+
+
+def load_whisper(directory: str, size: str, device: str) -> Any:
+	"""Whisper model from the verified safetensors in directory, else from a legacy `<size>.pt` there.
+
+	Raises ArtifactError when neither is present or the weights fail their checksum.
+	"""
+	weights, manifest, legacy = _whisper_paths(directory, size)
+	started = time.perf_counter()
+	if os.path.exists(manifest):
+		verify_manifest(manifest)
+		from safetensors import safe_open
+
+		artifact_format = "safetensors"
+		with safe_open(weights, framework="pt", device="cpu") as f:
+			metadata = f.metadata() or {}
+			state = {name: f.get_tensor(name) for name in f.keys()}
+		dims = json.loads(metadata["dims"])
+		alignment_heads = metadata.get("alignment_heads")
+	elif os.path.exists(legacy):
+		import torch
+
+		_, sha256, alignment_heads = _whisper_release(size)
+		_check_files(directory, {os.path.basename(legacy): {"sha256": sha256}}, legacy + ".verified", _always_hash())
+		artifact_format = "pt"
+		checkpoint = torch.load(legacy, map_location="cpu", mmap=True, weights_only=True)
+		dims, state = checkpoint["dims"], checkpoint["model_state_dict"]
+	else:
+		raise ArtifactError(f"No Whisper {size!r} weights in {directory}; run `python -m model_artifacts fetch`")
+	model = _build_whisper(dims, state, alignment_heads, device)
+	seconds = time.perf_counter() - started
+	MODEL_LOAD_SECONDS.observe(seconds, model="whisper", format=artifact_format)
+	log.info("Whisper model loaded", extra={"size": size, "format": artifact_format, "seconds": round(seconds, 2)})
+	return model
+
+
+def fetch_whisper(directory: str, size: str) -> str:
+	"""Download Whisper weights if needed (checked against Whisper's published SHA-256) and convert them to safetensors."""
+	import torch
+	import whisper
+	from safetensors.torch import save_file
+
+	os.makedirs(directory, exist_ok=True)
+	weights, manifest, legacy = _whisper_paths(directory, size)
+	url, _, alignment_heads = _whisper_release(size)
+	# Downloads into directory, or re-checks the checksum of the copy already there.
+	whisper._download(url, directory, in_memory=False)
+	checkpoint = torch.load(legacy, map_location="cpu", weights_only=True)
+	# Stored as float32, the dtype the model runs in, so loading can map the file without converting it.
+	state = {name: (tensor.float() if tensor.is_floating_point() else tensor).contiguous() for name, tensor in checkpoint["model_state_dict"].items()}
+	metadata = {"dims": json.dumps(checkpoint["dims"])}
+	if alignment_heads:
+		metadata["alignment_heads"] = alignment_heads
+	tmp = f"{weights}.{os.getpid()}.tmp"
+	save_file(state, tmp, metadata=metadata)
+	os.replace(tmp, weights)
+	write_manifest(manifest, [os.path.basename(weights)], source=url)
+	log.info("Whisper weights ready", extra={"path": weights})
+	return weights
+
+
+def _sentiment_paths(directory: str, model_name: str) -> Tuple[str, str, str]:
+	slug = model_name.replace("/", "--")
+	root = os.path.join(directory, slug)
+	return root, os.path.join(root, "manifest.json"), os.path.join(directory, "models--" + slug)
+
+
+def load_sentiment(directory: str, model_name: str, device: str) -> Tuple[Any, Any]:
+	"""(tokenizer, model) from the verified safetensors snapshot in directory, else from a Hugging Face cache there.
+
+	Never downloads. Raises ArtifactError when neither is present or the snapshot fails its checksums.
+	"""
+	root, manifest, hf_cache = _sentiment_paths(directory, model_name)
+	started = time.perf_counter()
+	if os.path.exists(manifest):
+		verify_manifest(manifest)
+		artifact_format, source, options = "safetensors", root, {"use_safetensors": True}
+	elif os.path.isdir(hf_cache):
+		log.warning("Loading the sentiment model from an unverified Hugging Face cache; run `python -m model_artifacts fetch` to convert it", extra={"cache_dir": directory})
+		artifact_format, source, options = "hf_cache", model_name, {"cache_dir": directory}
+	else:
+		raise ArtifactError(f"No sentiment model {model_name!r} in {directory}; run `python -m model_artifacts fetch`")
+	import torch
+	from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+	tok = AutoTokenizer.from_pretrained(source, local_files_only=True, cache_dir=options.get("cache_dir"))
+	mdl = AutoModelForSequenceClassification.from_pretrained(source, local_files_only=True, low_cpu_mem_usage=True, torch_dtype=torch.float32, **options)
+	mdl.to(device)
+	seconds = time.perf_counter() - started
+	MODEL_LOAD_SECONDS.observe(seconds, model="sentiment", format=artifact_format)
+	log.info("Sentiment model loaded", extra={"model": model_name, "format": artifact_format, "seconds": round(seconds, 2)})
+	return tok, mdl
+
+
+def fetch_sentiment(directory: str, model_name: str) -> str:
+	"""Download the sentiment model (reusing a Hugging Face cache in directory) and save it as a safetensors snapshot."""
+	import torch
+	from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+	root, manifest, _ = _sentiment_paths(directory, model_name)
+	staging = f"{root}.{os.getpid()}.tmp"
+	shutil.rmtree(staging, ignore_errors=True)
+	tok = AutoTokenizer.from_pretrained(model_name, cache_dir=directory)
+	mdl = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=directory, torch_dtype=torch.float32)
+	tok.save_pretrained(staging)
+	mdl.save_pretrained(staging, safe_serialization=True)
+	files = [
+		os.path.relpath(os.path.join(dirpath, name), staging).replace(os.sep, "/")
+		for dirpath, _, names in os.walk(staging)
+		for name in names
+	]
+	write_manifest(os.path.join(staging, "manifest.json"), files, source=f"huggingface:{model_name}")
+	if os.path.isdir(root):
+		previous = f"{root}.{os.getpid()}.old"
+		os.replace(root, previous)
+		os.replace(staging, root)
+		shutil.rmtree(previous, ignore_errors=True)
+	else:
+		os.replace(staging, root)
+	log.info("Sentiment model ready", extra={"path": root})
+	return root
+
+
+def verify_all(whisper_size: str, sentiment_model: str, always_hash: bool = True) -> Dict[str, str]:
+	"""Status of each artifact: ok, legacy, missing, or the checksum error."""
+	_, whisper_manifest, whisper_legacy = _whisper_paths(whisper_dir(), whisper_size)
+	_, sentiment_manifest, sentiment_legacy = _sentiment_paths(sentiment_dir(), sentiment_model)
+	status = {}
+	for name, manifest, legacy in (("whisper", whisper_manifest, whisper_legacy), ("sentiment", sentiment_manifest, sentiment_legacy)):
+		if os.path.exists(manifest):
+			try:
+				verify_manifest(manifest, always_hash=always_hash)
+				status[name] = "ok"
+			except ArtifactError as e:
+				status[name] = f"failed: {e}"
+		else:
+			status[name] = "legacy" if os.path.exists(legacy) else "missing"
+	return status
+
+
+def main(argv: Optional[list] = None) -> int:
+	args = sys.argv[1:] if argv is None else argv
+	command = args[0] if args else "verify"
+	if command not in ("fetch", "verify"):
+		print("usage: python -m model_artifacts [fetch|verify]", file=sys.stderr)
+		return 2
+	size = whisper_size()
+	LogPipeline.configure()
+	try:
+		if command == "fetch":
+			fetch_whisper(whisper_dir(), size)
+			fetch_sentiment(sentiment_dir(), DEFAULT_SENTIMENT_MODEL)
+			return 0
+		status = verify_all(size, DEFAULT_SENTIMENT_MODEL)
+		for name, result in status.items():
+			print(f"{name:<10} {result}")
+		return 0 if all(result in ("ok", "legacy") for result in status.values()) else 1
+	finally:
+		LogPipeline.shutdown()
+
+
+if __name__ == "__main__":
+	sys.exit(main())
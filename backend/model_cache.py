@@ -0,0 +1,179 @@
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from memory_stats import current_rss
+from structured_logging import get_logger
+from telemetry import REGISTRY
+
+
+log = get_logger("models")
+
+MODEL_CACHE_EVENTS = REGISTRY.counter("foreknow_model_cache_events_total", "Model cache hits, loads and evictions.", ("event",))
+
+
+def estimate_model_bytes(model: Any) -> int:
+	"""Bytes held by a model's tensors: parameters and buffers of torch modules, `nbytes` of arrays, summed over tuples."""
+	if model is None:
+		return 0
+	if isinstance(model, (tuple, list)):
+		return sum(estimate_model_bytes(m) for m in model)
+	total = 0
+	if hasattr(model, "parameters") and hasattr(model, "buffers"):
+		seen = set()
+		for tensor in [*model.parameters(), *model.buffers()]:
+			if id(tensor) not in seen:
+				seen.add(id(tensor))
+				total += tensor.numel() * tensor.element_size()
+		return total
+	return int(getattr(model, "nbytes", 0) or 0)
+
+
+class _Entry:
+	def __init__(self, model: Any, size_bytes: int, load_seconds: float):
+		self.model = model
+		self.size_bytes = size_bytes
+		self.load_seconds = load_seconds
+		self.hits = 0
+		self.last_used = time.time()
+
+
+class ModelCache:
+	"""Process-wide LRU cache of loaded models, bounded by a memory budget.
+
+	Each model is accounted at its tensor size. When that is unknown, the RSS growth while
+	loading it is used instead. Once the total exceeds the budget, least-recently-used models are
+	dropped, except the one just loaded. A request still using a dropped model keeps it alive until
+	it finishes. Concurrent requests for the same key share one load.
+	"""
+
+	def __init__(self, budget_bytes: Optional[int] = None):
+		self.budget_bytes = budget_bytes
+		self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._loading: Dict[Hashable, threading.Lock] = {}
+
+	def get_or_load(self, key: Hashable, loader: Callable[[], Any], cache_if: Callable[[Any], bool] = lambda model: True, size_of: Callable[[Any], int] = estimate_model_bytes) -> Any:
+		entry = self._hit(key)
+		if entry is not None:
+			return entry.model
+		with self._lock:
+			load_lock = self._loading.setdefault(key, threading.Lock())
+		with load_lock:
+			entry = self._hit(key)
+			if entry is not None:
+				return entry.model
+			MODEL_CACHE_EVENTS.inc(event="load")
+			rss_before = current_rss()
+			started = time.perf_counter()
+			model = loader()
+			load_seconds = time.perf_counter() - started
+			if not cache_if(model):
+				return model
+			size = size_of(model)
+			rss_after = current_rss()
+			if not size and rss_before is not None and rss_after is not None:
+				size = max(0, rss_after - rss_before)
+			with self._lock:
+				self._entries[key] = _Entry(model, size, load_seconds)
+				self._loading.pop(key, None)
+				evicted = self._evict_over_budget(keep=key)
+			log.info("Model loaded", extra={"model": str(key), "size_mb": round(size / 1024 / 1024, 1), "seconds": round(load_seconds, 2), "cached_mb": round(self.total_bytes() / 1024 / 1024, 1)})
+			if evicted:
+				self._release(evicted)
+			return model
+
+	def _hit(self, key: Hashable) -> Optional[_Entry]:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				return None
+			self._entries.move_to_end(key)
+			entry.hits += 1
+			entry.last_used = time.time()
+		MODEL_CACHE_EVENTS.inc(event="hit")
+		return entry
+
+	def _evict_over_budget(self, keep: Hashable) -> List[Hashable]:
+		"""Pop LRU entries until the budget holds; caller holds the lock."""
+		evicted = []
+		if self.budget_bytes is None:
+			return evicted
+		total = sum(e.size_bytes for e in self._entries.values())
+		for key in list(self._entries):
+			if total <= self.budget_bytes:
+				break
+			if key == keep:
+				continue
+			total -= self._entries.pop(key).size_bytes
+			evicted.append(key)
+		if total > self.budget_bytes:
+			log.warning("Model cache over budget with nothing left to evict", extra={"cached_mb": round(total / 1024 / 1024, 1), "budget_mb": round(self.budget_bytes / 1024 / 1024, 1)})
+		return evicted
+
+	@staticmethod
+	def _release(evicted: List[Hashable]) -> None:
+		for key in evicted:
+			MODEL_CACHE_EVENTS.inc(event="evict")
+			log.info("Model evicted", extra={"model": str(key)})
+		gc.collect()
+		torch = sys.modules.get("torch")
+		if torch is not None and torch.cuda.is_available():
+			torch.cuda.empty_cache()
+
+	def evict(self, key: Hashable) -> bool:
+		with self._lock:
+			removed = self._entries.pop(key, None) is not None
+		if removed:
+			self._release([key])
+		return removed
+
+	def clear(self) -> None:
+		with self._lock:
+			keys = list(self._entries)
+			self._entries.clear()
+		if keys:
+			self._release(keys)
+
+	def freeze(self) -> int:
+		"""Switch every cached model to inference mode with gradients off and return their total bytes.
+
+		Called before forking workers that share the weights: eval() and requires_grad_(False) write
+		module and tensor flags once here rather than in each child, and no gradient buffers are ever
+		allocated next to the shared weights.
+		"""
+		with self._lock:
+			entries = list(self._entries.values())
+		for entry in entries:
+			for model in entry.model if isinstance(entry.model, (tuple, list)) else (entry.model,):
+				if hasattr(model, "eval"):
+					model.eval()
+				if hasattr(model, "requires_grad_"):
+					model.requires_grad_(False)
+		return sum(e.size_bytes for e in entries)
+
+	def total_bytes(self) -> int:
+		with self._lock:
+			return sum(e.size_bytes for e in self._entries.values())
+
+	def stats(self) -> List[Dict[str, Any]]:
+		"""Cached models from least to most recently used."""
+		with self._lock:
+			return [
+				{"model": str(key), "size_bytes": e.size_bytes, "load_seconds": round(e.load_seconds, 3), "hits": e.hits, "last_used": e.last_used}
+				for key, e in self._entries.items()
+			]
+
+
+def _budget_from_env() -> Optional[int]:
+	value = float(os.getenv("MODEL_CACHE_BUDGET_MB", "0"))
+	return int(value * 1024 * 1024) if value > 0 else None
+
+
+MODEL_CACHE = ModelCache(_budget_from_env())
+REGISTRY.gauge("foreknow_model_cache_bytes", "Estimated bytes held by cached models.", callback=MODEL_CACHE.total_bytes)
+REGISTRY.gauge("foreknow_model_cache_models", "Number of cached models.", callback=lambda: len(MODEL_CACHE.stats()))
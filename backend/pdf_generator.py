@@ -1,66 +1,103 @@
+import io
+import json
+import multiprocessing
 import os
-import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from fpdf import FPDF
-from typing import Optional
+from typing import Optional, List, Union, Dict
+
+from markdown_tokens import MarkdownTokenizer, Span
+from text_layout import TextLayout
+from structured_logging import get_logger
+
+
+log = get_logger("pdf")
+
+
+_logo_cache: Dict[str, Optional[bytes]] = {}
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _load_logo(logo_path: str) -> Optional[bytes]:
+	"""Read the logo once per process; fpdf2 then decodes it once per document."""
+	if logo_path not in _logo_cache:
+		try:
+			with open(logo_path, "rb") as f:
+				_logo_cache[logo_path] = f.read()
+		except OSError:
+			_logo_cache[logo_path] = None
+	return _logo_cache[logo_path]
+
+
+def _init_render_worker(logo_path: str) -> None:
+	_load_logo(logo_path)
+	pdf = FPDF()
+	for style in ("", "B", "I"):
+		pdf.set_font("Helvetica", style, 10)
+		TextLayout._width_table(pdf)
+
+
+class StyledPDF(FPDF):
+	def __init__(self, logo_path: str, title: str):
+		super().__init__()
+		self.logo_path = logo_path
+		self.title_text = title
+
+	def header(self):
+		logo = _load_logo(self.logo_path)
+		if logo:
+			try:
+				self.image(io.BytesIO(logo), x=15, y=10, w=30)
+			except Exception as e:
+				log.warning("Could not add logo", extra={"error": str(e)})
+		self.set_xy(50, 15)
+		self.set_font("Helvetica", "B", 20)
+		self.set_text_color(25, 118, 210)  
+		self.cell(0, 10, self.title_text)
+		self.ln(15)
+		self.set_draw_color(25, 118, 210)
+		self.line(15, 35, 195, 35)
+		self.ln(10)
+
+	def footer(self):
+		self.set_y(-20)
+		self.set_font("Helvetica", "I", 8)
+		self.set_text_color(128, 128, 128)
+		page_text = f"Page {self.page_no()}"
+		self.cell(0, 10, page_text, 0, 0, "C")
 
 
 class PDFGenerator:
 	@staticmethod
 	def generate_pdf(logo_path: str, title: str, doctor_report: str, output_path: str, disclaimer: str) -> str:
-		class StyledPDF(FPDF):
-			def header(self):
-				if os.path.exists(logo_path):
-					try:
-						self.image(logo_path, x=15, y=10, w=30)
-					except Exception as e:
-						print(f"[WARN] Could not add logo: {e}")
-				self.set_xy(50, 15)
-				self.set_font("Helvetica", "B", 20)
-				self.set_text_color(25, 118, 210)  
-				self.cell(0, 10, title)
-				self.ln(15)
-				self.set_draw_color(25, 118, 210)
-				self.line(15, 35, 195, 35)
-				self.ln(10)
-
-			def footer(self):
-				self.set_y(-20)
-				self.set_font("Helvetica", "I", 8)
-				self.set_text_color(128, 128, 128)
-				page_text = f"Page {self.page_no()}"
-				self.cell(0, 10, page_text, 0, 0, "C")
-		
-		pdf = StyledPDF()
+		pdf = StyledPDF(logo_path, title)
 		pdf.set_auto_page_break(auto=True, margin=25)
 		pdf.add_page()
 		pdf.set_left_margin(15)
 		pdf.set_right_margin(15)
 		
-		cleaned_report = PDFGenerator._clean_text_for_pdf(doctor_report)
-		lines = cleaned_report.replace('\r\n', '\n').replace('\r', '\n').splitlines()
-		
-		for line in lines:
-			if not line.strip():
+		for block in MarkdownTokenizer.tokenize(doctor_report):
+			if block.kind == "blank":
 				pdf.ln(4)
-				continue
-				
-			clean_line = line.strip()
-			if line.startswith('# '):
-				PDFGenerator._add_main_heading(pdf, clean_line[2:])
-			elif line.startswith('## '):
-				PDFGenerator._add_sub_heading(pdf, clean_line[3:])
-			elif line.startswith('### '):
-				PDFGenerator._add_minor_heading(pdf, clean_line[4:])
-			elif line.startswith('**') and line.endswith('**') and len(line) > 4:
-				PDFGenerator._add_bold_text(pdf, clean_line[2:-2])
-			elif line.startswith('- ') or line.startswith('* '):
-				PDFGenerator._add_bullet_point(pdf, clean_line[2:])
-			elif line.startswith('[ ] ') or line.startswith('[x] '):
-				PDFGenerator._add_checkbox_item(pdf, clean_line[4:])
-			elif re.match(r'^\d+\.\s', line):
-				PDFGenerator._add_numbered_item(pdf, clean_line)
+			elif block.kind == "heading":
+				if block.level == 1:
+					PDFGenerator._add_main_heading(pdf, block.text)
+				elif block.level == 2:
+					PDFGenerator._add_sub_heading(pdf, block.text)
+				else:
+					PDFGenerator._add_minor_heading(pdf, block.text)
+			elif block.kind == "bullet":
+				PDFGenerator._add_bullet_point(pdf, block.spans)
+			elif block.kind == "checkbox":
+				PDFGenerator._add_checkbox_item(pdf, block.spans, block.marker)
+			elif block.kind == "numbered":
+				PDFGenerator._add_numbered_item(pdf, [(block.marker + " ", False)] + block.spans)
+			elif block.spans and all(bold for _, bold in block.spans):
+				PDFGenerator._add_bold_text(pdf, block.text)
 			else:
-				PDFGenerator._add_regular_text(pdf, clean_line)
+				PDFGenerator._add_regular_text(pdf, block.spans)
 		pdf.ln(8)
 		PDFGenerator._add_separator(pdf)
 		pdf.ln(4)
@@ -71,45 +108,12 @@ class PDFGenerator:
 		
 		pdf.set_font("Helvetica", "I", 9)
 		pdf.set_text_color(0, 0, 0)
-		PDFGenerator._add_text_with_wrapping(pdf, PDFGenerator._clean_text_for_pdf(disclaimer), 4)
+		PDFGenerator._add_text_with_wrapping(pdf, MarkdownTokenizer.plain_text(disclaimer), 4)
 		
 		pdf.output(output_path)
-		print(f"[SUCCESS] Professional PDF generated: {output_path}")
+		log.info("PDF generated", extra={"path": output_path})
 		return output_path
 	
-	@staticmethod
-	def _clean_text_for_pdf(text: str) -> str:
-		text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  
-		text = re.sub(r'\*(.*?)\*', r'\1', text)      
-		text = re.sub(r'`(.*?)`', r'\1', text)        
-		replacements = {
-			'"': '"', '"': '"',  # Smart quotes
-			''': "'", ''': "'",  # Smart apostrophes
-			'–': '-', '—': '-',  # Em/en dashes
-			'…': '...',          # Ellipsis
-			'•': '*',            # Bullet point
-			'◦': '-',            # White bullet
-			'▪': '*',            # Black small square
-			'▫': '-',            # White small square
-			'☐': '[ ]',          # Checkbox empty
-			'☑': '[x]',          # Checkbox checked
-			'✓': '[x]',          # Check mark
-			'✗': '[x]',          # X mark
-			'→': '->',           # Right arrow  
-			'←': '<-',           # Left arrow
-			'↑': '^',            # Up arrow
-			'↓': 'v',            # Down arrow
-		}
-		
-		for old, new in replacements.items():
-			text = text.replace(old, new)
-		try:
-			text.encode('latin-1')
-		except UnicodeEncodeError:
-			text = text.encode('latin-1', 'ignore').decode('latin-1')
-		
-		return text
-	
 	@staticmethod
 	def _add_main_heading(pdf: FPDF, text: str):
 		pdf.ln(6)
@@ -147,35 +151,35 @@ class PDFGenerator:
 		pdf.ln(2)
 	
 	@staticmethod
-	def _add_bullet_point(pdf: FPDF, text: str):
+	def _add_bullet_point(pdf: FPDF, spans: List[Span]):
 		"""Add a bullet point with proper indentation"""
 		pdf.set_font("Helvetica", "", 10)
 		pdf.set_text_color(0, 0, 0)
-		PDFGenerator._add_text_with_wrapping(pdf, f"* {text}", 5, indent=5)
+		PDFGenerator._add_text_with_wrapping(pdf, [("* ", False)] + spans, 5, indent=5)
 		pdf.ln(1)
 	
 	@staticmethod
-	def _add_checkbox_item(pdf: FPDF, text: str):
+	def _add_checkbox_item(pdf: FPDF, spans: List[Span], marker: str = "[ ]"):
 		"""Add a checkbox item"""
 		pdf.set_font("Helvetica", "", 10)
 		pdf.set_text_color(0, 0, 0)
-		PDFGenerator._add_text_with_wrapping(pdf, f"[ ] {text}", 5, indent=5)
+		PDFGenerator._add_text_with_wrapping(pdf, [(marker + " ", False)] + spans, 5, indent=5)
 		pdf.ln(1)
 	
 	@staticmethod
-	def _add_numbered_item(pdf: FPDF, text: str):
+	def _add_numbered_item(pdf: FPDF, spans: List[Span]):
 		"""Add a numbered list item"""
 		pdf.set_font("Helvetica", "", 10)
 		pdf.set_text_color(0, 0, 0)
-		PDFGenerator._add_text_with_wrapping(pdf, text, 5, indent=5)
+		PDFGenerator._add_text_with_wrapping(pdf, spans, 5, indent=5)
 		pdf.ln(1)
 	
 	@staticmethod
-	def _add_regular_text(pdf: FPDF, text: str):
+	def _add_regular_text(pdf: FPDF, spans: List[Span]):
 		"""Add regular text with proper spacing"""
 		pdf.set_font("Helvetica", "", 10)
 		pdf.set_text_color(0, 0, 0)
-		PDFGenerator._add_text_with_wrapping(pdf, text, 5)
+		PDFGenerator._add_text_with_wrapping(pdf, spans, 5)
 		pdf.ln(2)
 	
 	@staticmethod
@@ -186,8 +190,12 @@ class PDFGenerator:
 		pdf.line(15, current_y, 195, current_y)
 	
 	@staticmethod
-	def _add_text_with_wrapping(pdf: FPDF, text: str, line_height: float, indent: Optional[float] = None):
-		"""Add text with proper word wrapping and indentation - handles large data efficiently"""
+	def _add_text_with_wrapping(pdf: FPDF, text: Union[str, List[Span]], line_height: float, indent: Optional[float] = None):
+		"""Add text (plain or inline-bold spans) with proper word wrapping and indentation"""
+		spans = None
+		if not isinstance(text, str):
+			spans = text
+			text = "".join(t for t, _ in spans)
 		if not text.strip():
 			return
 			
@@ -200,57 +208,66 @@ class PDFGenerator:
 		if page_width < 20:  # Minimum 20mm width
 			page_width = 20
 			
-		# Split text into words
-		words = text.split()
-		if not words:
-			return
-		
-		current_line = ""
 		x_offset = indent if indent else 0
-		
-		for word in words:
-			# Handle very long words that might not fit on a single line
-			if len(word) > 50:  # Arbitrary threshold for very long words
-				# Split long words at reasonable points
-				while len(word) > 50:
-					part = word[:50]
-					word = word[50:]
-					# Process the part as a separate word
-					test_line = current_line + (" " if current_line else "") + part
-					
-					pdf.set_font(pdf.font_family, pdf.font_style, int(pdf.font_size_pt)) # type: ignore
-					text_width = pdf.get_string_width(test_line)
-					
-					if text_width <= page_width or not current_line:
-						current_line = test_line
-					else:
-						if current_line:
-							pdf.set_x(pdf.l_margin + x_offset)
-							pdf.cell(page_width, line_height, current_line, 0, 1)
-						current_line = part
-			
-			# Test if adding this word would exceed the line width
-			test_line = current_line + (" " if current_line else "") + word
-			
-			# Get text width for the test line
-			try:
-				pdf.set_font(pdf.font_family, pdf.font_style, int(pdf.font_size_pt)) # type: ignore
-				text_width = pdf.get_string_width(test_line)
-			except:
-				# Fallback estimation if get_string_width fails
-				text_width = len(test_line) * (pdf.font_size_pt * 0.5)
-			
-			if text_width <= page_width or not current_line:
-				# Word fits or it's the first word on the line
-				current_line = test_line
-			else:
-				# Word doesn't fit, print current line and start new one
-				if current_line:
-					pdf.set_x(pdf.l_margin + x_offset)
-					pdf.cell(page_width, line_height, current_line, 0, 1)
-				current_line = word
-		
-		# Print the last line
-		if current_line:
+		if not spans or not any(bold for _, bold in spans):
+			for line in TextLayout.break_lines(pdf, text, page_width):
+				pdf.set_x(pdf.l_margin + x_offset)
+				pdf.cell(page_width, line_height, line, 0, 1)
+			return
+
+		# Mixed runs are written inline on the same left edge as the plain cell() lines.
+		style = pdf.font_style.replace("B", "")
+		for runs in TextLayout.break_spans(pdf, spans, page_width):
+			if pdf.will_page_break(line_height):
+				pdf.add_page()
 			pdf.set_x(pdf.l_margin + x_offset)
-			pdf.cell(page_width, line_height, current_line, 0, 1)
\ No newline at end of file
+			for run_text, bold in runs:
+				pdf.set_font(pdf.font_family, style + ("B" if bold else ""), pdf.font_size_pt)
+				pdf.write(line_height, run_text)
+			pdf.ln(line_height)
+		pdf.set_font(pdf.font_family, style, pdf.font_size_pt)
+
+	@staticmethod
+	def get_render_pool(logo_path: str) -> Optional[ProcessPoolExecutor]:
+		"""Shared process pool for PDF rendering; PDF_RENDER_WORKERS=0 renders in-process."""
+		global _render_pool
+		workers = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+		if workers <= 0:
+			return None
+		with _render_pool_lock:
+			if _render_pool is None:
+				_render_pool = ProcessPoolExecutor(
+					max_workers=workers,
+					mp_context=multiprocessing.get_context("spawn"),
+					initializer=_init_render_worker,
+					initargs=(logo_path,),
+				)
+		return _render_pool
+
+	@staticmethod
+	def render_in_pool(logo_path: str, title: str, doctor_report: str, output_path: str, disclaimer: str) -> str:
+		pool = PDFGenerator.get_render_pool(logo_path)
+		if pool is None:
+			return PDFGenerator.generate_pdf(logo_path, title, doctor_report, output_path, disclaimer)
+		return pool.submit(PDFGenerator.generate_pdf, logo_path, title, doctor_report, output_path, disclaimer).result()
+
+	@staticmethod
+	def source_path_for(pdf_path: str) -> str:
+		return os.path.splitext(pdf_path)[0] + ".source.json"
+
+	@staticmethod
+	def save_report_source(pdf_path: str, title: str, doctor_report: str, disclaimer: str) -> str:
+		"""Store what generate_pdf needs so the PDF can be rendered on first download."""
+		source_path = PDFGenerator.source_path_for(pdf_path)
+		with open(source_path, "w", encoding="utf-8") as f:
+			json.dump({"title": title, "doctor_report": doctor_report, "disclaimer": disclaimer}, f)
+		return source_path
+
+	@staticmethod
+	def render_from_source(logo_path: str, pdf_path: str) -> str:
+		with open(PDFGenerator.source_path_for(pdf_path), "r", encoding="utf-8") as f:
+			source = json.load(f)
+		tmp_path = pdf_path + ".tmp"
+		PDFGenerator.render_in_pool(logo_path, source["title"], source["doctor_report"], tmp_path, source["disclaimer"])
+		os.replace(tmp_path, pdf_path)
+		return pdf_path
@@ -0,0 +1,177 @@
+import contextvars
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from assessment_store import PROFILE_ARTIFACT_SUFFIXES
+from structured_logging import get_logger
+from telemetry import REGISTRY
+
+
+PROFILE_HEADER = "X-Profile-Token"
+MAX_STACK_DEPTH = 200
+
+PROFILES_CAPTURED = REGISTRY.counter("foreknow_profiles_captured_total", "Assessment runs captured by the request profiler.", ("trigger",))
+
+log = get_logger("profiling")
+
+_active: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("foreknow_profile_session", default=None)
+
+
+def _frame_label(frame) -> str:
+	code = frame.f_code
+	return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+	"""Profile of one assessment run across the pipeline thread and the LLM stage threads it hands work to.
+
+	A sampler thread records the attached threads' stacks every `interval` seconds and exports them
+	as folded stacks (flamegraph.pl, speedscope, inferno). In deterministic mode each attached thread
+	also runs under cProfile and the merged stats are saved as a pstats file plus a text report.
+	"""
+
+	def __init__(self, mode: str = "sampling", interval: float = 0.005, trigger: str = "header"):
+		self.mode = mode
+		self.interval = interval
+		self.trigger = trigger
+		self.stacks: StackCounter = StackCounter()
+		self.samples = 0
+		self.stats: Optional[pstats.Stats] = None
+		self.saved: Dict[str, str] = {}
+		self._threads: Dict[int, str] = {}
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._sampler: Optional[threading.Thread] = None
+
+	def _sample_loop(self) -> None:
+		while not self._stop.wait(self.interval):
+			frames = sys._current_frames()
+			with self._lock:
+				threads = list(self._threads.items())
+			for thread_id, label in threads:
+				frame = frames.get(thread_id)
+				stack = []
+				while frame is not None and len(stack) < MAX_STACK_DEPTH:
+					stack.append(_frame_label(frame))
+					frame = frame.f_back
+				if stack:
+					stack.append(label)
+					with self._lock:
+						self.stacks[";".join(reversed(stack))] += 1
+						self.samples += 1
+
+	def start(self) -> None:
+		self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+		self._sampler.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		if self._sampler is not None and self._sampler is not threading.current_thread():
+			self._sampler.join()
+
+	@contextmanager
+	def attach(self, label: str) -> Iterator[None]:
+		"""Include the calling thread in the profile while the block runs."""
+		thread_id = threading.get_ident()
+		profiler = cProfile.Profile() if self.mode == "deterministic" else None
+		with self._lock:
+			self._threads[thread_id] = label
+		token = _active.set(self)
+		if profiler is not None:
+			profiler.enable()
+		try:
+			yield
+		finally:
+			if profiler is not None:
+				profiler.disable()
+				with self._lock:
+					if self.stats is None:
+						self.stats = pstats.Stats(profiler)
+					else:
+						self.stats.add(profiler)
+			_active.reset(token)
+			with self._lock:
+				self._threads.pop(thread_id, None)
+
+	def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+		"""Run func on the calling thread under this profile (e.g. run_pipeline via run_in_threadpool)."""
+		self.start()
+		try:
+			with self.attach("pipeline"):
+				return func(*args, **kwargs)
+		finally:
+			self.stop()
+
+	def write(self, output_dir: str, assessment_id: str) -> Dict[str, str]:
+		"""Write the profile artifacts for this assessment and return them keyed by artifact kind."""
+		base = os.path.join(output_dir, f"profile_{assessment_id}")
+		with self._lock:
+			stacks = sorted(self.stacks.items())
+			stats = self.stats
+		paths = {"profile_folded": base + PROFILE_ARTIFACT_SUFFIXES["profile_folded"]}
+		with open(paths["profile_folded"], "w", encoding="utf-8") as f:
+			for stack, count in stacks:
+				f.write(f"{stack} {count}\n")
+		if stats is not None:
+			paths["profile_pstats"] = base + PROFILE_ARTIFACT_SUFFIXES["profile_pstats"]
+			stats.dump_stats(paths["profile_pstats"])
+			report = io.StringIO()
+			pstats.Stats(paths["profile_pstats"], stream=report).sort_stats("cumulative").print_stats(80)
+			paths["profile_report"] = base + PROFILE_ARTIFACT_SUFFIXES["profile_report"]
+			with open(paths["profile_report"], "w", encoding="utf-8") as f:
+				f.write(report.getvalue())
+		self.saved = paths
+		log.info("Profile saved", extra={"samples": self.samples, "mode": self.mode, "trigger": self.trigger})
+		return paths
+
+
+class RequestProfiler:
+	"""Decides per request whether to profile: an authorised header, or sampling at PROFILE_SAMPLE_RATE."""
+
+	@staticmethod
+	def authorised(token: Optional[str]) -> bool:
+		expected = os.getenv("PROFILE_TOKEN", "")
+		return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+	@classmethod
+	def for_request(cls, headers) -> Optional[ProfileSession]:
+		if cls.authorised(headers.get(PROFILE_HEADER)):
+			trigger = "header"
+		elif random.random() < float(os.getenv("PROFILE_SAMPLE_RATE", "0")):
+			trigger = "sampled"
+		else:
+			return None
+		PROFILES_CAPTURED.inc(trigger=trigger)
+		return ProfileSession(
+			mode=os.getenv("PROFILE_MODE", "sampling").lower(),
+			interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000,
+			trigger=trigger,
+		)
+
+
+def active() -> Optional[ProfileSession]:
+	return _active.get()
+
+
+def follow(func: Callable, label: str = "llm-stage") -> Callable:
+	"""Wrap work handed to another thread so it joins the caller's profile, if one is active.
+
+	The session is looked up when the wrapper runs, so combine with telemetry.bind to carry the
+	caller's context into executor threads.
+	"""
+	def run(*args: Any, **kwargs: Any) -> Any:
+		session = _active.get()
+		if session is None:
+			return func(*args, **kwargs)
+		with session.attach(label):
+			return func(*args, **kwargs)
+	return run
@@ -1,6 +1,10 @@
 import json
 from typing import Dict, Any
 
+from structured_logging import get_logger
+
+log = get_logger("prompts")
+
 
 class PromptBuilder:
 	@staticmethod
@@ -9,7 +13,7 @@ class PromptBuilder:
 		sentiment_list = scores["sentiment"]
 		combined_sentiment = scores.get("combined_sentiment", {})
 		transcriptions = scores.get("transcriptions", [])
-		print(scores)
+		log.debug("Building doctor prompt", extra={"scores": scores})
 		base = {
 			"stroop_colour": scores["stroop_colour"],
 			"memory_game": scores["memory_game"],
@@ -18,10 +22,12 @@ class PromptBuilder:
 			"sentiment_per_file": sentiment_list,           
 			"combined_sentiment": combined_sentiment,       
 			"audio_files_count": len(transcriptions),
+			"cognitive_risk": scores.get("risk", {}),
 		}
 		return (
 			"You are to write a comprehensive detailed cognitive assessment report. "
 			"Use ONLY the JSON metrics provided (do not fabricate missing game scores). "
+			"The cognitive_risk category and probability come from the deterministic scoring model; quote them as given and do not estimate your own. "
 			"Explain methodology, interpretation, influencing factors (speech pauses, fillers, lexical diversity, sentiment), and recommendations. "
 			"Go full in detail, so that users can understand what is the current situation"
 			"If additional up-to-date general cognitive health context is beneficial you may invoke the provided search tool.\n"
@@ -0,0 +1,80 @@
+import os
+import zipfile
+from typing import Iterator, List
+
+from assessment_store import ASSESSMENT_ID_RE
+
+
+CHUNK_SIZE = 64 * 1024
+
+# (filename pattern, compression) for each artifact of an assessment.
+ARTIFACTS = [
+	("doctor_report_{id}.pdf", zipfile.ZIP_STORED),
+	("summary_{id}.txt", zipfile.ZIP_DEFLATED),
+	("email_{id}.txt", zipfile.ZIP_DEFLATED),
+	("metrics_{id}.json", zipfile.ZIP_DEFLATED),
+]
+
+
+class _ChunkBuffer:
+	"""Write-only, unseekable sink; zipfile then emits data descriptors and never seeks back."""
+
+	def __init__(self):
+		self.chunks: List[bytes] = []
+		self.offset = 0
+
+	def write(self, data: bytes) -> int:
+		if data:
+			self.chunks.append(bytes(data))
+			self.offset += len(data)
+		return len(data)
+
+	def tell(self) -> int:
+		return self.offset
+
+	def flush(self) -> None:
+		pass
+
+	def drain(self) -> bytes:
+		data = b"".join(self.chunks)
+		self.chunks.clear()
+		return data
+
+
+class ReportExporter:
+	@staticmethod
+	def validate_ids(ids: List[str]) -> None:
+		invalid = [i for i in ids if not ASSESSMENT_ID_RE.match(i)]
+		if invalid:
+			raise ValueError(f"Invalid assessment ids: {invalid[:5]}")
+
+	@staticmethod
+	def pdf_path(output_dir: str, assessment_id: str) -> str:
+		return os.path.join(output_dir, f"doctor_report_{assessment_id}.pdf")
+
+	@staticmethod
+	def stream_zip(output_dir: str, ids: List[str]) -> Iterator[bytes]:
+		"""Yield the ZIP archive chunk by chunk; at most one file chunk is held in memory."""
+		sink = _ChunkBuffer()
+		with zipfile.ZipFile(sink, mode="w") as zf:  # type: ignore[arg-type]
+			for assessment_id in ids:
+				for pattern, compression in ARTIFACTS:
+					name = pattern.format(id=assessment_id)
+					path = os.path.join(output_dir, name)
+					if not os.path.isfile(path):
+						continue
+					info = zipfile.ZipInfo.from_file(path, arcname=f"{assessment_id}/{name}")
+					info.compress_type = compression
+					with open(path, "rb") as src, zf.open(info, mode="w") as dst:
+						while True:
+							chunk = src.read(CHUNK_SIZE)
+							if not chunk:
+								break
+							dst.write(chunk)
+							data = sink.drain()
+							if data:
+								yield data
+					data = sink.drain()
+					if data:
+						yield data
+		yield sink.drain()
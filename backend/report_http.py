@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+
+SAFE_REPORT_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*\.pdf$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# For access-controlled artifacts (profiles): a shared cache must never store them for other clients.
+PRIVATE_CACHE_CONTROL = "private, no-store"
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ReportFileResponder:
+	"""Serves immutable report artifacts with content-hash ETags, 304s and single byte ranges."""
+
+	_etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+	_etags_lock = threading.Lock()
+	_max_etags = 4096
+
+	@staticmethod
+	def resolve(base_dir: str, filename: str) -> Optional[str]:
+		"""Map a requested report name to a path inside base_dir, or None if it is not a safe name."""
+		if not SAFE_REPORT_NAME_RE.match(filename) or ".." in filename:
+			return None
+		base = os.path.realpath(base_dir)
+		path = os.path.realpath(os.path.join(base, filename))
+		if os.path.dirname(path) != base:
+			return None
+		return path
+
+	@classmethod
+	def etag_for(cls, path: str, st: os.stat_result) -> str:
+		key = (path, st.st_mtime_ns, st.st_size)
+		with cls._etags_lock:
+			etag = cls._etags.get(key)
+			if etag is not None:
+				cls._etags.move_to_end(key)
+				return etag
+		digest = hashlib.sha256()
+		with open(path, "rb") as f:
+			for chunk in iter(lambda: f.read(1024 * 1024), b""):
+				digest.update(chunk)
+		etag = f'"{digest.hexdigest()[:32]}"'
+		with cls._etags_lock:
+			cls._etags[key] = etag
+			while len(cls._etags) > cls._max_etags:
+				cls._etags.popitem(last=False)
+		return etag
+
+	@staticmethod
+	def _etag_matches(header: str, etag: str) -> bool:
+		if header.strip() == "*":
+			return True
+		candidates = [c.strip() for c in header.split(",")]
+		return any(c.removeprefix("W/") == etag for c in candidates)
+
+	@staticmethod
+	def _not_modified_since(header: str, mtime: float) -> bool:
+		try:
+			since = parsedate_to_datetime(header)
+		except (TypeError, ValueError):
+			return False
+		if since.tzinfo is None:
+			since = since.replace(tzinfo=timezone.utc)
+		return int(mtime) <= since.timestamp()
+
+	@staticmethod
+	def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+		"""Return (start, end) inclusive for a single satisfiable range; raise ValueError if unsatisfiable."""
+		m = _RANGE_RE.match(header.strip())
+		if not m or (not m.group(1) and not m.group(2)):
+			return None
+		if m.group(1):
+			start = int(m.group(1))
+			end = int(m.group(2)) if m.group(2) else size - 1
+		else:
+			start = max(size - int(m.group(2)), 0)
+			end = size - 1
+		end = min(end, size - 1)
+		if start > end or start >= size:
+			raise ValueError("unsatisfiable range")
+		return start, end
+
+	@staticmethod
+	def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+		with open(path, "rb") as f:
+			f.seek(start)
+			remaining = end - start + 1
+			while remaining > 0:
+				chunk = f.read(min(CHUNK_SIZE, remaining))
+				if not chunk:
+					break
+				remaining -= len(chunk)
+				yield chunk
+
+	@classmethod
+	def respond(cls, request: Request, path: str, filename: str, media_type: str = "application/pdf", cache_control: str = CACHE_CONTROL) -> Response:
+		st = os.stat(path)
+		etag = cls.etag_for(path, st)
+		headers = {
+			"ETag": etag,
+			"Last-Modified": format_datetime(datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc), usegmt=True),
+			"Cache-Control": cache_control,
+			"Accept-Ranges": "bytes",
+		}
+
+		if_none_match = request.headers.get("if-none-match")
+		if if_none_match is not None:
+			if cls._etag_matches(if_none_match, etag):
+				return Response(status_code=304, headers=headers)
+		else:
+			if_modified_since = request.headers.get("if-modified-since")
+			if if_modified_since and cls._not_modified_since(if_modified_since, st.st_mtime):
+				return Response(status_code=304, headers=headers)
+
+		headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+		start, end = 0, st.st_size - 1
+		status_code = 200
+		range_header = request.headers.get("range")
+		if_range = request.headers.get("if-range")
+		if range_header and (if_range is None or if_range.strip() == etag):
+			try:
+				byte_range = cls._parse_range(range_header, st.st_size)
+			except ValueError:
+				return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{st.st_size}"})
+			if byte_range is not None:
+				start, end = byte_range
+				status_code = 206
+				headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+
+		headers["Content-Length"] = str(end - start + 1 if st.st_size else 0)
+		return StreamingResponse(cls._iter_file(path, start, end), status_code=status_code, media_type=media_type, headers=headers)
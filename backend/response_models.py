@@ -0,0 +1,124 @@
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+try:
+	import orjson  # type: ignore
+except ImportError:  # pragma: no cover - orjson is optional
+	orjson = None
+
+
+GZIP_MIN_BYTES = 1024
+
+
+class RiskResult(BaseModel):
+	category: str = "unknown"
+	probability: float = 0.0
+	model_version: Optional[str] = None
+	contributions: Optional[Dict[str, float]] = None
+
+
+class SentimentSummary(BaseModel):
+	label: Optional[str] = None
+	weighted_score: Optional[float] = None
+	mode: Optional[str] = None
+
+
+class ScoreSummary(BaseModel):
+	stroop_colour: float = 0
+	memory_game: float = 0
+	image_recall: float = 0
+	speech_metrics: List[Dict[str, Any]] = Field(default_factory=list)
+	sentiment: List[SentimentSummary] = Field(default_factory=list)
+	combined_sentiment: Optional[SentimentSummary] = None
+	game_metrics: Optional[Dict[str, Dict[str, Any]]] = None
+	# Heavy parts: only included with include_transcripts=true.
+	transcribed_text: Optional[str] = None
+	transcriptions: Optional[List[Dict[str, Any]]] = None
+
+	@classmethod
+	def from_bundle(cls, bundle: Dict[str, Any], include_transcripts: bool = False) -> "ScoreSummary":
+		summary = cls(
+			stroop_colour=bundle.get("stroop_colour", 0),
+			memory_game=bundle.get("memory_game", 0),
+			image_recall=bundle.get("image_recall", 0),
+			speech_metrics=bundle.get("speech_metrics", []),
+			sentiment=[SentimentSummary(**_sentiment_fields(s)) for s in bundle.get("sentiment", [])],
+			combined_sentiment=SentimentSummary(**_sentiment_fields(bundle["combined_sentiment"])) if bundle.get("combined_sentiment") else None,
+			game_metrics=bundle.get("game_metrics"),
+		)
+		if include_transcripts:
+			summary.transcribed_text = bundle.get("transcribed_text", "")
+			summary.transcriptions = bundle.get("transcriptions", [])
+		return summary
+
+
+def _sentiment_fields(sentiment: Dict[str, Any]) -> Dict[str, Any]:
+	return {k: sentiment.get(k) for k in ("label", "weighted_score", "mode")}
+
+
+class SubmitTestsResponse(BaseModel):
+	assessment_id: Optional[str] = None
+	memory_score: int
+	stroop_score: int
+	image_recall_score: int
+	audio_files: List[str] = Field(default_factory=list)
+	summary_report: str
+	doctor_report: str
+	email_content: str
+	cognitive_risk: RiskResult = Field(default_factory=RiskResult)
+	pdf_filename: Optional[str] = None
+	all_scores: Optional[ScoreSummary] = None
+	status: str = "completed"
+	ai_analysis_success: bool = True
+	ai_error: Optional[str] = None
+	fallback_mode: bool = False
+	ai_service_status: str = "unknown"
+
+
+class SpeechAssessmentResponse(BaseModel):
+	assessment_id: Optional[str] = None
+	summary: Optional[str] = None
+	scores: Optional[ScoreSummary] = None
+	audio_file: Optional[str] = None
+
+
+def parse_fields(model: type, fields: Optional[str]) -> Optional[Set[str]]:
+	"""Validate a comma-separated `fields=` selection against the model's top-level fields."""
+	if not fields:
+		return None
+	selected = {f.strip() for f in fields.split(",") if f.strip()}
+	unknown = selected - set(model.model_fields)
+	if unknown:
+		raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+	return selected
+
+
+def dumps(payload: Any) -> bytes:
+	if orjson is not None:
+		return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+	return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(request: Request, payload: Any) -> Response:
+	"""Serialise with orjson and gzip bodies over GZIP_MIN_BYTES when the client accepts it."""
+	body = dumps(payload)
+	headers = {"Vary": "Accept-Encoding"}
+	if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+		body = gzip.compress(body, compresslevel=5)
+		headers["Content-Encoding"] = "gzip"
+	return Response(content=body, media_type="application/json", headers=headers)
+
+
+def dump_model(model: BaseModel, include: Optional[Set[str]] = None) -> Dict[str, Any]:
+	"""model_dump that leaves out the transcript fields of nested ScoreSummary values when unset."""
+	data = model.model_dump(include=include)
+	for value in data.values():
+		if isinstance(value, dict) and value.get("transcriptions", "") is None:
+			value.pop("transcriptions")
+			value.pop("transcribed_text", None)
+	return data
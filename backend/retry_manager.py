@@ -1,18 +1,27 @@
-import time
 import random
 
+from structured_logging import get_logger
+import cancellation
+from telemetry import span, STAGE_RETRIES
+
+
+log = get_logger("retry")
+
 
 class RetryManager:
 	
 	@staticmethod
-	def retry_with_backoff(func, max_retries=3, base_delay=2, max_delay=60):
+	def retry_with_backoff(func, max_retries=3, base_delay=2, max_delay=60, stage="retry"):
 		for attempt in range(max_retries):
+			cancellation.check(stage)
 			try:
-				return func()
+				with span(f"{stage}_attempt"):
+					return func()
 			except Exception as e:
 				if attempt == max_retries - 1:
 					raise e
 				
+				STAGE_RETRIES.inc(stage=stage)
 				delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
-				print(f"[RETRY] Attempt {attempt + 1} failed: {str(e)[:100]}... Retrying in {delay:.1f}s")
-				time.sleep(delay)
\ No newline at end of file
+				log.warning("Attempt failed; retrying", extra={"stage": stage, "attempt": attempt + 1, "error": str(e)[:200], "delay_seconds": round(delay, 1)})
+				cancellation.sleep(delay, stage)
\ No newline at end of file
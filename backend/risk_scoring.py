@@ -0,0 +1,132 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config_manager import ConfigManager
+
+
+# Where each configurable feature comes from in a ScoreCollector bundle:
+# (source, key) with source "game" (top-level score), "speech" (averaged over
+# speech_metrics) or "sentiment" (combined_sentiment). Flat records that carry the
+# feature name itself as a key (e.g. rows from the assessment store) are accepted too.
+FEATURE_SOURCES: Dict[str, Tuple[str, str]] = {
+	"stroop_colour": ("game", "stroop_colour"),
+	"memory_game": ("game", "memory_game"),
+	"image_recall": ("game", "image_recall"),
+	"pause_density": ("speech", "Pause density (%)"),
+	"filler_frequency": ("speech", "Filler frequency (%)"),
+	"lexical_diversity": ("speech", "Lexical diversity (%)"),
+	"repeated_words": ("speech", "Repeated words"),
+	"speech_fluency": ("speech", "Speech fluency (words/sec)"),
+	"sentiment_score": ("sentiment", "weighted_score"),
+}
+
+
+def _as_float(value: Any) -> float:
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return math.nan
+
+
+def _to_column(values: List[Any]) -> np.ndarray:
+	try:
+		return np.asarray(values, dtype=np.float64)
+	except (TypeError, ValueError):
+		return np.array([_as_float(v) for v in values], dtype=np.float64)
+
+
+def _speech_mean(metrics: List[Dict[str, Any]], key: str) -> float:
+	values = [_as_float(m[key]) for m in metrics if key in m]
+	values = [v for v in values if v == v]
+	return sum(values) / len(values) if values else math.nan
+
+
+def feature_matrix(records: List[Dict[str, Any]], feature_names: List[str]) -> np.ndarray:
+	"""(n_records, n_features) float64 matrix built column by column; missing values are NaN."""
+	matrix = np.empty((len(records), len(feature_names)), dtype=np.float64)
+	speech: Optional[List[List[Dict[str, Any]]]] = None
+	for j, name in enumerate(feature_names):
+		source, key = FEATURE_SOURCES[name]
+		if source == "game":
+			values = [r[name] if name in r else r.get(key) for r in records]
+		elif source == "sentiment":
+			values = [r[name] if name in r else (r.get("combined_sentiment") or {}).get(key) for r in records]
+		else:
+			if speech is None:
+				speech = [[m for m in r.get("speech_metrics") or [] if m] for r in records]
+			values = [r[name] if name in r else _speech_mean(metrics, key) for r, metrics in zip(records, speech)]
+		matrix[:, j] = _to_column(values)
+	return matrix
+
+
+class RiskModel:
+	"""Deterministic logistic risk model over standardised game, speech and sentiment features."""
+
+	_current: Optional["RiskModel"] = None
+	_current_config: Optional[Dict[str, Any]] = None
+	_current_lock = threading.Lock()
+
+	def __init__(self, config: Dict[str, Any]):
+		ConfigManager.validate_risk_model_config(config)
+		unknown = set(config["features"]) - set(FEATURE_SOURCES)
+		if unknown:
+			raise ValueError(f"Risk model config: unknown features {sorted(unknown)}")
+		self.version: str = config["version"]
+		self.feature_names: List[str] = list(config["features"])
+		specs = [config["features"][name] for name in self.feature_names]
+		self.reference = np.array([s["reference"] for s in specs], dtype=np.float64)
+		self.scale = np.array([s["scale"] for s in specs], dtype=np.float64)
+		self.weights = np.array([s["weight"] for s in specs], dtype=np.float64)
+		self.intercept = float(config.get("intercept", 0.0))
+		self.z_clip = float(config.get("z_clip", 4.0))
+		self.bounds = np.array([t["max_probability"] for t in config["thresholds"]], dtype=np.float64)
+		self.categories: List[str] = [str(t["category"]) for t in config["thresholds"]]
+
+	@classmethod
+	def current(cls) -> "RiskModel":
+		"""The model for the configured YAML file, rebuilt only when ConfigManager reloads it."""
+		config = ConfigManager.get_risk_model_config()
+		if cls._current is not None and cls._current_config is config:
+			return cls._current
+		with cls._current_lock:
+			if cls._current is None or cls._current_config is not config:
+				cls._current = cls(config)
+				cls._current_config = config
+			return cls._current
+
+	def feature_matrix(self, records: List[Dict[str, Any]]) -> np.ndarray:
+		return feature_matrix(records, self.feature_names)
+
+	def score_matrix(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""Vectorised scoring: returns (probabilities, category indices, per-feature contributions)."""
+		z = (matrix - self.reference) / self.scale
+		z = np.clip(np.nan_to_num(z, nan=0.0), -self.z_clip, self.z_clip)
+		contributions = z * self.weights
+		logits = self.intercept + contributions.sum(axis=1)
+		probabilities = 1.0 / (1.0 + np.exp(-logits))
+		indices = np.minimum(np.searchsorted(self.bounds, probabilities, side="left"), len(self.categories) - 1)
+		return probabilities, indices, contributions
+
+	def score_batch(self, records: List[Dict[str, Any]], explain: bool = False) -> List[Dict[str, Any]]:
+		if not records:
+			return []
+		matrix = self.feature_matrix(records)
+		probabilities, indices, contributions = self.score_matrix(matrix)
+		present = (~np.isnan(matrix)).tolist()
+		probabilities = np.round(probabilities, 4).tolist()
+		categories = [self.categories[i] for i in indices.tolist()]
+		results = [
+			{"category": category, "probability": probability, "model_version": self.version}
+			for category, probability in zip(categories, probabilities)
+		]
+		if explain:
+			rounded = (np.round(contributions, 4) + 0.0).tolist()
+			for result, row, mask in zip(results, rounded, present):
+				result["contributions"] = {name: value for name, value, keep in zip(self.feature_names, row, mask) if keep}
+		return results
+
+	def score(self, bundle: Dict[str, Any]) -> Dict[str, Any]:
+		return self.score_batch([bundle], explain=True)[0]
@@ -4,12 +4,47 @@ from typing import Dict, Any, Optional
 
 from SpeechToText import SpeechToTextAnalyzer
 from SentimentAnalyzer import SentimentAnalyzer
+from game_scoring import GameScorer
+import cancellation
+from structured_logging import get_logger
+from telemetry import span
+
+
+log = get_logger("scores")
 
 
 class ScoreCollector:
 	@staticmethod
-	def collect_scores(scores:dict[str,int],audio_path: list[str] = [], sentiment_dir: Optional[str] = None, offline_sentiment: bool = False) -> Dict[str, Any]:
-		print("[STAGE] Collecting scores & analytics...")
+	def preload_models(sentiment_dir: Optional[str] = None, offline_sentiment: bool = False) -> Dict[str, bool]:
+		"""Load the Whisper and sentiment models into MODEL_CACHE ahead of the first request.
+
+		Returns which models are now cached; a model that fails to load is left to load lazily.
+		"""
+		loaded = {}
+		try:
+			SpeechToTextAnalyzer().ensure_model()
+			loaded["whisper"] = True
+		except Exception as e:
+			log.warning("Whisper preload failed; it will load on first use", extra={"error": str(e)})
+			loaded["whisper"] = False
+		try:
+			sentiment = SentimentAnalyzer(cache_dir=sentiment_dir, offline=offline_sentiment)
+			loaded["sentiment"] = sentiment.ensure_model()[1] is not None
+		except Exception as e:
+			log.warning("Sentiment preload failed; it will load on first use", extra={"error": str(e)})
+			loaded["sentiment"] = False
+		return loaded
+
+	@staticmethod
+	def collect_scores(scores:dict[str,int],audio_path: list[str] = [], sentiment_dir: Optional[str] = None, offline_sentiment: bool = False, trials: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		log.info("Collecting scores & analytics")
+		game_metrics: Dict[str, Any] = {}
+		if trials:
+			# Raw trial data is authoritative over the scores computed by the frontend.
+			with span("game_scoring"):
+				game_metrics, overrides = GameScorer.score_session(trials)
+			scores = {**scores, **overrides}
+			log.info("Scored raw trials", extra={"games": list(game_metrics)})
 		#! Change it to 0, for testing purposes the values are updated
 		stroop_score = scores.get("stroop_colour", 0)
 		memory_game_score = scores.get("memory_game", 0)
@@ -21,59 +56,65 @@ class ScoreCollector:
     
 		try:
 			if not audio_path:
-				print("[WARN] No audio files provided. Using empty audio analysis.")
+				log.warning("No audio files provided; using empty audio analysis")
 				transcriptions = [{"text": "", "segments": []}]
 				speech_metrics_list = [{}]
 				combined_transcribed_text = ""
 			else:
-				print(f"[INFO] Processing {len(audio_path)} audio files: {audio_path}")
+				log.info("Processing audio files", extra={"count": len(audio_path), "paths": audio_path})
 
 				valid_files = []
 				for path in audio_path:
 					if os.path.exists(path):
 						valid_files.append(path)
 					else:
-						print(f"[WARN] Audio file does not exist, skipping: {path}")
+						log.warning("Audio file does not exist; skipping", extra={"path": path})
 				
 				if not valid_files:
-					print("[WARN] No valid audio files found. Using empty audio analysis.")
+					log.warning("No valid audio files found; using empty audio analysis")
 					transcriptions = [{"text": "", "segments": []}]
 					speech_metrics_list = [{}]
 					combined_transcribed_text = ""
 				else:
 					for i, audio_file_path in enumerate(valid_files):
-						print(f"[INFO] Processing audio file {i+1}/{len(valid_files)}: {audio_file_path}")
+						cancellation.check("transcribe")
+						log.info("Processing audio file", extra={"file": i + 1, "of": len(valid_files), "path": audio_file_path})
 						
 						try:
-							stt = SpeechToTextAnalyzer(audio_path=audio_file_path)
+							# The transcript stays in the returned bundle; the standalone script's shared
+							# transcription.json would mix speech data from concurrent submissions.
+							stt = SpeechToTextAnalyzer(audio_path=audio_file_path, save_json_path=None)
 							setup_info = stt.get_setup_info()
-							print(f"[DEBUG] STT setup for file {i+1}: {setup_info}")
+							log.debug("STT setup", extra={"file": i + 1, "setup": setup_info})
 							
 							if not setup_info.get("ffmpeg_on_path"):
-								print("[WARN] ffmpeg not detected on PATH; transcription may fail or hang.")
+								log.warning("ffmpeg not detected on PATH; transcription may fail or hang")
 							
-							stt_model = stt.ensure_model()
+							with span("stt_model_load"):
+								stt_model = stt.ensure_model()
 							
 							if os.path.exists(audio_file_path):
 								try:
 									fsize = os.path.getsize(audio_file_path) / 1024 / 1024
-									print(f"[INFO] Audio file {i+1} size: {fsize:.2f} MB")
+									log.info("Audio file size", extra={"file": i + 1, "size_mb": round(fsize, 2)})
 								except OSError:
 									pass
 							
-							print(f"[INFO] Starting Whisper transcription for file {i+1}...")
+							log.info("Starting Whisper transcription", extra={"file": i + 1})
 							t0 = time.time()
-							transcription = stt.transcribe(stt_model)
+							with span("transcribe"):
+								transcription = stt.transcribe(stt_model)
 							t1 = time.time()
-							print(f"[DONE] Transcription {i+1} completed in {t1 - t0:.2f}s")
+							log.info("Transcription completed", extra={"file": i + 1, "seconds": round(t1 - t0, 2)})
 							
 							segs = transcription.get("segments", [])
-							print(f"[INFO] File {i+1} segments captured: {len(segs)}")
+							log.info("Segments captured", extra={"file": i + 1, "segments": len(segs)})
 							if segs:
 								preview = " | ".join(seg.get("text", "").strip() for seg in segs[:2])
-								print(f"[PREVIEW] File {i+1}: {preview[:160]}")
+								log.debug("Transcript preview", extra={"file": i + 1, "preview": preview[:160]})
 							
-							speech_metrics = stt.compute_metrics(transcription)
+							with span("speech_metrics"):
+								speech_metrics = stt.compute_metrics(transcription)
 							
 							transcriptions.append(transcription)
 							speech_metrics_list.append(speech_metrics)
@@ -82,39 +123,42 @@ class ScoreCollector:
 							combined_transcribed_text += f" {file_text}".strip()
 							
 						except Exception as audio_error:
-							print(f"[ERROR] Processing audio file {i+1} failed: {audio_error}")
+							log.error("Processing audio file failed", extra={"file": i + 1, "error": str(audio_error)})
 							transcriptions.append({"text": "", "segments": []})
 							speech_metrics_list.append({})
 		except Exception as e:
-			print(f"[ERROR] Speech analysis setup failed: {e}")
+			log.error("Speech analysis setup failed", extra={"error": str(e)})
 			transcriptions = [{"text": "", "segments": []}]
 			speech_metrics_list = [{}]
 			combined_transcribed_text = ""
 
+		cancellation.check("sentiment")
 		try:
 			if sentiment_dir:
-				print(f"[SENTIMENT] Using custom sentiment dir: {sentiment_dir}")
-			sentiment = SentimentAnalyzer(cache_dir=sentiment_dir, offline=offline_sentiment) if sentiment_dir else SentimentAnalyzer(offline=offline_sentiment)
-			sent_model_tok, sent_model = sentiment.ensure_model()
-			
-			if combined_transcribed_text.strip():
-				combined_sentiment = sentiment.predict(combined_transcribed_text, sent_model_tok, sent_model)
-			else:
-				combined_sentiment = {}
+				log.info("Using custom sentiment dir", extra={"sentiment_dir": sentiment_dir})
+			sentiment = SentimentAnalyzer(cache_dir=sentiment_dir, offline=offline_sentiment)
+			with span("sentiment_model_load"):
+				sent_model_tok, sent_model = sentiment.ensure_model()
 			
-			individual_sentiments = []
-			for i, transcription in enumerate(transcriptions):
-				file_text = transcription.get("text", "")
-				if file_text.strip():
-					file_sentiment = sentiment.predict(file_text, sent_model_tok, sent_model)
-					individual_sentiments.append(file_sentiment)
+			with span("sentiment"):
+				if combined_transcribed_text.strip():
+					combined_sentiment = sentiment.predict(combined_transcribed_text, sent_model_tok, sent_model)
 				else:
-					individual_sentiments.append({})
+					combined_sentiment = {}
+				
+				individual_sentiments = []
+				for i, transcription in enumerate(transcriptions):
+					file_text = transcription.get("text", "")
+					if file_text.strip():
+						file_sentiment = sentiment.predict(file_text, sent_model_tok, sent_model)
+						individual_sentiments.append(file_sentiment)
+					else:
+						individual_sentiments.append({})
 			
 			sentiment_predictions = individual_sentiments
 			
 		except Exception as e:
-			print(f"[ERROR] Sentiment analysis failed: {e}")
+			log.error("Sentiment analysis failed", extra={"error": str(e)})
 			combined_sentiment = {}
 			sentiment_predictions = [{}] * len(transcriptions)
 
@@ -128,5 +172,7 @@ class ScoreCollector:
 			"transcriptions": transcriptions,       
 			"transcribed_text": combined_transcribed_text,  
 		}
-		print("[INFO] Score bundle prepared.")
+		if game_metrics:
+			bundle["game_metrics"] = game_metrics
+		log.info("Score bundle prepared")
 		return bundle
\ No newline at end of file
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from structured_logging import get_logger
+
+
+log = get_logger("search")
+
+
+SEARCH_LIMIT_MESSAGE = "Search limit reached for this stage; continue with the information already gathered."
+
+
+class SearchResultCache:
+	"""Thread-safe in-memory TTL cache with LRU eviction once max_entries is reached."""
+
+	def __init__(self, ttl_seconds: float = 86400, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self._clock = clock
+		self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	@staticmethod
+	def normalize_query(query: str) -> str:
+		# Case and spacing only: word order and punctuation can change what a query means.
+		return " ".join(str(query).lower().split())
+
+	def get(self, key: str) -> Optional[Any]:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			expires_at, value = entry
+			if expires_at <= self._clock():
+				del self._entries[key]
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key: str, value: Any) -> None:
+		with self._lock:
+			self._entries[key] = (self._clock() + self.ttl_seconds, value)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+class CachedSearch:
+	"""Wraps a search tool (anything with run(search_query=...)) with a shared cache and a call budget."""
+
+	def __init__(self, tool: Any, cache: SearchResultCache, max_calls: Optional[int] = None):
+		self.tool = tool
+		self.cache = cache
+		self.max_calls = max_calls
+		self.calls = 0
+
+	def for_stage(self) -> "CachedSearch":
+		return CachedSearch(self.tool, self.cache, self.max_calls)
+
+	def run(self, search_query: str) -> Any:
+		key = SearchResultCache.normalize_query(search_query)
+		cached = self.cache.get(key)
+		if cached is not None:
+			log.info("Search cache hit", extra={"query": key})
+			return cached
+		if self.max_calls is not None and self.calls >= self.max_calls:
+			log.info("Stage search limit reached; skipping", extra={"query": key, "max_calls": self.max_calls})
+			return SEARCH_LIMIT_MESSAGE
+		self.calls += 1
+		result = self.tool.run(search_query=search_query)
+		self.cache.put(key, result)
+		return result
+
+	def as_crewai_tool(self) -> Any:
+		try:
+			from crewai.tools import BaseTool  # type: ignore
+		except ImportError:
+			from crewai_tools import BaseTool  # type: ignore
+		from pydantic import PrivateAttr
+
+		class CachedSearchTool(BaseTool):
+			_search: Any = PrivateAttr()
+
+			def _run(self, search_query: str, **kwargs: Any) -> Any:
+				return self._search.run(search_query)
+
+		tool = CachedSearchTool(name=self.tool.name, description=self.tool.description, args_schema=self.tool.args_schema)
+		tool._search = self
+		return tool
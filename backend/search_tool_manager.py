@@ -1,7 +1,27 @@
 import os
+from typing import Optional
+
+from search_cache import SearchResultCache, CachedSearch
+from structured_logging import get_logger
+
+
+log = get_logger("search")
+
+
+_search_cache: Optional[SearchResultCache] = None
 
 
 class SearchToolManager:
+	@staticmethod
+	def get_search_cache() -> SearchResultCache:
+		global _search_cache
+		if _search_cache is None:
+			_search_cache = SearchResultCache(
+				ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400")),
+				max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256")),
+			)
+		return _search_cache
+
 	@staticmethod
 	def initialize_search_tool():
 		api_key = os.getenv("SERPER_API_KEY")
@@ -10,8 +30,9 @@ class SearchToolManager:
 		try:
 			from crewai_tools import SerperDevTool  # type: ignore
 			tool = SerperDevTool()
-			print("[INFO] Search tool enabled (SerperDevTool).")
-			return tool
+			max_calls = int(os.getenv("SEARCH_MAX_CALLS_PER_STAGE", "3"))
+			log.info("Search tool enabled (SerperDevTool, cached)", extra={"max_calls_per_stage": max_calls})
+			return CachedSearch(tool, SearchToolManager.get_search_cache(), max_calls=max_calls)
 		except Exception as e:
-			print(f"[WARN] Failed to initialize search tool: {e}")
-			return None
\ No newline at end of file
+			log.warning("Failed to initialize search tool", extra={"error": str(e)})
+			return None
@@ -0,0 +1,218 @@
+"""
+Production launcher: load the models once, then fork HTTP workers that share them.
+
+    python serve.py
+
+`main.py` (and `uvicorn main:app --workers N`) start each worker from scratch, so every worker
+imports torch and loads its own Whisper and sentiment model. Here the master process imports the
+pipeline, loads both models into MODEL_CACHE and freezes them, then forks SERVER_WORKERS children
+that serve from one shared listening socket. The weights stay shared copy-on-write between the
+workers; only the pages a worker writes to become private to it.
+
+Environment: SERVER_HOST, SERVER_PORT, SERVER_WORKERS (default 2), TORCH_THREADS_PER_WORKER
+(default: CPU count / workers), PRELOAD_MODELS (default 1), WORKER_MEMORY_REPORT_SECONDS
+(default 300, 0 disables), WORKER_SHUTDOWN_TIMEOUT_SECONDS (default 30).
+
+Without os.fork (Windows) or with SERVER_WORKERS=1 it serves from the master process.
+"""
+
+import gc
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from memory_stats import memory_breakdown
+from structured_logging import LogPipeline, get_logger
+
+
+log = get_logger("serve")
+
+_MB = 1024 * 1024
+
+
+def threads_per_worker(workers: int, cpus: Optional[int] = None) -> int:
+	"""Torch intra-op threads per worker, so N workers together use about one thread per core."""
+	configured = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+	if configured > 0:
+		return configured
+	if cpus is None:
+		cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+	return max(1, (cpus or 1) // max(1, workers))
+
+
+def set_torch_threads(threads: int) -> None:
+	torch = sys.modules.get("torch")
+	if torch is None:
+		return
+	torch.set_num_threads(threads)
+	try:
+		torch.set_num_interop_threads(max(1, min(threads, 4)))
+	except RuntimeError:
+		# Only settable before the first inter-op parallel call in this process.
+		pass
+
+
+def preload() -> Dict[str, Any]:
+	"""Import the pipeline and load its models in this process; returns what was loaded."""
+	from model_cache import MODEL_CACHE
+	from score_collector import ScoreCollector
+	import AiAgent  # noqa: F401  (pulls in torch, whisper, transformers and crewai before the fork)
+
+	started = time.perf_counter()
+	loaded = ScoreCollector.preload_models() if os.getenv("PRELOAD_MODELS", "1") != "0" else {}
+	frozen = MODEL_CACHE.freeze()
+	# Objects alive now are never collected; keeping the collector off them means workers do not
+	# dirty (and so copy) the pages they live on when a collection runs.
+	gc.collect()
+	gc.freeze()
+	log.info("Preloaded models", extra={"models": loaded, "model_mb": round(frozen / _MB, 1), "seconds": round(time.perf_counter() - started, 2)})
+	return loaded
+
+
+def memory_report(workers: Dict[int, int]) -> List[Dict[str, Any]]:
+	"""Log and return shared versus private resident memory for the master and each worker."""
+	rows = []
+	for pid, index in [(os.getpid(), -1), *sorted(workers.items(), key=lambda item: item[1])]:
+		usage = memory_breakdown(pid)
+		if usage is None:
+			continue
+		row = {"worker": "master" if index < 0 else index, "pid": pid, **{f"{k}_mb": round(v / _MB, 1) for k, v in usage.items()}}
+		rows.append(row)
+		log.info("Worker memory", extra=row)
+	if rows:
+		log.info("Total memory", extra={"processes": len(rows), "rss_mb": round(sum(r["rss_mb"] for r in rows), 1), "pss_mb": round(sum(r["pss_mb"] for r in rows), 1)})
+	return rows
+
+
+class WorkerSupervisor:
+	"""Forks workers from the preloaded master, restarts any that exit, and stops them on SIGTERM/SIGINT."""
+
+	def __init__(self, config, workers: int, threads: int):
+		self.config = config
+		self.workers = workers
+		self.threads = threads
+		self.children: Dict[int, int] = {}
+		self._started: Dict[int, float] = {}
+		self._stopping = False
+
+	def _spawn(self, index: int, sock) -> None:
+		pid = os.fork()
+		if pid:
+			self.children[pid] = index
+			self._started[pid] = time.monotonic()
+			return
+		code = 0
+		try:
+			self._run_worker(index, sock)
+		except BaseException:
+			log.exception("Worker crashed", extra={"worker": index})
+			code = 1
+		finally:
+			LogPipeline.shutdown()
+			os._exit(code)
+
+	def _run_worker(self, index: int, sock) -> None:
+		import uvicorn
+
+		signal.signal(signal.SIGTERM, signal.SIG_DFL)
+		signal.signal(signal.SIGINT, signal.SIG_DFL)
+		# The fork hook left this process on synchronous logging; a long-lived worker gets its own queue.
+		LogPipeline.configure()
+		set_torch_threads(self.threads)
+		# Imported after the fork: the app opens its SQLite connections and starts its background
+		# loops per worker, and connections must not be shared across fork.
+		from main import app
+
+		log.info("Worker started", extra={"worker": index, "torch_threads": self.threads})
+		uvicorn.Server(uvicorn.Config(app, **self.config)).run(sockets=[sock])
+
+	def _stop(self, signum, frame) -> None:
+		self._stopping = True
+
+	def run(self, sock) -> None:
+		signal.signal(signal.SIGTERM, self._stop)
+		signal.signal(signal.SIGINT, self._stop)
+		for index in range(self.workers):
+			self._spawn(index, sock)
+		report_every = float(os.getenv("WORKER_MEMORY_REPORT_SECONDS", "300"))
+		# The first report waits for the workers to import the app.
+		next_report = time.monotonic() + min(report_every, 15) if report_every > 0 else None
+		while not self._stopping:
+			self._reap(sock)
+			if next_report is not None and time.monotonic() >= next_report:
+				memory_report(self.children)
+				next_report = time.monotonic() + report_every
+			time.sleep(0.5)
+		self._shutdown()
+
+	def _reap(self, sock) -> None:
+		while self.children:
+			pid, status = os.waitpid(-1, os.WNOHANG)
+			if pid == 0:
+				return
+			index = self.children.pop(pid, None)
+			if index is None:
+				continue
+			uptime = time.monotonic() - self._started.pop(pid, 0.0)
+			log.warning("Worker exited; restarting", extra={"worker": index, "pid": pid, "exit_status": os.waitstatus_to_exitcode(status), "uptime_seconds": round(uptime, 1)})
+			if uptime < 5:
+				# A worker that dies on startup would otherwise be restarted in a tight loop.
+				time.sleep(1)
+			if not self._stopping:
+				self._spawn(index, sock)
+
+	def _shutdown(self) -> None:
+		log.info("Stopping workers", extra={"workers": len(self.children)})
+		for pid in self.children:
+			os.kill(pid, signal.SIGTERM)
+		deadline = time.monotonic() + float(os.getenv("WORKER_SHUTDOWN_TIMEOUT_SECONDS", "30"))
+		while self.children and time.monotonic() < deadline:
+			pid, _ = os.waitpid(-1, os.WNOHANG)
+			if pid:
+				self.children.pop(pid, None)
+			else:
+				time.sleep(0.1)
+		for pid in self.children:
+			log.warning("Worker did not stop in time; killing", extra={"pid": pid})
+			os.kill(pid, signal.SIGKILL)
+			os.waitpid(pid, 0)
+		self.children.clear()
+
+
+def main() -> None:
+	import uvicorn
+
+	LogPipeline.configure()
+	host = os.getenv("SERVER_HOST", "127.0.0.1")
+	port = int(os.getenv("SERVER_PORT", "8000"))
+	workers = int(os.getenv("SERVER_WORKERS", "2"))
+	if not hasattr(os, "fork"):
+		workers = 1
+	threads = threads_per_worker(workers)
+	# Sizes the OpenMP pools of every process before torch is imported.
+	os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+	preload()
+	if workers <= 1:
+		set_torch_threads(threads)
+		from main import app
+		uvicorn.run(app, host=host, port=port)
+		return
+	config = {"host": host, "port": port}
+	sock = uvicorn.Config("main:app", **config).bind_socket()
+	log.info("Forking workers", extra={"workers": workers, "torch_threads": threads, "host": host, "port": port})
+	memory_report({})
+	try:
+		WorkerSupervisor(config, workers, threads).run(sock)
+	finally:
+		sock.close()
+		LogPipeline.shutdown()
+
+
+if __name__ == "__main__":
+	main()
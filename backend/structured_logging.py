@@ -0,0 +1,215 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from telemetry import REGISTRY
+
+
+ROOT_LOGGER = "foreknow"
+# LOG_LEVEL, LOG_FORMAT, LOG_MAX_FIELD_CHARS and LOG_QUEUE_SIZE are read by LogPipeline.configure,
+# so main.py re-runs it once .env is loaded.
+_max_field_chars = 2000
+
+LOG_RECORDS_DROPPED = REGISTRY.counter("foreknow_log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is emitted as a field.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "assessment_id"}
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("foreknow_request_id", default=None)
+_assessment_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("foreknow_assessment_id", default=None)
+
+
+def cap(value: Any, limit: Optional[int] = None) -> Any:
+	"""Flatten containers to JSON text and truncate long strings so one record cannot flood the sink."""
+	limit = _max_field_chars if limit is None else limit
+	if value is None or isinstance(value, (bool, int, float)):
+		return value
+	if not isinstance(value, str):
+		value = json.dumps(value, default=str, ensure_ascii=False) if isinstance(value, (dict, list, tuple)) else str(value)
+	if len(value) > limit:
+		return f"{value[:limit]}...[+{len(value) - limit} chars]"
+	return value
+
+
+class _CorrelationFilter(logging.Filter):
+	def filter(self, record: logging.LogRecord) -> bool:
+		record.request_id = _request_id.get()
+		record.assessment_id = _assessment_id.get()
+		return True
+
+
+class _CappedQueueHandler(logging.handlers.QueueHandler):
+	"""Enqueue without blocking: records are capped in the caller and dropped (and counted) when the queue is full."""
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		# Render the message now so later mutation of its arguments cannot change the record, but
+		# leave JSON encoding and stream writes to the listener thread.
+		prepared = logging.makeLogRecord(record.__dict__)
+		prepared.msg = cap(record.getMessage())
+		prepared.args = None
+		if record.exc_info:
+			prepared.exc_text = cap(logging.Formatter().formatException(record.exc_info), _max_field_chars * 4)
+			prepared.exc_info = None
+		for key, value in record.__dict__.items():
+			if key not in _RESERVED:
+				setattr(prepared, key, cap(value))
+		return prepared
+
+	def enqueue(self, record: logging.LogRecord) -> None:
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			LOG_RECORDS_DROPPED.inc()
+
+
+class _Listener(logging.handlers.QueueListener):
+	def enqueue_sentinel(self) -> None:
+		# Wait for room rather than failing when shutdown finds the queue full.
+		self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+	def format(self, record: logging.LogRecord) -> str:
+		entry: Dict[str, Any] = {
+			"ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+			"level": record.levelname,
+			"logger": record.name,
+			"msg": record.getMessage(),
+		}
+		for key in ("request_id", "assessment_id"):
+			value = getattr(record, key, None)
+			if value:
+				entry[key] = value
+		for key, value in record.__dict__.items():
+			if key not in _RESERVED:
+				entry[key] = value
+		if record.exc_text:
+			entry["exc"] = record.exc_text
+		return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+	def format(self, record: logging.LogRecord) -> str:
+		stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+		fields = [f"{key}={value}" for key, value in record.__dict__.items() if key not in _RESERVED]
+		for key in ("request_id", "assessment_id"):
+			if getattr(record, key, None):
+				fields.append(f"{key}={getattr(record, key)}")
+		line = f"{stamp} {record.levelname:<7} [{record.name}] {record.getMessage()}"
+		if fields:
+			line += " " + " ".join(fields)
+		if record.exc_text:
+			line += "\n" + record.exc_text
+		return line
+
+
+class LogPipeline:
+	"""Queue handler on the `foreknow` logger plus a listener thread that formats and writes records.
+
+	Worker processes (PDF render pool, batch workers) write synchronously instead: threads do not
+	survive fork and multiprocessing children exit without running atexit hooks.
+	"""
+
+	_lock = threading.Lock()
+	_listener: Optional[_Listener] = None
+	_handler: Optional[logging.Handler] = None
+	_settings: Dict[str, Any] = {}
+
+	@classmethod
+	def configure(cls, level: Optional[str] = None, fmt: Optional[str] = None, stream=None, queue_size: Optional[int] = None, background: Optional[bool] = None) -> None:
+		"""(Re)configure the application loggers; safe to call more than once."""
+		global _max_field_chars
+		_max_field_chars = int(os.getenv("LOG_MAX_FIELD_CHARS", "2000"))
+		if background is None:
+			background = multiprocessing.parent_process() is None
+		with cls._lock:
+			cls._stop_locked()
+			cls._settings = {"level": level, "fmt": fmt, "stream": stream, "queue_size": queue_size}
+			sink = logging.StreamHandler(stream or sys.stdout)
+			sink.setFormatter(TextFormatter() if (fmt or os.getenv("LOG_FORMAT", "json")).lower() == "text" else JsonFormatter())
+			if background:
+				log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+				handler: logging.Handler = _CappedQueueHandler(log_queue)
+				cls._listener = _Listener(log_queue, sink, respect_handler_level=True)
+				cls._listener.start()
+			else:
+				handler = sink
+			handler.addFilter(_CorrelationFilter())
+			root = logging.getLogger(ROOT_LOGGER)
+			root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+			root.addHandler(handler)
+			root.propagate = False
+			cls._handler = handler
+
+	@classmethod
+	def _stop_locked(cls) -> None:
+		if cls._handler is not None:
+			logging.getLogger(ROOT_LOGGER).removeHandler(cls._handler)
+			cls._handler = None
+		if cls._listener is not None:
+			cls._listener.stop()
+			cls._listener = None
+
+	@classmethod
+	def shutdown(cls) -> None:
+		"""Flush queued records and stop the writer thread."""
+		with cls._lock:
+			cls._stop_locked()
+
+	@classmethod
+	def ensure_configured(cls) -> None:
+		if cls._handler is None:
+			cls.configure()
+
+	@classmethod
+	def _after_fork_in_child(cls) -> None:
+		cls._lock = threading.Lock()
+		if cls._handler is not None:
+			logging.getLogger(ROOT_LOGGER).removeHandler(cls._handler)
+			cls._handler = None
+			cls._listener = None
+			cls.configure(background=False, **cls._settings)
+
+
+def get_logger(name: str) -> logging.Logger:
+	LogPipeline.ensure_configured()
+	return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def current_request_id() -> Optional[str]:
+	return _request_id.get()
+
+
+@contextmanager
+def correlation(request_id: Optional[str] = None, assessment_id: Optional[str] = None) -> Iterator[None]:
+	"""Tag every record logged inside the block (and in contexts copied from it) with these ids."""
+	tokens = []
+	if request_id is not None:
+		tokens.append((_request_id, _request_id.set(request_id)))
+	if assessment_id is not None:
+		tokens.append((_assessment_id, _assessment_id.set(assessment_id)))
+	try:
+		yield
+	finally:
+		for var, token in reversed(tokens):
+			var.reset(token)
+
+
+def bind_assessment(assessment_id: str) -> None:
+	"""Tag the rest of the current context (e.g. one pipeline run in a worker thread) with an assessment id."""
+	_assessment_id.set(assessment_id)
+
+
+atexit.register(LogPipeline.shutdown)
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=LogPipeline._after_fork_in_child)
@@ -0,0 +1,287 @@
+import contextvars
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from memory_stats import WATCHER, current_rss, memory_breakdown
+
+
+# Upper bounds in seconds; pipeline stages range from sub-millisecond writes to multi-minute LLM calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Peak RSS during a stage (64 MB .. 32 GB) and growth over the stage (1 MB .. 8 GB), in bytes.
+RSS_BUCKETS = tuple(float(2 ** p) for p in range(26, 36))
+RSS_GROWTH_BUCKETS = tuple(float(2 ** p) for p in range(20, 34))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+	if math.isinf(value):
+		return "+Inf" if value > 0 else "-Inf"
+	return repr(float(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+	parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+	kind = ""
+
+	def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+		self.name = name
+		self.help_text = help_text
+		self.labels = tuple(labels)
+		self._lock = threading.Lock()
+
+	def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+		if set(labels) != set(self.labels):
+			raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+		return tuple(str(labels[name]) for name in self.labels)
+
+	def samples(self) -> List[str]:
+		raise NotImplementedError
+
+	def render(self) -> str:
+		lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+		lines.extend(self.samples())
+		return "\n".join(lines)
+
+
+class Counter(_Metric):
+	"""Monotonic counter keyed by label values."""
+
+	kind = "counter"
+
+	def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+		super().__init__(name, help_text, labels)
+		self._values: Dict[Tuple[str, ...], float] = {}
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def value(self, **labels: str) -> float:
+		with self._lock:
+			return self._values.get(self._key(labels), 0.0)
+
+	def samples(self) -> List[str]:
+		with self._lock:
+			items = sorted(self._values.items())
+		return [f"{self.name}{_label_text(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+	"""Point-in-time value keyed by label values, either set directly or read from a callback at render time."""
+
+	kind = "gauge"
+
+	def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), callback: Optional[Callable[[], Optional[float]]] = None):
+		super().__init__(name, help_text, labels)
+		self._values: Dict[Tuple[str, ...], float] = {}
+		self._callback = callback
+
+	def set(self, value: float, **labels: str) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = value
+
+	def samples(self) -> List[str]:
+		if self._callback is not None:
+			value = self._callback()
+			return [] if value is None else [f"{self.name} {_format_value(value)}"]
+		with self._lock:
+			items = sorted(self._values.items())
+		return [f"{self.name}{_label_text(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+	"""Fixed-bucket latency histogram keyed by label values."""
+
+	kind = "histogram"
+
+	def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+		super().__init__(name, help_text, labels)
+		self.buckets = tuple(sorted(float(b) for b in buckets))
+		# Per label set: non-cumulative bucket counts (last slot is +Inf), sum and count.
+		self._series: Dict[Tuple[str, ...], List] = {}
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = self._key(labels)
+		index = bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+			series[0][index] += 1
+			series[1] += value
+			series[2] += 1
+
+	def snapshot(self, **labels: str) -> Optional[Tuple[List[int], float, int]]:
+		"""Return (cumulative bucket counts, sum, count) for one label set, or None if never observed."""
+		with self._lock:
+			series = self._series.get(self._key(labels))
+			if series is None:
+				return None
+			counts, total, count = list(series[0]), series[1], series[2]
+		cumulative, running = [], 0
+		for c in counts:
+			running += c
+			cumulative.append(running)
+		return cumulative, total, count
+
+	def samples(self) -> List[str]:
+		with self._lock:
+			items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+		lines = []
+		bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+		for key, (counts, total, count) in items:
+			running = 0
+			for bound, c in zip(bounds, counts):
+				running += c
+				le = 'le="' + bound + '"'
+				lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {running}")
+			lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_format_value(total)}")
+			lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+		return lines
+
+
+class MetricsRegistry:
+	"""Process-wide set of metrics rendered together in the Prometheus text format."""
+
+	def __init__(self):
+		self._metrics: Dict[str, _Metric] = {}
+		self._lock = threading.Lock()
+
+	def _register(self, metric: _Metric) -> _Metric:
+		with self._lock:
+			existing = self._metrics.get(metric.name)
+			if existing is not None:
+				if type(existing) is not type(metric) or existing.labels != metric.labels:
+					raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+				return existing
+			self._metrics[metric.name] = metric
+			return metric
+
+	def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+		return self._register(Counter(name, help_text, labels))
+
+	def gauge(self, name: str, help_text: str, labels: Sequence[str] = (), callback: Optional[Callable[[], Optional[float]]] = None) -> Gauge:
+		return self._register(Gauge(name, help_text, labels, callback))
+
+	def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+		return self._register(Histogram(name, help_text, labels, buckets))
+
+	def render(self) -> str:
+		with self._lock:
+			metrics = list(self._metrics.values())
+		return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+	"foreknow_stage_duration_seconds",
+	"Duration of pipeline stages (upload save, model load, transcription, LLM calls, PDF render, artifact writes).",
+	("stage", "outcome"),
+)
+STAGE_PEAK_RSS = REGISTRY.histogram("foreknow_stage_peak_rss_bytes", "Highest process RSS observed during each pipeline stage.", ("stage",), RSS_BUCKETS)
+STAGE_RSS_GROWTH = REGISTRY.histogram("foreknow_stage_rss_growth_bytes", "Peak RSS during a stage minus RSS when it started.", ("stage",), RSS_GROWTH_BUCKETS)
+PROCESS_RSS = REGISTRY.gauge("process_resident_memory_bytes", "Resident memory size in bytes.", callback=current_rss)
+PROCESS_SHARED = REGISTRY.gauge("foreknow_process_shared_memory_bytes", "Resident pages this process shares with others (e.g. preloaded model weights in forked workers).", callback=lambda: (memory_breakdown() or {}).get("shared"))
+PROCESS_PRIVATE = REGISTRY.gauge("foreknow_process_private_memory_bytes", "Resident pages private to this process.", callback=lambda: (memory_breakdown() or {}).get("private"))
+STAGE_RETRIES = REGISTRY.counter("foreknow_stage_retries_total", "Retried attempts of pipeline stages.", ("stage",))
+ASSESSMENTS = REGISTRY.counter("foreknow_assessments_total", "Completed assessment pipelines by AI service status.", ("ai_service_status",))
+HTTP_REQUESTS = REGISTRY.counter("foreknow_http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status"))
+HTTP_SECONDS = REGISTRY.histogram("foreknow_http_request_duration_seconds", "HTTP request latency until the response starts.", ("method", "route"))
+
+
+class RequestTimings:
+	"""Spans recorded while serving one request, summarised as a Server-Timing header."""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.spans: List[Tuple[str, float]] = []
+		self._lock = threading.Lock()
+
+	def add(self, stage: str, seconds: float) -> None:
+		with self._lock:
+			self.spans.append((stage, seconds))
+
+	def breakdown(self) -> Dict[str, Tuple[float, int]]:
+		"""Total seconds and span count per stage, in the order stages first ran."""
+		totals: Dict[str, Tuple[float, int]] = {}
+		with self._lock:
+			spans = list(self.spans)
+		for stage, seconds in spans:
+			total, count = totals.get(stage, (0.0, 0))
+			totals[stage] = (total + seconds, count + 1)
+		return totals
+
+	def server_timing(self, total_seconds: Optional[float] = None) -> str:
+		if total_seconds is None:
+			total_seconds = time.perf_counter() - self.started
+		entries = []
+		for stage, (seconds, count) in self.breakdown().items():
+			desc = f';desc="x{count}"' if count > 1 else ""
+			entries.append(f"{stage}{desc};dur={seconds * 1000:.1f}")
+		entries.append(f"total;dur={total_seconds * 1000:.1f}")
+		return ", ".join(entries)
+
+
+_current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("foreknow_request_timings", default=None)
+
+
+def begin_request() -> Tuple[RequestTimings, contextvars.Token]:
+	timings = RequestTimings()
+	return timings, _current_timings.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+	_current_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+	return _current_timings.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+	"""Time a block into STAGE_SECONDS and, inside a request, into its Server-Timing breakdown.
+
+	Also records the stage's peak RSS and its growth over the stage. RSS is process-wide, so with
+	concurrent requests a stage's peak includes whatever else was running at the time.
+	"""
+	start = time.perf_counter()
+	tracker = WATCHER.start()
+	outcome = "ok"
+	try:
+		yield
+	except BaseException:
+		outcome = "error"
+		raise
+	finally:
+		elapsed = time.perf_counter() - start
+		WATCHER.finish(tracker)
+		STAGE_SECONDS.observe(elapsed, stage=stage, outcome=outcome)
+		if tracker.start is not None:
+			STAGE_PEAK_RSS.observe(tracker.peak, stage=stage)
+			STAGE_RSS_GROWTH.observe(tracker.peak - tracker.start, stage=stage)
+		timings = _current_timings.get()
+		if timings is not None:
+			timings.add(stage, elapsed)
+
+
+def bind(func: Callable) -> Callable:
+	"""Carry the caller's request context into a function run on a plain executor thread."""
+	context = contextvars.copy_context()
+	return lambda *args, **kwargs: context.run(func, *args, **kwargs)
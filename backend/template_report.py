@@ -0,0 +1,171 @@
+from typing import Dict, Any, List
+
+
+SPEECH_METRIC_KEYS = [
+	"Total time",
+	"Total pause time",
+	"Pause density (%)",
+	"Repeated words",
+	"Filler words",
+	"Filler frequency (%)",
+	"Unique words",
+	"Lexical diversity (%)",
+	"Speech fluency (words/sec)",
+]
+
+
+class TemplateReportGenerator:
+	"""Deterministic, LLM-free report texts built straight from the ScoreCollector bundle."""
+
+	@staticmethod
+	def _average_speech_metrics(speech_metrics: List[Dict[str, Any]]) -> Dict[str, float]:
+		filled = [m for m in speech_metrics if m]
+		if not filled:
+			return {}
+		averaged: Dict[str, float] = {}
+		for key in SPEECH_METRIC_KEYS:
+			values = [float(m[key]) for m in filled if key in m]
+			if values:
+				averaged[key] = round(sum(values) / len(values), 2)
+		return averaged
+
+	@staticmethod
+	def _sentiment_line(sentiment: Dict[str, Any]) -> str:
+		if not sentiment:
+			return "not available (no transcribed speech)"
+		label = sentiment.get("label", "unknown")
+		score = sentiment.get("weighted_score")
+		if score is None:
+			return label
+		return f"{label} (weighted score {score})"
+
+	@staticmethod
+	def _risk_line(risk: Dict[str, Any]) -> str:
+		if not risk:
+			return "not available"
+		return f"{risk.get('category', 'unknown')} (probability {risk.get('probability', 0.0)}, model {risk.get('model_version', 'unknown')})"
+
+	@staticmethod
+	def generate_doctor_report(scores: Dict[str, Any], disclaimer: str) -> str:
+		speech_metrics = scores.get("speech_metrics", [])
+		sentiments = scores.get("sentiment", [])
+		averaged = TemplateReportGenerator._average_speech_metrics(speech_metrics)
+		files_count = len([t for t in scores.get("transcriptions", []) if t.get("text", "").strip()])
+
+		lines = [
+			"# Cognitive Assessment Report",
+			"",
+			"## Overview",
+			"This report was generated from the recorded game scores and speech analytics using the standard "
+			"ForeKnow template. It restates the measured values without additional interpretation.",
+			"",
+			"## Game Scores",
+			f"- Stroop Colour: {scores.get('stroop_colour', 0)}",
+			f"- Memory Game: {scores.get('memory_game', 0)}",
+			f"- Image Recall: {scores.get('image_recall', 0)}",
+		]
+		game_metrics = scores.get("game_metrics", {})
+		if game_metrics:
+			lines.append("")
+			lines.append("### Game Details (from raw trials)")
+			stroop = game_metrics.get("stroop", {})
+			if stroop:
+				lines.append(f"- Stroop accuracy: {stroop.get('accuracy')}, median reaction time: {stroop.get('median_rt_ms')} ms, interference cost: {stroop.get('interference_cost_ms')} ms")
+			memory = game_metrics.get("memory", {})
+			if memory:
+				lines.append(f"- Memory span: {memory.get('span')}, item accuracy: {memory.get('item_accuracy')}, intrusions: {memory.get('intrusions')}")
+			recall = game_metrics.get("image_recall", {})
+			if recall:
+				lines.append(f"- Image recall hit rate: {recall.get('hit_rate')}, false alarm rate: {recall.get('false_alarm_rate')}")
+		lines += [
+			"",
+			"## Speech Analysis",
+			f"Audio responses with transcribed speech: {files_count}",
+		]
+		if averaged:
+			lines.append("")
+			lines.append("### Average Speech Metrics")
+			for key, value in averaged.items():
+				lines.append(f"- {key}: {value}")
+		else:
+			lines.append("No speech metrics could be computed from the provided audio.")
+
+		lines += [
+			"",
+			"## Heuristic Cognitive Risk",
+			f"- Risk category: {TemplateReportGenerator._risk_line(scores.get('risk', {}))}",
+		]
+		contributions = scores.get("risk", {}).get("contributions", {})
+		if contributions:
+			for name, value in sorted(contributions.items(), key=lambda kv: -abs(kv[1]))[:3]:
+				lines.append(f"- Contribution of {name.replace('_', ' ')}: {value:+.2f}")
+
+		lines += [
+			"",
+			"## Sentiment Analysis",
+			f"- Combined sentiment: {TemplateReportGenerator._sentiment_line(scores.get('combined_sentiment', {}))}",
+		]
+		for i, sentiment in enumerate(sentiments, start=1):
+			if sentiment:
+				lines.append(f"- Response {i}: {TemplateReportGenerator._sentiment_line(sentiment)}")
+
+		lines += [
+			"",
+			"## Recommendations",
+			"1. Share this report with a healthcare professional for a qualified interpretation.",
+			"2. Repeat the assessment periodically to track changes over time.",
+			"3. Maintain regular physical activity, sleep and social engagement.",
+			"",
+			"## Disclaimer",
+			disclaimer,
+		]
+		return "\n".join(lines)
+
+	@staticmethod
+	def generate_summary(scores: Dict[str, Any], disclaimer: str) -> str:
+		averaged = TemplateReportGenerator._average_speech_metrics(scores.get("speech_metrics", []))
+		lines = [
+			"The cognitive assessment was completed and the results below were recorded.",
+			"",
+			f"- Stroop Colour: {scores.get('stroop_colour', 0)}",
+			f"- Memory Game: {scores.get('memory_game', 0)}",
+			f"- Image Recall: {scores.get('image_recall', 0)}",
+		]
+		if averaged:
+			lines.append(f"- Pause density: {averaged.get('Pause density (%)', 0.0)}%")
+			lines.append(f"- Lexical diversity: {averaged.get('Lexical diversity (%)', 0.0)}%")
+		lines.append(f"- Combined sentiment: {TemplateReportGenerator._sentiment_line(scores.get('combined_sentiment', {}))}")
+		lines.append(f"- Heuristic cognitive risk: {TemplateReportGenerator._risk_line(scores.get('risk', {}))}")
+		lines += [
+			"",
+			"Next Steps:",
+			"",
+			"1. Review the full report with a healthcare professional.",
+			"2. Repeat the assessment to track changes over time.",
+			"",
+			"DISCLAIMER:" + disclaimer,
+		]
+		return "\n".join(lines)
+
+	@staticmethod
+	def generate_email(scores: Dict[str, Any], disclaimer: str) -> str:
+		return "\n".join([
+			"Subject: Your ForeKnow Cognitive Assessment Results",
+			"",
+			"Dear Participant,",
+			"",
+			"Thank you for completing the ForeKnow cognitive assessment. Your results for the Stroop Colour, "
+			"Memory Game and Image Recall tasks, together with the analysis of your spoken responses, are "
+			"included in the attached report.",
+			"",
+			f"Stroop Colour: {scores.get('stroop_colour', 0)}, Memory Game: {scores.get('memory_game', 0)}, "
+			f"Image Recall: {scores.get('image_recall', 0)}.",
+			"",
+			"We encourage you to share the report with your doctor. Taking care of your cognitive health "
+			"early is one of the best investments you can make.",
+			"",
+			"Warm regards,",
+			"The ForeKnow Team",
+			"",
+			disclaimer,
+		])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for pipeline admission control: bounded slots, bounded wait queue, FIFO hand-off and Retry-After.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from admission import ADMISSION_REJECTIONS, AdmissionController, AdmissionRejected
+
+
+async def run_job(controller, order, name, seconds):
+    granted = await controller.acquire()
+    order.append(name)
+    await asyncio.sleep(seconds)
+    controller.release(granted)
+
+
+def test_requests_beyond_slots_and_queue_are_rejected_at_once():
+    async def scenario():
+        controller = AdmissionController(slots=1, queue_size=1, max_wait=5)
+        order = []
+        first = asyncio.create_task(run_job(controller, order, "first", 0.1))
+        second = asyncio.create_task(run_job(controller, order, "second", 0.05))
+        await asyncio.sleep(0.01)
+        assert (controller.active, controller.queued) == (1, 1)
+        before = ADMISSION_REJECTIONS.value(reason="queue_full")
+        try:
+            await controller.acquire()
+            raise AssertionError("third request should be rejected")
+        except AdmissionRejected as e:
+            assert e.reason == "queue_full" and e.retry_after >= 1
+        assert ADMISSION_REJECTIONS.value(reason="queue_full") == before + 1
+        await asyncio.gather(first, second)
+        assert order == ["first", "second"]
+        assert (controller.active, controller.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_waiters_time_out_and_retry_after_follows_observed_latency():
+    async def scenario():
+        controller = AdmissionController(slots=2, queue_size=4, max_wait=0.05)
+        order = []
+        jobs = [asyncio.create_task(run_job(controller, order, n, 0.2)) for n in ("a", "b")]
+        await asyncio.sleep(0.01)
+        try:
+            await controller.acquire()
+            raise AssertionError("waiter should time out")
+        except AdmissionRejected as e:
+            assert e.reason == "wait_timeout"
+        assert controller.queued == 0
+        await asyncio.gather(*jobs)
+        # Two slots each taking ~0.2 s: one queued request ahead means ~0.2 s, rounded up to 1 s.
+        assert controller.retry_after() == 1
+        controller._service_seconds = 30.0
+        assert controller.retry_after() == 15
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    async def scenario():
+        controller = AdmissionController(slots=1, queue_size=2, max_wait=5)
+        granted = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release(granted)
+        assert (controller.active, controller.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_requests_beyond_slots_and_queue_are_rejected_at_once()
+    test_waiters_time_out_and_retry_after_follows_observed_latency()
+    test_cancelled_waiter_does_not_leak_its_slot()
+    print("✅ Admission control tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the assessment index: unique ids, backfill, keyset pagination, eviction and chunked lookups.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import assessment_store
+from assessment_store import AssessmentStore, assessment_created_at, new_assessment_id
+from report_export import ReportExporter
+
+
+def write_artifacts(output_dir, assessment_id, text):
+    artifacts = {}
+    for kind, prefix, ext in (("summary", "summary_", "txt"), ("email", "email_", "txt")):
+        path = os.path.join(output_dir, f"{prefix}{assessment_id}.{ext}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        artifacts[kind] = path
+    return artifacts
+
+
+def test_assessments_in_the_same_second_keep_their_own_row_and_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssessmentStore(tmp)
+        now = datetime(2026, 1, 2, 3, 4, 5)
+        first, second = new_assessment_id(now), new_assessment_id(now)
+        assert first != second and first.startswith("20260102_030405_") and len(first) == len("20260102_030405_") + 8
+        assert assessment_created_at(first) == now and assessment_created_at("20260102_030405") == now
+        assert assessment_created_at("20260102_030405_XYZ") is None
+        ReportExporter.validate_ids([first, second, "20260102_030405"])
+
+        store.record(first, {"stroop_colour": 10}, write_artifacts(tmp, first, "first"), risk={"category": "Low"})
+        store.record(second, {"stroop_colour": 90}, write_artifacts(tmp, second, "second"), risk={"category": "High"})
+        assert store.get(first)["stroop_colour"] == 10 and store.get(second)["stroop_colour"] == 90
+        assert store.artifact_paths([first], "summary")[first] != store.artifact_paths([second], "summary")[second]
+        with open(store.artifact_paths([first], "summary")[first], encoding="utf-8") as f:
+            assert f.read() == "first"
+        # Neither is skipped when paging through a second holding several assessments.
+        page = store.list_assessments(limit=1)
+        rest = store.list_assessments(limit=5, before=page[0]["id"])
+        assert sorted([page[0]["id"]] + [row["id"] for row in rest]) == sorted([first, second])
+
+
+def test_backfill_indexes_existing_artifacts_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy, current, lazy = "20250101_120000", new_assessment_id(datetime(2025, 2, 1)), new_assessment_id(datetime(2025, 3, 1))
+        write_artifacts(tmp, legacy, "legacy")
+        with open(os.path.join(tmp, f"metrics_{legacy}.json"), "w", encoding="utf-8") as f:
+            json.dump({"stroop_colour": 55, "memory_game": 60, "risk": {"category": "Moderate", "probability": 0.4}}, f)
+        for name in (f"doctor_report_{current}.pdf", f"profile_{current}.folded", f"profile_{current}.prof", f"doctor_report_{lazy}.source.json"):
+            with open(os.path.join(tmp, name), "wb") as f:
+                f.write(b"x" * 10)
+        for name in ("summary_latest.txt", "doctor_report_2025.pdf", "profile_notes.txt", "email_20250101_120000_ZZZZZZZZ.txt", "notes.txt"):
+            open(os.path.join(tmp, name), "w").close()
+
+        store = AssessmentStore(tmp)
+        assert store.select_ids() == [legacy, current, lazy]
+        row = store.get(legacy)
+        assert row["stroop_colour"] == 55 and row["memory_game"] == 60 and row["image_recall"] is None
+        assert row["risk_category"] == "Moderate" and row["created_at"] == "2025-01-01T12:00:00"
+        assert set(row["artifacts"]) == {"summary", "email", "metrics"}
+        assert set(store.get(current)["artifacts"]) == {"pdf", "profile_folded", "profile_pstats"}
+        assert store.get(current)["artifacts"]["pdf"]["size_bytes"] == 10
+        # A PDF that is only rendered on first download is indexed under its final name.
+        assert store.artifact_paths([lazy], "pdf") == {lazy: os.path.join(tmp, f"doctor_report_{lazy}.pdf")}
+        assert store.artifact_paths([lazy], "pdf_source")[lazy].endswith(".source.json")
+
+        # Backfill runs once per database: files written later are not picked up by reopening it.
+        write_artifacts(tmp, "20250401_000000", "late")
+        store._conn.close()
+        assert AssessmentStore(tmp).select_ids() == [legacy, current, lazy]
+
+
+def test_keyset_pagination_walks_every_assessment_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssessmentStore(tmp)
+        start = datetime(2026, 3, 1)
+        ids = [new_assessment_id(start + timedelta(minutes=i)) for i in range(5)]
+        ids += [new_assessment_id(start + timedelta(minutes=2)) for _ in range(3)]  # several in one second
+        for i, assessment_id in enumerate(ids):
+            store.record(assessment_id, {"memory_game": i}, {})
+        newest_first = sorted(ids, key=lambda i: (assessment_created_at(i), i), reverse=True)
+
+        seen, before = [], None
+        while True:
+            page = store.list_assessments(limit=3, before=before)
+            if not page:
+                break
+            assert len(page) <= 3
+            seen.extend(row["id"] for row in page)
+            before = page[-1]["id"]
+        assert seen == newest_first
+        assert store.latest()["id"] == newest_first[0]
+        assert [row["id"] for row in store.list_assessments(limit=2, before=newest_first[4])] == newest_first[5:7]
+        assert store.list_assessments(before=newest_first[-1]) == []
+        assert store.list_assessments(before="20990101_000000") == []
+
+        window = store.select_ids(start=start + timedelta(minutes=1), end=start + timedelta(minutes=3))
+        assert window == sorted((i for i in ids if start + timedelta(minutes=1) <= assessment_created_at(i) <= start + timedelta(minutes=3)), key=lambda i: (assessment_created_at(i), i))
+        assert len(window) == 6
+        assert store.select_ids(ids=[ids[0], ids[4], "20990101_000000"]) == [ids[0], ids[4]]
+
+
+def test_eviction_by_age_and_total_size():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssessmentStore(tmp)
+        now = datetime.utcnow()
+        ages = (40, 20, 10, 1)
+        ids = [new_assessment_id(now - timedelta(days=days)) for days in ages]
+        for assessment_id in ids:
+            store.record(assessment_id, {}, write_artifacts(tmp, assessment_id, "x" * 100))
+        assert store.total_size() == 800
+
+        assert store.evict(max_age_days=30) == [ids[0]]
+        assert store.get(ids[0]) is None and store.artifact_paths([ids[0]], "summary") == {}
+        assert not os.path.exists(os.path.join(tmp, f"summary_{ids[0]}.txt"))
+        assert store.evict(max_age_days=30) == [] and store.evict() == []
+
+        # Oldest first until the rest fits the budget.
+        assert store.evict(max_total_bytes=250) == [ids[1], ids[2]]
+        assert store.total_size() == 200 and store.select_ids() == [ids[3]]
+        assert os.path.exists(os.path.join(tmp, f"email_{ids[3]}.txt"))
+        # A file that has already gone does not stop its row from being evicted.
+        os.remove(os.path.join(tmp, f"email_{ids[3]}.txt"))
+        assert store.evict(max_total_bytes=0) == [ids[3]] and store.total_size() == 0
+
+
+def test_artifact_lookups_are_chunked_under_the_parameter_limit():
+    original_chunk = assessment_store._IN_CHUNK
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssessmentStore(tmp)
+        start = datetime(2026, 4, 1)
+        ids = [new_assessment_id(start + timedelta(seconds=i)) for i in range(23)]
+        for assessment_id in ids:
+            store.record(assessment_id, {}, {"pdf": os.path.join(tmp, f"doctor_report_{assessment_id}.pdf")})
+        # With SQLite allowing 10 bound parameters, one IN list of 23 ids would fail.
+        store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 10)
+        assessment_store._IN_CHUNK = 9
+        try:
+            paths = store.artifact_paths(ids + ["20990101_000000"], "pdf")
+        finally:
+            assessment_store._IN_CHUNK = original_chunk
+        assert sorted(paths) == sorted(ids)
+        assert paths[ids[17]] == os.path.join(tmp, f"doctor_report_{ids[17]}.pdf")
+
+
+if __name__ == "__main__":
+    test_assessments_in_the_same_second_keep_their_own_row_and_files()
+    test_backfill_indexes_existing_artifacts_once()
+    test_keyset_pagination_walks_every_assessment_once()
+    test_eviction_by_age_and_total_size()
+    test_artifact_lookups_are_chunked_under_the_parameter_limit()
+    print("✅ Assessment store tests passed")
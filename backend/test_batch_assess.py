@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch assessment CLI: inputs, checkpointed resume, the worker pool and throughput.
+"""
+
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batch_assess import BatchCheckpoint, BatchInputError, BatchProgress, load_items, run_batch
+
+
+def fake_process(item, llm):
+    """Stands in for process_item: a bundle shaped like ScoreCollector's, without the models."""
+    if "bad" in item["id"]:
+        return {"id": item["id"], "audio": ";".join(item["audio"]), "audio_files": len(item["audio"]), "status": "failed", "error": "RuntimeError: boom", "worker": os.getpid()}
+    bundle = {
+        "speech_metrics": [{"Pause density (%)": 10.0, "Speech fluency (words/sec)": 2.0}],
+        "combined_sentiment": {"label": "neutral", "weighted_score": 55.0},
+        "transcribed_text": f"text of {item['id']}",
+        **item["scores"],
+    }
+    return {"id": item["id"], "audio": ";".join(item["audio"]), "audio_files": len(item["audio"]), "transcribed_files": 1, "status": "ok", "worker": os.getpid(), "seconds": 0.1, "bundle": bundle}
+
+
+def read_rows(output_dir):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(output_dir, "part-*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def make_items(n):
+    return [{"id": f"rec-{i}" if i != 3 else "rec-bad", "audio": [f"/data/{i}.wav"], "user_id": None, "scores": {"stroop_colour": 80.0} if i % 2 else {}} for i in range(n)]
+
+
+def expect_input_error(func, *args):
+    try:
+        func(*args)
+    except BatchInputError as e:
+        return str(e)
+    assert False, "expected BatchInputError"
+
+
+def test_directories_and_manifests_become_items():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("a/x.wav", "b/y.MP3", "b/notes.txt"):
+            os.makedirs(os.path.join(tmp, "rec", os.path.dirname(name)), exist_ok=True)
+            open(os.path.join(tmp, "rec", name), "w").close()
+        items = load_items(os.path.join(tmp, "rec"))
+        assert [item["id"] for item in items] == ["a/x.wav", "b/y.MP3"]
+        assert items[0]["audio"] == [os.path.join(tmp, "rec", "a", "x.wav")] and items[0]["scores"] == {}
+
+        manifest = os.path.join(tmp, "manifest.csv")
+        with open(manifest, "w", newline="") as f:
+            f.write("id,audio,user_id,stroop_colour,memory_game\ns1,one.wav;sub/two.wav,u1,71.5,\ns2,/abs/three.wav,,,40\n")
+        first, second = load_items(manifest)
+        assert first["audio"] == [os.path.join(tmp, "one.wav"), os.path.join(tmp, "sub", "two.wav")]
+        assert first["scores"] == {"stroop_colour": 71.5} and first["user_id"] == "u1"
+        assert second["audio"] == ["/abs/three.wav"] and second["scores"] == {"memory_game": 40.0} and second["user_id"] is None
+
+        jsonl = os.path.join(tmp, "manifest.jsonl")
+        with open(jsonl, "w") as f:
+            f.write(json.dumps({"id": "j1", "audio": ["a.wav", "b.wav"], "image_recall": 3}) + "\n\n")
+            f.write(json.dumps({"id": "j1", "audio": "c.wav"}) + "\n")
+        assert "Duplicate id" in expect_input_error(load_items, jsonl)
+        with open(manifest, "w", newline="") as f:
+            f.write("id,audio,stroop_colour\ns1,one.wav,high\n")
+        assert "manifest.csv:2: stroop_colour is not a number" in expect_input_error(load_items, manifest)
+
+
+def test_interrupted_run_resumes_without_repeating_items():
+    with tempfile.TemporaryDirectory() as out:
+        items = make_items(9)
+        calls = []
+
+        def crashing(item, llm):
+            if len(calls) == 5:
+                raise KeyboardInterrupt
+            calls.append(item["id"])
+            return fake_process(item, llm)
+
+        try:
+            run_batch(items, out, workers=0, fmt="csv", flush_every=2, process=crashing, out=io.StringIO())
+            assert False, "expected KeyboardInterrupt"
+        except KeyboardInterrupt:
+            pass
+        # Everything that finished before the interruption is saved: two full parts and the rest.
+        assert len(read_rows(out)) == 5 and len(BatchCheckpoint(out).parts) == 3
+        open(os.path.join(out, "part-00003.csv.tmp"), "w").close()  # died while writing a part
+
+        calls.clear()
+        summary = run_batch(items, out, workers=0, fmt="csv", flush_every=2, process=lambda item, llm: calls.append(item["id"]) or fake_process(item, llm), out=io.StringIO())
+        assert calls == ["rec-5", "rec-6", "rec-7", "rec-8"] and summary["processed"] == 4
+        assert not os.path.exists(os.path.join(out, "part-00003.csv.tmp"))
+        rows = {row["id"]: row for row in read_rows(out)}
+        assert sorted(rows) == sorted(item["id"] for item in items)
+
+        # Game scores the input did not have stay empty, and failed items get no metrics or risk.
+        assert rows["rec-1"]["stroop_colour"] == "80.0" and rows["rec-0"]["stroop_colour"] == ""
+        assert rows["rec-0"]["pause_density"] == "10.0" and rows["rec-0"]["sentiment_label"] == "neutral"
+        assert rows["rec-0"]["risk_category"] and float(rows["rec-0"]["risk_probability"]) > 0
+        assert rows["rec-bad"]["status"] == "failed" and rows["rec-bad"]["risk_category"] == "" and rows["rec-bad"]["error"] == "RuntimeError: boom"
+
+        calls.clear()
+        run_batch(items, out, workers=0, fmt="csv", process=lambda item, llm: calls.append(item["id"]) or fake_process(item, llm), out=io.StringIO())
+        assert calls == []
+        run_batch(items, out, workers=0, retry_failed=True, process=lambda item, llm: calls.append(item["id"]) or fake_process(item, llm), out=io.StringIO())
+        assert calls == ["rec-bad"]
+        assert "holds csv parts" in expect_input_error(run_batch, items, out, 0, False, "parquet")
+        assert "without --llm" in expect_input_error(run_batch, items, out, 0, True)
+
+
+def test_retried_items_replace_their_failed_rows():
+    with tempfile.TemporaryDirectory() as out:
+        items = make_items(6)
+        run_batch(items, out, workers=0, fmt="csv", flush_every=4, process=fake_process, out=io.StringIO())
+        assert [row["status"] for row in read_rows(out) if row["id"] == "rec-bad"] == ["failed"]
+
+        def recovered(item, llm):
+            return fake_process(dict(item, id="rec-ok"), llm) | {"id": item["id"]}
+
+        # Killed after the retried row was recorded but before the failed one was dropped.
+        prune = BatchCheckpoint.prune
+        BatchCheckpoint.prune = lambda self: None
+        try:
+            run_batch(items, out, workers=0, fmt="csv", retry_failed=True, process=recovered, out=io.StringIO())
+        finally:
+            BatchCheckpoint.prune = prune
+        assert [row["status"] for row in read_rows(out) if row["id"] == "rec-bad"] == ["failed", "ok"]
+        assert BatchCheckpoint(out).superseded() == {"part-00000.csv": {"rec-bad"}}
+
+        # Resuming finishes the job: each id is left in exactly one part, with its latest result.
+        summary = run_batch(items, out, workers=0, fmt="csv", process=fake_process, out=io.StringIO())
+        assert summary["processed"] == 0
+        rows = read_rows(out)
+        assert sorted(row["id"] for row in rows) == sorted(item["id"] for item in items)
+        assert {row["id"]: row["status"] for row in rows}["rec-bad"] == "ok"
+        with open(os.path.join(out, "part-00000.csv"), newline="", encoding="utf-8") as f:
+            assert [row["id"] for row in csv.DictReader(f)] == ["rec-0", "rec-1", "rec-2"]
+        checkpoint = BatchCheckpoint(out)
+        assert checkpoint.superseded() == {} and checkpoint.failed == set()
+        assert not [name for name in os.listdir(out) if name.endswith(".tmp")]
+
+
+def test_worker_processes_share_out_the_items():
+    with tempfile.TemporaryDirectory() as out:
+        items = make_items(12)
+        progress = io.StringIO()
+        summary = run_batch(items, out, workers=2, fmt="csv", flush_every=5, process=fake_process, out=progress)
+        assert summary == {"processed": 12, "failed": 1, "remaining": 0, "stopped": False}
+        rows = read_rows(out)
+        assert sorted(row["id"] for row in rows) == sorted(item["id"] for item in items)
+        assert str(os.getpid()) not in {row["worker"] for row in rows}
+        assert len(BatchCheckpoint(out).parts) == 3
+        assert progress.getvalue().splitlines()[-1].startswith("Done 12/12 items (12 files) in ")
+
+
+def test_progress_reports_files_per_minute():
+    now = [100.0]
+    out = io.StringIO()
+    progress = BatchProgress(items=10, files=20, out=out, clock=lambda: now[0])
+    for _ in range(3):
+        progress.add({"audio_files": 2, "status": "ok"})
+    now[0] += 30
+    assert progress.rates() == (12.0, 12.0)
+    progress.report()
+    progress.add({"audio_files": 2, "status": "failed"})
+    now[0] += 30
+    assert progress.rates() == (8.0, 4.0)
+    assert progress.line() == "4/10 items  8/20 files  8.0 files/min (4.0 recent)  1 failed  ETA 1.5 min"
+    assert out.getvalue().startswith("3/10 items  6/20 files  12.0 files/min")
+    assert progress.summary() == "Done 4/10 items (8 files) in 1.0 min: 8.0 files/min, 1 failed"
+
+
+if __name__ == "__main__":
+    test_directories_and_manifests_become_items()
+    test_interrupted_run_resumes_without_repeating_items()
+    test_retried_items_replace_their_failed_rows()
+    test_worker_processes_share_out_the_items()
+    test_progress_reports_files_per_minute()
+    print("✅ Batch assessment tests passed")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for cooperative cancellation: tokens and checkpoints, abandoned coalesced runs, cancelled queue jobs.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import cancellation
+import inference_worker
+from cancellation import PIPELINE_CANCELLATIONS, CancellationToken, PipelineCancelled
+from coalescing import InflightCoalescer
+from inference_worker import InferenceWorker
+from job_queue import CANCELLED, JobCancelled, JobQueue
+from retry_manager import RetryManager
+
+
+def test_checkpoints_raise_once_cancelled_and_are_counted_once():
+    cancellation.check("transcribe")  # no run in scope: a no-op
+    token = CancellationToken()
+    before = PIPELINE_CANCELLATIONS.value(reason="client_disconnected", stage="transcribe")
+    with cancellation.scope(token):
+        cancellation.check("transcribe")
+        assert token.cancel("client_disconnected") and not token.cancel("cancel_request")
+        for stage in ("transcribe", "sentiment"):
+            try:
+                cancellation.check(stage)
+                assert False, "expected PipelineCancelled"
+            except PipelineCancelled as e:
+                assert e.reason == "client_disconnected" and e.stage == stage
+    assert cancellation.current() is None
+    assert PIPELINE_CANCELLATIONS.value(reason="client_disconnected", stage="transcribe") == before + 1
+    assert PIPELINE_CANCELLATIONS.value(reason="client_disconnected", stage="sentiment") == 0
+
+
+def test_retry_backoff_and_llm_waits_stop_early():
+    token = CancellationToken()
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        raise RuntimeError("rate limited")
+
+    threading.Timer(0.1, token.cancel, args=("cancel_request",)).start()
+    started = time.monotonic()
+    with cancellation.scope(token):
+        try:
+            RetryManager.retry_with_backoff(flaky, max_retries=3, base_delay=30, stage="llm_retry")
+            assert False, "expected PipelineCancelled"
+        except PipelineCancelled as e:
+            assert e.stage == "llm_retry"
+    assert len(attempts) == 1 and time.monotonic() - started < 5
+
+    token = CancellationToken()
+    with ThreadPoolExecutor(1) as executor, cancellation.scope(token):
+        slow = executor.submit(time.sleep, 2)
+        threading.Timer(0.1, token.cancel, args=("cancel_request",)).start()
+        started = time.monotonic()
+        try:
+            cancellation.wait_result(slow, None, "llm_doctor")
+            assert False, "expected PipelineCancelled"
+        except PipelineCancelled:
+            assert time.monotonic() - started < 1.5
+
+
+def test_coalesced_run_is_cancelled_only_when_every_caller_leaves():
+    coalescer = InflightCoalescer()
+    stopped = []
+
+    def pipeline():
+        try:
+            for _ in range(100):
+                cancellation.check("transcribe")
+                time.sleep(0.02)
+            return {"assessment_id": "done"}
+        except PipelineCancelled as e:
+            stopped.append(e.reason)
+            raise
+
+    async def scenario():
+        first = asyncio.ensure_future(coalescer.run("k", pipeline))
+        second = asyncio.ensure_future(coalescer.run("k", pipeline))
+        await asyncio.sleep(0.1)
+        first.cancel("client_disconnected")
+        await asyncio.sleep(0.1)
+        assert not stopped and not second.done()
+        second.cancel("cancel_request")
+        await asyncio.gather(first, second, return_exceptions=True)
+        assert coalescer.inflight() == 0
+
+    asyncio.run(scenario())
+    time.sleep(0.1)
+    assert stopped == ["cancel_request"]
+
+
+def test_cancelled_job_stops_its_worker_and_its_waiter():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        checkpoints = []
+
+        def slow(payload):
+            for _ in range(200):
+                checkpoints.append(1)
+                cancellation.check("transcribe")
+                time.sleep(0.02)
+            return {"assessment_id": "never"}
+
+        handlers = dict(inference_worker.JOB_HANDLERS)
+        inference_worker.JOB_HANDLERS["slow"] = slow
+        try:
+            job_id = queue.enqueue("slow", {}, request_id="req-1")
+            worker = InferenceWorker(queue, "w1", visibility_timeout=0.3)
+            runner = threading.Thread(target=worker.run_once)
+            runner.start()
+            time.sleep(0.2)
+            assert queue.cancel(request_id="req-1") == 1
+            runner.join(timeout=3)
+            assert not runner.is_alive() and len(checkpoints) < 200
+            assert queue.get(job_id).status == CANCELLED
+            assert queue.claim("w2", visibility_timeout=30) is None
+            try:
+                queue.wait(job_id, timeout=1)
+                assert False, "expected JobCancelled"
+            except JobCancelled:
+                pass
+
+            # A cancelled waiter cancels the job it was waiting for.
+            other = queue.enqueue("slow", {})
+            token = CancellationToken()
+            threading.Timer(0.1, token.cancel, args=("client_disconnected",)).start()
+            with cancellation.scope(token):
+                try:
+                    queue.wait(other, timeout=5)
+                    assert False, "expected PipelineCancelled"
+                except PipelineCancelled:
+                    pass
+            assert queue.get(other).status == CANCELLED
+        finally:
+            inference_worker.JOB_HANDLERS.clear()
+            inference_worker.JOB_HANDLERS.update(handlers)
+
+
+if __name__ == "__main__":
+    test_checkpoints_raise_once_cancelled_and_are_counted_once()
+    test_retry_backoff_and_llm_waits_stop_early()
+    test_coalesced_run_is_cancelled_only_when_every_caller_leaves()
+    test_cancelled_job_stops_its_worker_and_its_waiter()
+    print("✅ Cancellation tests passed")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for in-flight deduplication of identical assessment submissions.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from coalescing import InflightCoalescer, submission_fingerprint
+from upload_storage import SavedUpload
+
+
+def upload(field, name, sha256):
+    return SavedUpload(field, name, f"/tmp/{name}", 100, sha256)
+
+
+def test_fingerprint_ignores_paths_and_names_but_not_content_or_scores():
+    params = {"scores": {"stroop_colour": 5, "memory_game": 3}, "fast": True}
+    a = submission_fingerprint(params, [upload("audio_q1", "one.webm", "aa"), upload("audio_q2", "two.webm", "bb")])
+    b = submission_fingerprint(dict(reversed(list(params.items()))), [upload("audio_q2", "x.webm", "bb"), upload("audio_q1", "y.webm", "aa")])
+    assert a == b
+    assert a != submission_fingerprint(params, [upload("audio_q1", "one.webm", "bb"), upload("audio_q2", "two.webm", "aa")])
+    assert a != submission_fingerprint({**params, "fast": False}, [upload("audio_q1", "one.webm", "aa"), upload("audio_q2", "two.webm", "bb")])
+
+
+def test_identical_calls_in_flight_share_one_run():
+    coalescer = InflightCoalescer()
+    calls = []
+    lock = threading.Lock()
+
+    def pipeline(tag):
+        def run():
+            with lock:
+                calls.append(tag)
+            time.sleep(0.1)
+            return {"assessment_id": tag}
+        return run
+
+    async def scenario():
+        results = await asyncio.gather(
+            coalescer.run("same", pipeline("first")),
+            coalescer.run("same", pipeline("second")),
+            coalescer.run("other", pipeline("third")),
+        )
+        assert [r[0]["assessment_id"] for r in results] == ["first", "first", "third"]
+        assert sorted(r[1] for r in results) == [False, False, True]
+        assert coalescer.inflight() == 0
+        again, joined = await coalescer.run("same", pipeline("fourth"))
+        assert again["assessment_id"] == "fourth" and not joined
+
+    asyncio.run(scenario())
+    assert sorted(calls) == ["first", "fourth", "third"]
+
+
+def test_joined_calls_get_the_leaders_exception():
+    coalescer = InflightCoalescer()
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("whisper failed")
+
+    async def scenario():
+        return await asyncio.gather(coalescer.run("k", failing), coalescer.run("k", failing), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert coalescer.inflight() == 0
+
+
+if __name__ == "__main__":
+    test_fingerprint_ignores_paths_and_names_but_not_content_or_scores()
+    test_identical_calls_in_flight_share_one_run()
+    test_joined_calls_get_the_leaders_exception()
+    print("✅ Coalescing tests passed")
@@ -7,12 +7,17 @@ when AI services are unavailable.
 import os
 import sys
 import json
+import tempfile
+import threading
+import time
 from pathlib import Path
 
 # Add the current directory to the path so we can import AiAgent
 sys.path.insert(0, os.path.dirname(__file__))
 
+import AiAgent
 from AiAgent import run_pipeline
+from template_report import TemplateReportGenerator
 
 def test_fallback_functionality():
     """Test the AI pipeline with fallback mechanisms"""
@@ -42,6 +47,7 @@ def test_fallback_functionality():
     try:
         # Run the pipeline
         result = run_pipeline(
+            scores={"stroop_colour": 30, "memory_game": 33, "image_recall": 1},
             audio_path=audio_files,
             offline_sentiment=True  # Use offline sentiment to avoid additional API calls
         )
@@ -86,6 +92,65 @@ def test_fallback_functionality():
         print(f"Error type: {type(e).__name__}")
         return False
 
+def test_llm_stage_overrunning_its_deadline_falls_back_to_the_template():
+    """A stage that overruns the LLM deadline is abandoned and the template fills the outputs it did not produce."""
+    release = threading.Event()
+    calls = []
+
+    class SlowSummaryAgents:
+        def __init__(self, agents_cfg, search_tool):
+            pass
+
+        def generate_doctor_report(self, scores, disclaimer):
+            calls.append("doctor")
+            return "LLM doctor report"
+
+        def generate_summary(self, doctor_report, disclaimer):
+            calls.append("summary")
+            release.wait(10)  # overruns the deadline until the test lets it go
+            return "late LLM summary"
+
+        def generate_email(self, summary_text, disclaimer):
+            calls.append("email")
+            return "LLM email"
+
+    bundle = {"stroop_colour": 30, "memory_game": 33, "image_recall": 1, "speech_metrics": [], "sentiment": []}
+    patched = {
+        (AiAgent.ScoreCollector, "collect_scores"): staticmethod(lambda scores, **kwargs: dict(bundle)),
+        (AiAgent.SearchToolManager, "initialize_search_tool"): staticmethod(lambda: None),
+        (AiAgent, "AIAgentManager"): SlowSummaryAgents,
+    }
+    originals = {key: key[0].__dict__[key[1]] for key in patched}
+    original_output_dir = AiAgent.OUTPUT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        for (owner, name), value in patched.items():
+            setattr(owner, name, value)
+        AiAgent.OUTPUT_DIR = tmp
+        try:
+            started = time.monotonic()
+            result = run_pipeline(scores={"stroop_colour": 30, "memory_game": 33, "image_recall": 1}, audio_path=[], llm_deadline=0.5, lazy_pdf=True)
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+            for (owner, name), value in originals.items():
+                setattr(owner, name, value)
+            AiAgent.OUTPUT_DIR = original_output_dir
+
+        assert elapsed < 5, f"pipeline waited {elapsed:.1f}s for an abandoned stage"
+        assert calls == ["doctor", "summary"]
+        assert result["fallback_mode"] is True and result["ai_service_status"] == "timeout"
+        disclaimer = AiAgent.ConfigManager.get_agents_config().get("disclaimer_line", "")
+        assert result["doctor_report"] == "LLM doctor report"
+        assert result["summary"] == TemplateReportGenerator.generate_summary(result["scores"], disclaimer)
+        assert result["email"] == TemplateReportGenerator.generate_email(result["scores"], disclaimer)
+        with open(result["summary_path"], encoding="utf-8") as f:
+            assert f.read() == result["summary"]
+        stored = AiAgent.AssessmentStore.for_output_dir(tmp).get(result["assessment_id"])
+        assert stored["fallback_mode"] is True and os.path.dirname(result["pdf_path"]) == tmp
+
+
 if __name__ == "__main__":
+    test_llm_stage_overrunning_its_deadline_falls_back_to_the_template()
+    print("✅ LLM deadline fallback test passed")
     success = test_fallback_functionality()
     sys.exit(0 if success else 1)
\ No newline at end of file
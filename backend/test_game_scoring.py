@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for server-side game scoring from raw trials (game_scoring.GameScorer) and MemoryGameScore.Marks.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from game_scoring import GameScorer
+from MemoryGameScore import Marks
+
+STROOP_SESSION = {"trials": [
+    {"word": "RED", "ink": "RED", "response": "RED", "rt_ms": 500},
+    {"word": "RED", "ink": "BLUE", "response": "BLUE", "rt_ms": 800},
+    {"word": "GREEN", "ink": "BLUE", "response": "GREEN", "rt_ms": 700},
+    {"word": "BLUE", "ink": "BLUE", "response": "BLUE", "rt_ms": 600},
+]}
+
+
+def test_stroop_accuracy_and_interference():
+    result = GameScorer.score_stroop([STROOP_SESSION])[0]
+    assert result["correct"] == 3
+    assert result["score"] == 30
+    assert result["congruent_accuracy"] == 1.0
+    assert result["incongruent_accuracy"] == 0.5
+    assert result["congruent_median_rt_ms"] == 550.0
+    assert result["interference_cost_ms"] == 250.0
+    assert result["median_rt_ms"] == 600.0
+
+
+def test_batch_matches_individual_sessions():
+    columnar = {"word": ["red", "red"], "ink": ["red", "blue"], "response": ["red", "blue"], "rt_ms": [400, 900]}
+    batch = GameScorer.score_stroop([STROOP_SESSION, columnar, []])
+    assert batch[0] == GameScorer.score_stroop([STROOP_SESSION])[0]
+    assert batch[1] == GameScorer.score_stroop([columnar])[0]
+    assert batch[2]["trials"] == 0 and batch[2]["accuracy"] is None
+
+
+def test_memory_credits_repeated_targets():
+    result = GameScorer.score_memory([[
+        {"target": [1, 2, 3], "response": [1, 2, 3]},
+        {"target": ["apple", "apple", "pear"], "response": ["apple", "pear", "pear", "apple"]},
+    ]])[0]
+    assert result["levels_completed"] == 1
+    assert result["span"] == 3
+    assert result["items_correct"] == 6
+    assert result["intrusions"] == 1
+
+
+def test_image_recall_signal_detection():
+    result = GameScorer.score_image_recall([[
+        {"study": [1, 2, 3, 4, 5], "options": [1, 2, 3, 4, 5, 6, 7], "selected": [1, 2, 6]},
+        {"study": [1, 2], "selected": [1, 2]},
+    ]])[0]
+    assert result["score"] == 3
+    assert result["hits"] == 4
+    assert result["false_alarms"] == 1
+    assert result["false_alarm_rate"] == 0.5
+
+
+def test_marks_counts_each_target_occurrence_once():
+    marks = Marks(["cat", "dog", "cat"], ["Cat", "cat", "cat", "bird"])
+    marks.add_score()
+    marks.add_score()
+    assert marks.return_score() == 2
+    assert Marks.credit_batch([(["word"], ["word"]), ([], ["x"])]) == [1, 0]
+
+
+def test_session_overrides_frontend_scores():
+    metrics, overrides = GameScorer.score_session({"stroop": STROOP_SESSION})
+    assert overrides == {"stroop_colour": 30}
+    assert set(metrics) == {"stroop"}
+
+
+if __name__ == "__main__":
+    test_stroop_accuracy_and_interference()
+    test_batch_matches_individual_sessions()
+    test_memory_credits_repeated_targets()
+    test_image_recall_signal_detection()
+    test_marks_counts_each_target_occurrence_once()
+    test_session_overrides_frontend_scores()
+    print("✅ Game scoring tests passed")
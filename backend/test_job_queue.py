@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite job queue and the inference worker: leases, reclaiming, retries and results.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import inference_worker
+from inference_worker import InferenceWorker
+from job_queue import CANCELLED, DONE, FAILED, QUEUED, JobFailed, JobQueue
+
+
+def test_jobs_are_claimed_once_and_results_written_back():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "jobs.db")
+        api = JobQueue(db)
+        ids = [api.enqueue("assessment", {"n": i}, request_id=f"req-{i}") for i in range(20)]
+        claimed = []
+        lock = threading.Lock()
+
+        def drain(worker_id):
+            queue = JobQueue(db)  # one connection per worker, as in separate processes
+            while True:
+                job = queue.claim(worker_id, visibility_timeout=30)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job.id)
+                queue.complete(job.id, worker_id, {"n": job.payload["n"] * 2})
+
+        threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(claimed) == sorted(ids)
+        assert api.wait(ids[3], timeout=1) == {"n": 6}
+        assert api.counts() == {DONE: 20}
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"), max_attempts=2)
+        job_id = queue.enqueue("assessment", {})
+        first = queue.claim("dead-worker", visibility_timeout=0.05)
+        assert queue.claim("w2", visibility_timeout=30) is None
+        time.sleep(0.1)
+        second = queue.claim("w2", visibility_timeout=30)
+        assert second.id == first.id and second.attempts == 2
+        assert not queue.complete(job_id, "dead-worker", {"stale": True})
+        assert not queue.heartbeat(job_id, "dead-worker", 30)
+        assert queue.complete(job_id, "w2", {"ok": True})
+        assert queue.get(job_id).result == {"ok": True}
+
+
+def test_failed_attempts_back_off_then_fail_for_good():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"), max_attempts=2)
+        job_id = queue.enqueue("assessment", {})
+        queue.claim("w", 30)
+        assert queue.fail(job_id, "w", "RuntimeError: boom", base_delay=0.05) == QUEUED
+        assert queue.claim("w", 30) is None  # still backing off
+        time.sleep(0.1)
+        queue.claim("w", 30)
+        assert queue.fail(job_id, "w", "RuntimeError: boom again") == FAILED
+        try:
+            queue.wait(job_id, timeout=1)
+            raise AssertionError("wait should raise for a failed job")
+        except JobFailed as e:
+            assert "boom again" in str(e)
+        assert queue.purge_finished(0) == 1
+
+
+def test_worker_runs_handlers_and_records_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"), max_attempts=1)
+        handlers = dict(inference_worker.JOB_HANDLERS)
+        inference_worker.JOB_HANDLERS["double"] = lambda payload: {"value": payload["value"] * 2}
+        inference_worker.JOB_HANDLERS["broken"] = lambda payload: 1 / 0
+        try:
+            ok = queue.enqueue("double", {"value": 21})
+            bad = queue.enqueue("broken", {})
+            worker = InferenceWorker(queue, worker_id="test", visibility_timeout=30)
+            assert worker.run_once() and worker.run_once() and not worker.run_once()
+        finally:
+            inference_worker.JOB_HANDLERS.clear()
+            inference_worker.JOB_HANDLERS.update(handlers)
+        assert queue.get(ok).result == {"value": 42}
+        assert queue.get(bad).status == FAILED and "ZeroDivisionError" in queue.get(bad).error
+
+
+def test_timed_out_wait_cancels_the_job():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        queued = queue.enqueue("assessment", {})
+        running = queue.enqueue("assessment", {})
+        try:
+            queue.wait(queued, timeout=0.1, poll_interval=0.02)
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+        assert queue.get(queued).status == CANCELLED
+        assert queue.claim("w1", visibility_timeout=30).id == running
+        try:
+            queue.wait(running, timeout=0.1, poll_interval=0.02)
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+        # The worker's next heartbeat fails, so it stops the run and cannot write a result.
+        assert queue.get(running).status == CANCELLED
+        assert not queue.heartbeat(running, "w1", 30) and not queue.complete(running, "w1", {})
+        assert queue.claim("w2", visibility_timeout=30) is None
+
+
+if __name__ == "__main__":
+    test_jobs_are_claimed_once_and_results_written_back()
+    test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish()
+    test_failed_attempts_back_off_then_fail_for_good()
+    test_worker_runs_handlers_and_records_errors()
+    test_timed_out_wait_cancels_the_job()
+    print("✅ Job queue tests passed")
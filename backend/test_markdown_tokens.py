@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the markdown token stream the report renderers consume: blocks, inline bold and character normalisation.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from markdown_tokens import MarkdownTokenizer
+
+
+def stream(text):
+    return [(block.kind, block.spans, block.level, block.marker) for block in MarkdownTokenizer.tokenize(text)]
+
+
+def test_headings():
+    assert stream("# Summary\n## Risk **High**\n### Next steps  ") == [
+        ("heading", [("Summary", False)], 1, ""),
+        ("heading", [("Risk ", False), ("High", True)], 2, ""),
+        ("heading", [("Next steps", False)], 3, ""),
+    ]
+    # Deeper levels and a missing space are not headings.
+    assert stream("#### Four\n#Tight") == [
+        ("paragraph", [("#### Four", False)], 0, ""),
+        ("paragraph", [("#Tight", False)], 0, ""),
+    ]
+
+
+def test_bullets_checkboxes_and_numbers():
+    assert stream("- one\n* **two**\n[ ] open\n[X] done\n3. third\n\n-not a bullet") == [
+        ("bullet", [("one", False)], 0, ""),
+        ("bullet", [("two", True)], 0, ""),
+        ("checkbox", [("open", False)], 0, "[ ]"),
+        ("checkbox", [("done", False)], 0, "[x]"),
+        ("numbered", [("third", False)], 0, "3."),
+        ("blank", [], 0, ""),
+        ("paragraph", [("-not a bullet", False)], 0, ""),
+    ]
+    # Unicode bullets and checkboxes become markdown before the block is matched.
+    assert stream("• from unicode\n☐ todo\n✓ ticked") == [
+        ("bullet", [("from unicode", False)], 0, ""),
+        ("checkbox", [("todo", False)], 0, "[ ]"),
+        ("checkbox", [("ticked", False)], 0, "[x]"),
+    ]
+    blocks = MarkdownTokenizer.tokenize("- **Risk:** low")
+    assert blocks[0].text == "Risk: low" and blocks[0].has_bold
+
+
+def test_inline_bold_italic_and_code():
+    parse = MarkdownTokenizer.parse_inline
+    assert parse("score **72** of **100**.") == [("score ", False), ("72", True), (" of ", False), ("100", True), (".", False)]
+    assert parse("an *aside* and `code`") == [("an ", False), ("aside", False), (" and ", False), ("code", False)]
+    assert parse("plain") == [("plain", False)] and parse("") == []
+    # Empty markers produce no span at all.
+    assert parse("a****b") == [("a", False), ("b", False)]
+
+
+def test_unclosed_bold_is_not_bold():
+    parse = MarkdownTokenizer.parse_inline
+    assert parse("a **b") == [("a ", False), ("b", False)]
+    assert parse("**a** and **b") == [("a", True), (" and ", False), ("b", False)]
+    assert parse("**") == [] and parse("*") == [("*", False)]
+    assert not MarkdownTokenizer.tokenize("**unclosed heading")[0].has_bold
+
+
+def test_characters_outside_the_translate_table():
+    normalize = MarkdownTokenizer.normalize
+    assert normalize("“q” ‘a’ – — … → ← ↑ ↓") == "\"q\" 'a' - - ... -> <- ^ v"
+    # Latin-1 passes through; anything else fpdf's core fonts cannot encode is dropped.
+    assert normalize("café ñ £ ×") == "café ñ £ ×"
+    assert normalize("€5 中文 😀 ☃") == "5   "
+    assert MarkdownTokenizer.plain_text("**Risk:** low — ok ☃") == "Risk: low - ok "
+    assert stream("Emoji 😀 only") == [("paragraph", [("Emoji  only", False)], 0, "")]
+    # The result is always encodable in the PDF's latin-1 core fonts.
+    sample = "".join(chr(c) for c in range(0, 0x3000, 7))
+    normalize(sample).encode("latin-1")
+
+
+if __name__ == "__main__":
+    test_headings()
+    test_bullets_checkboxes_and_numbers()
+    test_inline_bold_italic_and_code()
+    test_unclosed_bold_is_not_bold()
+    test_characters_outside_the_translate_table()
+    print("✅ Markdown token tests passed")
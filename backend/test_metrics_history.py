@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-user metrics history and its trend statistics, on a temporary database.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from metrics_history import MetricsHistory, TrendCalculator
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_history(tmp):
+    history = MetricsHistory(os.path.join(tmp, "metrics_history.db"))
+    entries = []
+    for day in range(6):
+        bundle = {"stroop_colour": 100 + 20 * day, "memory_game": 5, "speech_metrics": []}
+        if day % 2:
+            bundle["speech_metrics"] = [{"Pause density (%)": 30 - day}, {}]
+        entries.append(("alice", f"a{day}", bundle, START + timedelta(days=day)))
+    entries.append(("bob", "b0", {"stroop_colour": 1}, START))
+    history.append_many(entries)
+    return history
+
+
+def test_trends_are_per_user_and_ordered():
+    with tempfile.TemporaryDirectory() as tmp:
+        trends = make_history(tmp).trends("alice", window=2, include_series=True)
+        stroop = trends["metrics"]["stroop_colour"]
+        assert trends["points"] == 6
+        assert trends["assessment_ids"] == [f"a{d}" for d in range(6)]
+        assert stroop["latest"] == 200
+        assert stroop["delta_previous"] == 20
+        assert stroop["delta_first"] == 100
+        assert stroop["slope_per_day"] == 20
+        assert stroop["rolling_average"][-1] == 190
+
+
+def test_missing_values_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        trends = make_history(tmp).trends("alice")
+        pause = trends["metrics"]["pause_density"]
+        assert pause["count"] == 3
+        assert pause["latest"] == 25
+        assert pause["delta_previous"] == -2
+        assert "image_recall" not in trends["metrics"]
+
+
+def test_limit_keeps_newest_points():
+    with tempfile.TemporaryDirectory() as tmp:
+        trends = make_history(tmp).trends("alice", limit=2)
+        assert trends["points"] == 2
+        assert trends["metrics"]["stroop_colour"]["delta_first"] == 20
+
+
+def test_rolling_mean_matches_naive_computation():
+    values = np.array([[1.0, np.nan], [2.0, 4.0], [np.nan, 6.0], [4.0, np.nan], [5.0, 10.0]])
+    rolling = TrendCalculator.rolling_mean(values, ~np.isnan(values), 2)
+    for i in range(len(values)):
+        window = values[max(0, i - 1):i + 1]
+        for j in range(values.shape[1]):
+            column = window[:, j][~np.isnan(window[:, j])]
+            expected = column.mean() if len(column) else np.nan
+            assert np.isclose(rolling[i, j], expected, equal_nan=True)
+
+
+def test_points_in_the_same_second_keep_their_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = MetricsHistory(os.path.join(tmp, "metrics_history.db"))
+        for i in range(5):
+            history.append("carol", f"c{i}", {"stroop_colour": 10 * i}, START + timedelta(microseconds=i))
+        trends = history.trends("carol", window=2, include_series=True)
+        assert trends["assessment_ids"] == [f"c{i}" for i in range(5)]
+        assert trends["metrics"]["stroop_colour"]["delta_previous"] == 10
+        assert trends["metrics"]["stroop_colour"]["rolling_average"][-1] == 35
+        _, ids, _ = history.series("carol", limit=2)
+        assert ids == ["c3", "c4"]
+
+
+if __name__ == "__main__":
+    test_trends_are_per_user_and_ordered()
+    test_missing_values_are_skipped()
+    test_limit_keeps_newest_points()
+    test_points_in_the_same_second_keep_their_order()
+    test_rolling_mean_matches_naive_computation()
+    print("✅ Metrics history tests passed")
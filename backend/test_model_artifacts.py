@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for model artifact manifests: checksums, cached verification, cache locations and missing models.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model_artifacts
+from model_artifacts import ArtifactError, load_sentiment, load_whisper, verify_manifest, write_manifest
+
+
+def make_artifact(root):
+    os.makedirs(os.path.join(root, "tokenizer"))
+    with open(os.path.join(root, "model.safetensors"), "wb") as f:
+        f.write(os.urandom(4096))
+    with open(os.path.join(root, "tokenizer", "vocab.txt"), "w") as f:
+        f.write("hello\nworld\n")
+    return write_manifest(os.path.join(root, "manifest.json"), ["model.safetensors", "tokenizer/vocab.txt"], source="test")
+
+
+def expect_artifact_error(func, *args):
+    try:
+        func(*args)
+    except ArtifactError as e:
+        return str(e)
+    assert False, "expected ArtifactError"
+
+
+def test_manifest_detects_missing_resized_and_corrupted_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = make_artifact(tmp)
+        assert set(manifest["files"]) == {"model.safetensors", "tokenizer/vocab.txt"}
+        manifest_path = os.path.join(tmp, "manifest.json")
+        verify_manifest(manifest_path, always_hash=True)
+
+        weights = os.path.join(tmp, "model.safetensors")
+        with open(weights, "r+b") as f:
+            first = f.read(1)
+            f.seek(0)
+            f.write(bytes([first[0] ^ 0xFF]))
+        assert "SHA-256" in expect_artifact_error(verify_manifest, manifest_path)
+
+        with open(weights, "ab") as f:
+            f.write(b"x")
+        assert "bytes, expected 4096" in expect_artifact_error(verify_manifest, manifest_path)
+
+        os.remove(weights)
+        assert "missing" in expect_artifact_error(verify_manifest, manifest_path)
+        assert "No readable manifest" in expect_artifact_error(verify_manifest, os.path.join(tmp, "nope.json"))
+
+
+def test_unchanged_files_are_not_hashed_again():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_artifact(tmp)
+        manifest_path = os.path.join(tmp, "manifest.json")
+        hashed = []
+        original = model_artifacts.file_sha256
+        model_artifacts.file_sha256 = lambda path: hashed.append(os.path.basename(path)) or original(path)
+        try:
+            verify_manifest(manifest_path)
+            assert hashed == []  # write_manifest stamped them
+            verify_manifest(manifest_path, always_hash=True)
+            assert sorted(hashed) == ["model.safetensors", "vocab.txt"]
+            hashed.clear()
+            vocab = os.path.join(tmp, "tokenizer", "vocab.txt")
+            with open(vocab, "w") as f:
+                f.write("hellO\nworld\n")
+            os.utime(vocab, ns=(1, 1))
+            expect_artifact_error(verify_manifest, manifest_path)
+            assert hashed == ["vocab.txt"]
+        finally:
+            model_artifacts.file_sha256 = original
+
+
+def test_cache_locations_follow_env_and_platform():
+    saved_env = {k: os.environ.get(k) for k in ("MODELS_DIR", "WHISPER_MODEL_DIR", "SENTIMENT_MODEL_DIR", "XDG_CACHE_HOME", "LOCALAPPDATA")}
+    saved_platform = sys.platform
+    try:
+        for key in saved_env:
+            os.environ.pop(key, None)
+        sys.platform = "linux"
+        os.environ["XDG_CACHE_HOME"] = "/cache"
+        assert model_artifacts.whisper_dir() == os.path.join("/cache", "foreknow", "models", "whisper")
+        sys.platform = "win32"
+        os.environ["LOCALAPPDATA"] = "C:\\Users\\me\\AppData\\Local"
+        assert model_artifacts.models_dir() == os.path.join("C:\\Users\\me\\AppData\\Local", "ForeKnow", "models")
+        os.environ["MODELS_DIR"] = "/srv/models"
+        os.environ["SENTIMENT_MODEL_DIR"] = "/mnt/sentiment"
+        assert model_artifacts.whisper_dir() == os.path.join("/srv/models", "whisper")
+        assert model_artifacts.sentiment_dir() == "/mnt/sentiment"
+    finally:
+        sys.platform = saved_platform
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_missing_models_raise_without_downloading():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert "python -m model_artifacts fetch" in expect_artifact_error(load_whisper, tmp, "small", "cpu")
+        assert "python -m model_artifacts fetch" in expect_artifact_error(load_sentiment, tmp, "org/model", "cpu")
+        assert os.listdir(tmp) == []
+        with open(os.path.join(tmp, "small.manifest.json"), "w") as f:
+            json.dump({"files": {"small.safetensors": {"sha256": "0" * 64, "size": 1}}}, f)
+        assert "missing" in expect_artifact_error(load_whisper, tmp, "small", "cpu")
+
+
+if __name__ == "__main__":
+    test_manifest_detects_missing_resized_and_corrupted_files()
+    test_unchanged_files_are_not_hashed_again()
+    test_cache_locations_follow_env_and_platform()
+    test_missing_models_raise_without_downloading()
+    print("✅ Model artifact tests passed")
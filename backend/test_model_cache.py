@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-budgeted model cache and per-stage RSS telemetry, with NumPy arrays standing in for models.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import telemetry
+from model_cache import ModelCache, estimate_model_bytes
+from telemetry import span
+
+MB = 1024 * 1024
+
+
+def loader(size_mb, calls):
+    def load():
+        calls.append(size_mb)
+        return np.ones(size_mb * MB // 8)
+    return load
+
+
+def test_models_load_once_and_evict_least_recently_used():
+    cache = ModelCache(budget_bytes=10 * MB)
+    calls = []
+    a = cache.get_or_load("a", loader(4, calls))
+    cache.get_or_load("b", loader(4, calls))
+    assert cache.get_or_load("a", loader(4, calls)) is a
+    cache.get_or_load("c", loader(4, calls))
+    assert [entry["model"] for entry in cache.stats()] == ["a", "c"]
+    assert cache.total_bytes() == 8 * MB
+    assert calls == [4, 4, 4]
+
+
+def test_oversized_model_is_kept_alone():
+    cache = ModelCache(budget_bytes=2 * MB)
+    calls = []
+    cache.get_or_load("small", loader(1, calls))
+    cache.get_or_load("big", loader(3, calls))
+    assert [entry["model"] for entry in cache.stats()] == ["big"]
+
+
+def test_uncacheable_results_and_concurrent_loads():
+    cache = ModelCache()
+    fallback = cache.get_or_load("sentiment", lambda: (None, None), cache_if=lambda loaded: loaded[1] is not None)
+    assert fallback == (None, None) and cache.stats() == []
+    calls = []
+    threads = [threading.Thread(target=cache.get_or_load, args=("shared", loader(1, calls))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert estimate_model_bytes((None, np.zeros(4))) == 32
+
+
+def test_spans_record_peak_rss():
+    before = telemetry.STAGE_PEAK_RSS.snapshot(stage="test_alloc")
+    with span("test_alloc"):
+        block = np.ones(64 * MB // 8)
+        time.sleep(0.2)  # longer than the sampling interval, then freed before the span ends
+        del block
+    cumulative, total, count = telemetry.STAGE_PEAK_RSS.snapshot(stage="test_alloc")
+    assert count == (before[2] if before else 0) + 1
+    growth = telemetry.STAGE_RSS_GROWTH.snapshot(stage="test_alloc")
+    assert growth[1] >= 32 * MB
+
+
+if __name__ == "__main__":
+    test_models_load_once_and_evict_least_recently_used()
+    test_oversized_model_is_kept_alone()
+    test_uncacheable_results_and_concurrent_loads()
+    test_spans_record_peak_rss()
+    print("✅ Model cache tests passed")
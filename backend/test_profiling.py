@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for opt-in request profiling: folded-stack sampling, cProfile capture across threads and triggers.
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import profiling
+import telemetry
+from profiling import ProfileSession, RequestProfiler
+
+
+def busy_stage(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return "done"
+
+
+def pipeline(executor):
+    busy_stage()
+    return executor.submit(telemetry.bind(profiling.follow(busy_stage))).result()
+
+
+def test_profile_covers_pipeline_and_followed_threads():
+    session = ProfileSession(mode="deterministic", interval=0.001)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert session.run(pipeline, executor) == "done"
+    assert profiling.active() is None
+    folded = "\n".join(session.stacks)
+    assert "pipeline;" in folded and "llm-stage;" in folded
+    assert any(stack.endswith(f"busy_stage ({os.path.basename(__file__)}:{busy_stage.__code__.co_firstlineno})") for stack in session.stacks)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = session.write(tmp, "20260101_000000")
+        assert set(paths) == {"profile_folded", "profile_pstats", "profile_report"}
+        with open(paths["profile_folded"], encoding="utf-8") as f:
+            line = f.readline().rstrip("\n")
+        assert int(line.rsplit(" ", 1)[1]) >= 1
+        calls = {func[2]: stat[0] for func, stat in pstats.Stats(paths["profile_pstats"]).stats.items()}
+        assert calls["busy_stage"] == 2
+
+
+def test_sampling_mode_writes_folded_stacks_only():
+    session = ProfileSession(mode="sampling", interval=0.001)
+    session.run(busy_stage)
+    with tempfile.TemporaryDirectory() as tmp:
+        assert set(session.write(tmp, "20260101_000000")) == {"profile_folded"}
+    assert session.samples > 0
+
+
+def test_requests_need_the_token_or_the_sample_rate():
+    os.environ["PROFILE_TOKEN"] = "secret"
+    os.environ["PROFILE_SAMPLE_RATE"] = "0"
+    try:
+        assert RequestProfiler.for_request({"X-Profile-Token": "secret"}).trigger == "header"
+        assert RequestProfiler.for_request({"X-Profile-Token": "guess"}) is None
+        assert RequestProfiler.for_request({}) is None
+        os.environ["PROFILE_TOKEN"] = ""
+        assert RequestProfiler.for_request({"X-Profile-Token": ""}) is None
+        os.environ["PROFILE_SAMPLE_RATE"] = "1"
+        assert RequestProfiler.for_request({}).trigger == "sampled"
+    finally:
+        os.environ.pop("PROFILE_TOKEN", None)
+        os.environ.pop("PROFILE_SAMPLE_RATE", None)
+
+
+if __name__ == "__main__":
+    test_profile_covers_pipeline_and_followed_threads()
+    test_sampling_mode_writes_folded_stacks_only()
+    test_requests_need_the_token_or_the_sample_rate()
+    print("✅ Profiling tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for report downloads: safe names, ETag revalidation, byte ranges and cache headers.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from report_http import CACHE_CONTROL, PRIVATE_CACHE_CONTROL, ReportFileResponder
+
+
+BODY = bytes(range(256)) * 4
+
+
+def make_client(output_dir):
+    """The /api/reports route of main.py, minus lazy rendering; `path` lets `../` reach resolve."""
+    app = FastAPI()
+
+    @app.get("/reports/{filename:path}")
+    def get_report(filename: str, request: Request):
+        path = ReportFileResponder.resolve(output_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return JSONResponse(status_code=404, content={"detail": "File not found"})
+        return ReportFileResponder.respond(request, path, filename)
+
+    @app.get("/profiles/{filename}")
+    def get_profile(filename: str, request: Request):
+        return ReportFileResponder.respond(request, os.path.join(output_dir, filename), filename, cache_control=PRIVATE_CACHE_CONTROL)
+
+    return TestClient(app)
+
+
+def test_etag_revalidation_returns_304():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "report.pdf"), "wb") as f:
+            f.write(BODY)
+        client = make_client(tmp)
+        first = client.get("/reports/report.pdf")
+        assert first.status_code == 200 and first.content == BODY
+        assert first.headers["cache-control"] == CACHE_CONTROL and first.headers["accept-ranges"] == "bytes"
+        assert first.headers["content-disposition"] == 'attachment; filename="report.pdf"'
+        etag = first.headers["etag"]
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            cached = client.get("/reports/report.pdf", headers={"If-None-Match": header})
+            assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+        assert client.get("/reports/report.pdf", headers={"If-None-Match": '"other"'}).status_code == 200
+        # If-None-Match takes precedence over If-Modified-Since.
+        stale = client.get("/reports/report.pdf", headers={"If-None-Match": '"other"', "If-Modified-Since": first.headers["last-modified"]})
+        assert stale.status_code == 200
+        assert client.get("/reports/report.pdf", headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+
+        with open(os.path.join(tmp, "report.pdf"), "ab") as f:
+            f.write(b"more")
+        os.utime(os.path.join(tmp, "report.pdf"), ns=(0, 10 ** 9))
+        changed = client.get("/reports/report.pdf", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_byte_ranges():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "report.pdf"), "wb") as f:
+            f.write(BODY)
+        client = make_client(tmp)
+        size = len(BODY)
+
+        part = client.get("/reports/report.pdf", headers={"Range": "bytes=10-19"})
+        assert part.status_code == 206 and part.content == BODY[10:20]
+        assert part.headers["content-range"] == f"bytes 10-19/{size}" and part.headers["content-length"] == "10"
+
+        open_ended = client.get("/reports/report.pdf", headers={"Range": f"bytes={size - 5}-"})
+        assert open_ended.status_code == 206 and open_ended.content == BODY[-5:]
+        clamped = client.get("/reports/report.pdf", headers={"Range": f"bytes={size - 2}-{size + 100}"})
+        assert clamped.content == BODY[-2:] and clamped.headers["content-range"] == f"bytes {size - 2}-{size - 1}/{size}"
+
+        suffix = client.get("/reports/report.pdf", headers={"Range": "bytes=-100"})
+        assert suffix.status_code == 206 and suffix.content == BODY[-100:]
+        assert suffix.headers["content-range"] == f"bytes {size - 100}-{size - 1}/{size}"
+        whole = client.get("/reports/report.pdf", headers={"Range": f"bytes=-{size * 2}"})
+        assert whole.status_code == 206 and whole.content == BODY
+
+        for header in (f"bytes={size}-", f"bytes={size + 10}-{size + 20}", "bytes=20-10"):
+            unsatisfiable = client.get("/reports/report.pdf", headers={"Range": header})
+            assert unsatisfiable.status_code == 416, header
+            assert unsatisfiable.headers["content-range"] == f"bytes */{size}"
+
+        # Ranges this responder does not handle fall back to the whole file.
+        for header in ("bytes=0-1,5-6", "items=0-1", "bytes=-"):
+            full = client.get("/reports/report.pdf", headers={"Range": header})
+            assert full.status_code == 200 and full.content == BODY, header
+        # A range for a different version of the file is ignored.
+        stale = client.get("/reports/report.pdf", headers={"Range": "bytes=0-1", "If-Range": '"old"'})
+        assert stale.status_code == 200 and stale.content == BODY
+        current = client.get("/reports/report.pdf", headers={"Range": "bytes=0-1", "If-Range": part.headers["etag"]})
+        assert current.status_code == 206 and current.content == BODY[:2]
+
+
+def test_paths_outside_the_output_directory_are_refused():
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = os.path.join(tmp, "output")
+        os.makedirs(os.path.join(output_dir, "sub"))
+        for path in (os.path.join(tmp, "secret.pdf"), os.path.join(output_dir, "sub", "nested.pdf"), os.path.join(output_dir, "report.pdf")):
+            with open(path, "wb") as f:
+                f.write(BODY)
+        client = make_client(output_dir)
+
+        for name in ("../secret.pdf", "..%2Fsecret.pdf", "sub/nested.pdf", "..pdf", ".hidden.pdf", "report.txt"):
+            assert client.get(f"/reports/{name}").status_code == 404, name
+        for name in ("../secret.pdf", "sub/../report.pdf", "/etc/passwd.pdf", "report.pdf/..", "..\\secret.pdf"):
+            assert ReportFileResponder.resolve(output_dir, name) is None, name
+        assert ReportFileResponder.resolve(output_dir, "report.pdf") == os.path.join(os.path.realpath(output_dir), "report.pdf")
+        assert client.get("/reports/report.pdf").status_code == 200
+
+
+def test_private_artifacts_are_not_stored_by_shared_caches():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "profile.json"), "wb") as f:
+            f.write(b"{}")
+        client = make_client(tmp)
+        response = client.get("/profiles/profile.json")
+        assert response.status_code == 200 and response.headers["cache-control"] == PRIVATE_CACHE_CONTROL
+        cached = client.get("/profiles/profile.json", headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304 and cached.headers["cache-control"] == PRIVATE_CACHE_CONTROL
+
+
+if __name__ == "__main__":
+    test_etag_revalidation_returns_304()
+    test_byte_ranges()
+    test_paths_outside_the_output_directory_are_refused()
+    test_private_artifacts_are_not_stored_by_shared_caches()
+    print("✅ Report download tests passed")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the API response models: field selection, transcript trimming and JSON/gzip encoding.
+"""
+
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import response_models
+from response_models import (
+    GZIP_MIN_BYTES, ScoreSummary, SpeechAssessmentResponse, SubmitTestsResponse,
+    dump_model, json_response, parse_fields,
+)
+
+
+BUNDLE = {
+    "stroop_colour": 80,
+    "memory_game": 70,
+    "speech_metrics": [{"Pause density (%)": 12.5}],
+    "sentiment": [{"label": "neutral", "weighted_score": 50.0, "mode": "online", "raw": [0.1, 0.9]}],
+    "combined_sentiment": {"label": "neutral", "weighted_score": 50.0},
+    "transcribed_text": "the quick brown fox",
+    "transcriptions": [{"file": "q1.webm", "text": "the quick brown fox"}],
+}
+
+
+def make_request(accept_encoding=None):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def expect_http_error(func, *args):
+    try:
+        func(*args)
+    except HTTPException as e:
+        return e
+    assert False, "expected HTTPException"
+
+
+def test_parse_fields_validates_the_selection():
+    assert parse_fields(SubmitTestsResponse, None) is None and parse_fields(SubmitTestsResponse, "") is None
+    assert parse_fields(SubmitTestsResponse, " assessment_id, cognitive_risk ,,") == {"assessment_id", "cognitive_risk"}
+    error = expect_http_error(parse_fields, SubmitTestsResponse, "assessment_id,password,zzz")
+    assert error.status_code == 400 and error.detail == "Unknown fields: ['password', 'zzz']"
+    # Nested fields cannot be selected, and each model has its own fields.
+    assert expect_http_error(parse_fields, SubmitTestsResponse, "cognitive_risk.category").status_code == 400
+    assert expect_http_error(parse_fields, SpeechAssessmentResponse, "summary_report").status_code == 400
+
+
+def test_dump_model_includes_and_trims_transcripts():
+    response = SpeechAssessmentResponse(assessment_id="20260101_000000", summary="ok", scores=ScoreSummary.from_bundle(BUNDLE), audio_file="a.webm")
+    data = dump_model(response)
+    assert set(data) == {"assessment_id", "summary", "scores", "audio_file"}
+    assert "transcriptions" not in data["scores"] and "transcribed_text" not in data["scores"]
+    assert data["scores"]["sentiment"] == [{"label": "neutral", "weighted_score": 50.0, "mode": "online"}]
+    assert data["scores"]["image_recall"] == 0 and data["scores"]["combined_sentiment"]["mode"] is None
+
+    assert dump_model(response, include={"assessment_id", "audio_file"}) == {"assessment_id": "20260101_000000", "audio_file": "a.webm"}
+    assert set(dump_model(response, include={"scores"})["scores"]) == set(data["scores"])
+
+    with_transcripts = dump_model(SpeechAssessmentResponse(scores=ScoreSummary.from_bundle(BUNDLE, include_transcripts=True)))
+    assert with_transcripts["scores"]["transcribed_text"] == "the quick brown fox"
+    assert with_transcripts["scores"]["transcriptions"] == BUNDLE["transcriptions"]
+    # Requested but empty transcripts are kept, unlike ones that were never requested.
+    empty = dump_model(SpeechAssessmentResponse(scores=ScoreSummary.from_bundle({}, include_transcripts=True)))
+    assert empty["scores"]["transcriptions"] == [] and empty["scores"]["transcribed_text"] == ""
+    assert dump_model(SpeechAssessmentResponse())["scores"] is None
+
+
+def test_json_response_gzips_large_bodies_for_clients_that_accept_it():
+    small = {"status": "ok"}
+    response = json_response(make_request("gzip, br"), small)
+    assert json.loads(response.body) == small and "content-encoding" not in response.headers
+    assert response.media_type == "application/json" and response.headers["vary"] == "Accept-Encoding"
+
+    large = {"rows": [{"id": i, "label": "neutral"} for i in range(200)]}
+    plain = json_response(make_request(), large)
+    assert len(plain.body) >= GZIP_MIN_BYTES and "content-encoding" not in plain.headers
+    assert "content-encoding" not in json_response(make_request("br, deflate"), large).headers
+
+    compressed = json_response(make_request("gzip, deflate"), large)
+    assert compressed.headers["content-encoding"] == "gzip" and compressed.headers["vary"] == "Accept-Encoding"
+    assert int(compressed.headers["content-length"]) == len(compressed.body) < len(plain.body)
+    assert json.loads(gzip.decompress(compressed.body)) == large
+
+
+def test_json_encoding_with_and_without_orjson():
+    payload = {"text": "naïve café", "score": 72.5, "none": None, "nested": [1, {"a": True}]}
+    if response_models.orjson is not None:
+        import numpy as np
+        assert json.loads(response_models.dumps({"p": np.float32(0.5), "v": np.arange(3)})) == {"p": 0.5, "v": [0, 1, 2]}
+        assert json.loads(response_models.dumps(payload)) == payload
+
+    original = response_models.orjson
+    response_models.orjson = None
+    try:
+        body = json_response(make_request(), payload).body
+    finally:
+        response_models.orjson = original
+    # The stdlib fallback is just as compact and writes UTF-8 rather than \u escapes.
+    assert body == '{"text":"naïve café","score":72.5,"none":null,"nested":[1,{"a":true}]}'.encode("utf-8")
+
+
+if __name__ == "__main__":
+    test_parse_fields_validates_the_selection()
+    test_dump_model_includes_and_trims_transcripts()
+    test_json_response_gzips_large_bodies_for_clients_that_accept_it()
+    test_json_encoding_with_and_without_orjson()
+    print("✅ Response model tests passed")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the deterministic cognitive risk model (risk_scoring.RiskModel).
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from config_manager import ConfigManager
+from risk_scoring import RiskModel
+
+
+def load_config():
+    return copy.deepcopy(ConfigManager.get_risk_model_config())
+
+
+def bundle(stroop, memory, recall, pause_density=None, sentiment=None):
+    data = {"stroop_colour": stroop, "memory_game": memory, "image_recall": recall, "speech_metrics": [], "combined_sentiment": {}}
+    if pause_density is not None:
+        data["speech_metrics"] = [{"Pause density (%)": pause_density}, {}, {"Pause density (%)": pause_density}]
+    if sentiment is not None:
+        data["combined_sentiment"] = {"label": "neutral", "weighted_score": sentiment}
+    return data
+
+
+def test_lower_scores_mean_higher_risk():
+    model = RiskModel(load_config())
+    strong, weak = model.score_batch([bundle(320, 9, 45), bundle(80, 1, 5)])
+    assert strong["probability"] < weak["probability"]
+    assert strong["category"] == "Low"
+    assert weak["category"] == "Elevated"
+    assert strong["model_version"] == model.version
+
+
+def test_batch_matches_single_scoring():
+    model = RiskModel(load_config())
+    records = [bundle(s, m, r, p, e) for s, m, r, p, e in [(250, 6, 30, 20, 50), (120, 3, 10, 45, 30), (300, 8, 40, None, None)]]
+    batch = model.score_batch(records, explain=True)
+    assert batch == [model.score(r) for r in records]
+
+
+def test_missing_features_contribute_nothing():
+    model = RiskModel(load_config())
+    result = model.score({"stroop_colour": 250})
+    assert set(result["contributions"]) == {"stroop_colour"}
+    assert result["contributions"]["stroop_colour"] == 0.0
+
+
+def test_speech_metrics_are_averaged_over_filled_answers():
+    model = RiskModel(load_config())
+    matrix = model.feature_matrix([bundle(250, 6, 30, pause_density=35)])
+    assert matrix[0, model.feature_names.index("pause_density")] == 35
+
+
+def test_thresholds_are_configurable_and_validated():
+    config = load_config()
+    config["thresholds"] = [{"max_probability": 1.0, "category": "Any"}]
+    assert RiskModel(config).score(bundle(80, 1, 5))["category"] == "Any"
+
+    bad_thresholds = load_config()
+    bad_thresholds["thresholds"] = [{"max_probability": 0.5, "category": "Low"}]
+    bad_feature = load_config()
+    bad_feature["features"]["unknown_metric"] = {"reference": 0, "scale": 1, "weight": 1}
+    for bad in (bad_thresholds, bad_feature):
+        try:
+            RiskModel(bad)
+        except ValueError:
+            continue
+        raise AssertionError("invalid risk model config was accepted")
+
+
+if __name__ == "__main__":
+    test_lower_scores_mean_higher_risk()
+    test_batch_matches_single_scoring()
+    test_missing_features_contribute_nothing()
+    test_speech_metrics_are_averaged_over_filled_answers()
+    test_thresholds_are_configurable_and_validated()
+    print("✅ Risk scoring tests passed")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the search result cache, using a local stub instead of SerperDevTool.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_cache import SearchResultCache, CachedSearch, SEARCH_LIMIT_MESSAGE
+
+
+class StubSearchTool:
+    name = "Search the internet"
+    description = "Stub search tool"
+
+    def __init__(self):
+        self.queries = []
+
+    def run(self, search_query: str):
+        self.queries.append(search_query)
+        return {"organic": [{"title": f"Result for {search_query}"}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_near_identical_queries_share_cache_entry():
+    stub = StubSearchTool()
+    search = CachedSearch(stub, SearchResultCache())
+    first = search.run("Cognitive decline, speech pauses")
+    second = search.run("  cognitive DECLINE,\tspeech   pauses ")
+    assert first == second
+    assert len(stub.queries) == 1
+
+
+def test_reordered_or_repunctuated_queries_are_distinct():
+    assert SearchResultCache.normalize_query("men bite dogs") != SearchResultCache.normalize_query("dogs bite men")
+    assert SearchResultCache.normalize_query(" Men  BITE dogs\n") == "men bite dogs"
+    stub = StubSearchTool()
+    search = CachedSearch(stub, SearchResultCache())
+    search.run("men bite dogs")
+    search.run("dogs bite men")
+    search.run("men bite dogs?")
+    search.run("dogs  bite MEN")
+    assert stub.queries == ["men bite dogs", "dogs bite men", "men bite dogs?"]
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    stub = StubSearchTool()
+    search = CachedSearch(stub, SearchResultCache(ttl_seconds=10, clock=clock))
+    search.run("memory recall")
+    clock.now = 11
+    search.run("memory recall")
+    assert len(stub.queries) == 2
+
+
+def test_cache_is_size_bounded():
+    cache = SearchResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_stage_call_limit():
+    stub = StubSearchTool()
+    shared = CachedSearch(stub, SearchResultCache(), max_calls=1)
+    stage = shared.for_stage()
+    stage.run("stroop interference")
+    assert stage.run("lexical diversity") == SEARCH_LIMIT_MESSAGE
+    assert stage.run("stroop interference") != SEARCH_LIMIT_MESSAGE
+    assert shared.for_stage().run("lexical diversity") != SEARCH_LIMIT_MESSAGE
+    assert len(stub.queries) == 2
+
+
+if __name__ == "__main__":
+    test_near_identical_queries_share_cache_entry()
+    test_reordered_or_repunctuated_queries_are_distinct()
+    test_entries_expire_after_ttl()
+    test_cache_is_size_bounded()
+    test_stage_call_limit()
+    print("✅ Search cache tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the preload-then-fork launcher: per-worker thread budgets and shared vs private memory of forked workers.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from memory_stats import memory_breakdown
+from serve import threads_per_worker
+
+MB = 1024 * 1024
+
+
+def test_workers_split_the_cores():
+    assert threads_per_worker(4, cpus=16) == 4
+    assert threads_per_worker(3, cpus=8) == 2
+    assert threads_per_worker(8, cpus=4) == 1
+    os.environ["TORCH_THREADS_PER_WORKER"] = "3"
+    try:
+        assert threads_per_worker(4, cpus=16) == 3
+    finally:
+        os.environ.pop("TORCH_THREADS_PER_WORKER")
+
+
+def test_forked_worker_shares_preloaded_pages_until_it_writes():
+    if not hasattr(os, "fork") or memory_breakdown() is None:
+        return
+    weights = np.ones(64 * MB // 8)  # stands in for weights loaded by the master
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        float(weights.sum())
+        before = memory_breakdown()
+        weights[: 32 * MB // 8] = 2.0
+        after = memory_breakdown()
+        os.write(write_fd, json.dumps([before, after]).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        before, after = json.loads(f.read())
+    os.waitpid(pid, 0)
+    assert before["shared"] >= 60 * MB
+    assert after["private"] - before["private"] >= 30 * MB
+    assert after["shared"] <= before["shared"] - 30 * MB
+
+
+if __name__ == "__main__":
+    test_workers_split_the_cores()
+    test_forked_worker_shares_preloaded_pages_until_it_writes()
+    print("✅ Launcher tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the queue-backed structured logger: JSON fields, correlation ids, payload caps and drops.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from structured_logging import LOG_RECORDS_DROPPED, LogPipeline, cap, correlation, get_logger
+
+
+def capture(level="INFO", **kwargs):
+    stream = io.StringIO()
+    LogPipeline.configure(level=level, fmt="json", stream=stream, **kwargs)
+    return stream
+
+
+def records(stream):
+    LogPipeline.shutdown()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_carry_fields_and_correlation_ids():
+    stream = capture()
+    log = get_logger("test")
+    with correlation(request_id="req-1"):
+        log.info("Scored", extra={"count": 3})
+        with correlation(assessment_id="20260101_000000"):
+            log.warning("Slow stage")
+    log.info("Outside")
+    first, second, third = records(stream)
+    assert first["msg"] == "Scored" and first["count"] == 3 and first["request_id"] == "req-1"
+    assert "assessment_id" not in first
+    assert second["level"] == "WARNING" and second["assessment_id"] == "20260101_000000"
+    assert "request_id" not in third
+
+
+def test_large_payloads_are_capped_and_snapshotted():
+    stream = capture()
+    payload = {"transcript": "word " * 2000}
+    get_logger("test").info("Payload", extra={"scores": payload})
+    payload["transcript"] = "mutated"
+    entry = records(stream)[0]
+    assert entry["scores"].startswith('{"transcript": "word word')
+    assert entry["scores"].endswith("chars]")
+    assert cap("x" * 10, limit=4) == "xxxx...[+6 chars]"
+
+
+def test_debug_payloads_are_skipped_below_level():
+    stream = capture(level="INFO")
+    get_logger("test").debug("Doctor prompt", extra={"scores": {"a": 1}})
+    assert records(stream) == []
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+
+    class BlockedStream(io.StringIO):
+        def write(self, text):
+            release.wait(5)
+            return super().write(text)
+
+    LogPipeline.configure(level="INFO", fmt="json", stream=BlockedStream(), queue_size=2)
+    before = LOG_RECORDS_DROPPED.value()
+    log = get_logger("test")
+    for i in range(20):
+        log.info("Flood", extra={"i": i})
+    dropped = LOG_RECORDS_DROPPED.value() - before
+    release.set()
+    LogPipeline.shutdown()
+    assert dropped >= 17
+
+
+if __name__ == "__main__":
+    test_records_carry_fields_and_correlation_ids()
+    test_large_payloads_are_capped_and_snapshotted()
+    test_debug_payloads_are_skipped_below_level()
+    test_full_queue_drops_instead_of_blocking()
+    print("✅ Structured logging tests passed")
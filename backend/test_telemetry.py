@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for timing spans, the Prometheus text rendering and the per-request Server-Timing breakdown.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import telemetry
+from retry_manager import RetryManager
+from telemetry import MetricsRegistry, span
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage='say "hi"')
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{stage="say \\"hi\\"",le="1.0"} 3' in text
+    assert 'demo_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{stage="say \\"hi\\""} 4' in text
+    assert latency.snapshot(stage='say "hi"')[0] == [2, 3, 4]
+
+
+def timed(stage):
+    with span(stage):
+        pass
+
+
+def test_spans_feed_request_breakdown_across_threads():
+    timings, token = telemetry.begin_request()
+    try:
+        timed("transcribe")
+        timed("transcribe")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(telemetry.bind(timed), "llm_doctor").result()
+            executor.submit(timed, "untracked").result()
+    finally:
+        telemetry.end_request(token)
+    breakdown = timings.breakdown()
+    assert breakdown["transcribe"][1] == 2
+    assert breakdown["llm_doctor"][1] == 1
+    assert "untracked" not in breakdown
+    header = timings.server_timing(0.25)
+    assert header.startswith('transcribe;desc="x2";dur=')
+    assert header.endswith("total;dur=250.0")
+    assert telemetry.current_timings() is None
+
+
+def test_retries_are_counted_and_timed_per_attempt():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("transient")
+        return "ok"
+
+    before = telemetry.STAGE_RETRIES.value(stage="test_stage")
+    assert RetryManager.retry_with_backoff(flaky, max_retries=3, base_delay=0, max_delay=0, stage="test_stage") == "ok"
+    assert telemetry.STAGE_RETRIES.value(stage="test_stage") - before == 2
+    assert telemetry.STAGE_SECONDS.snapshot(stage="test_stage_attempt", outcome="error")[2] == 2
+    assert telemetry.STAGE_SECONDS.snapshot(stage="test_stage_attempt", outcome="ok")[2] == 1
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_spans_feed_request_breakdown_across_threads()
+    test_retries_are_counted_and_timed_per_attempt()
+    print("✅ Telemetry tests passed")
@@ -0,0 +1,163 @@
+import re
+from typing import Dict, List, Optional
+
+from fpdf import FPDF
+
+from markdown_tokens import Span
+
+
+LONG_WORD_LIMIT = 50
+_PIECE_RE = re.compile(r"\S+|\s+")
+
+
+class TextLayout:
+	"""Greedy single-pass line breaker using per-font glyph width tables (1/1000 em units)."""
+
+	_width_tables: Dict[str, Dict[str, int]] = {}
+
+	@staticmethod
+	def _width_table(pdf: FPDF) -> Optional[Dict[str, int]]:
+		font = pdf.current_font
+		cw = font.get("cw") if isinstance(font, dict) else getattr(font, "cw", None)
+		if not isinstance(cw, dict) or pdf.font_stretching != 100 or pdf.char_spacing != 0:
+			return None
+		fontkey = font.get("fontkey") if isinstance(font, dict) else getattr(font, "fontkey", None)
+		key = fontkey or pdf.font_family + pdf.font_style
+		table = TextLayout._width_tables.get(key)
+		if table is None:
+			table = TextLayout._width_tables.setdefault(key, dict(cw))
+		return table
+
+	@staticmethod
+	def _word_units(table: Dict[str, int], word: str) -> int:
+		try:
+			return sum(table[c] for c in word)
+		except KeyError:
+			return sum(table.get(c, table.get("?", 500)) for c in word)
+
+	@staticmethod
+	def break_lines(pdf: FPDF, text: str, max_width: float) -> List[str]:
+		"""Split text into lines no wider than max_width, matching the word-by-word greedy rule
+		(a word always starts a line, words over LONG_WORD_LIMIT chars are cut into chunks)."""
+		words = text.split()
+		if not words:
+			return []
+		table = TextLayout._width_table(pdf)
+		if table is not None:
+			scale = pdf.font_size_pt * 0.001
+			k = pdf.k
+			space_units = table.get(" ", 0)
+
+			def width_of(units: int) -> float:
+				return units * scale / k
+
+			def units_of(word: str) -> int:
+				return TextLayout._word_units(table, word)
+		else:
+			space_units = pdf.get_string_width(" ")
+
+			def width_of(units: float) -> float:
+				return units
+
+			def units_of(word: str) -> float:
+				return pdf.get_string_width(word)
+
+		lines: List[str] = []
+		current: List[str] = []
+		current_units = 0
+
+		def place(word: str) -> None:
+			nonlocal current, current_units
+			word_units = units_of(word)
+			if not current:
+				current = [word]
+				current_units = word_units
+				return
+			test_units = current_units + space_units + word_units
+			if width_of(test_units) <= max_width:
+				current.append(word)
+				current_units = test_units
+			else:
+				lines.append(" ".join(current))
+				current = [word]
+				current_units = word_units
+
+		for word in words:
+			while len(word) > LONG_WORD_LIMIT:
+				place(word[:LONG_WORD_LIMIT])
+				word = word[LONG_WORD_LIMIT:]
+			place(word)
+		if current:
+			lines.append(" ".join(current))
+		return lines
+
+	@staticmethod
+	def break_spans(pdf: FPDF, spans: List[Span], max_width: float) -> List[List[Span]]:
+		"""break_lines for mixed regular/bold runs; each line is returned as merged (text, bold) runs."""
+		family, style, size = pdf.font_family, pdf.font_style, pdf.font_size_pt
+		tables: Dict[bool, Optional[Dict[str, int]]] = {}
+		for bold in {b for _, b in spans}:
+			pdf.set_font(family, style.replace("B", "") + ("B" if bold else ""), size)
+			tables[bold] = TextLayout._width_table(pdf)
+		pdf.set_font(family, style, size)
+		if any(table is None for table in tables.values()):
+			text = "".join(t for t, _ in spans)
+			return [[(line, False)] for line in TextLayout.break_lines(pdf, text, max_width)]
+
+		words: List[List[Span]] = []
+		word: List[Span] = []
+		for text, bold in spans:
+			for piece in _PIECE_RE.findall(text):
+				if piece.isspace():
+					if word:
+						words.append(word)
+						word = []
+				else:
+					word.append((piece, bold))
+		if word:
+			words.append(word)
+
+		scale = size * 0.001 / pdf.k
+		lines: List[List[List[Span]]] = []
+		current: List[List[Span]] = []
+		current_units = 0
+
+		def place(word: List[Span]) -> None:
+			nonlocal current, current_units
+			word_units = sum(TextLayout._word_units(tables[bold], text) for text, bold in word)
+			if not current:
+				current = [word]
+				current_units = word_units
+				return
+			test_units = current_units + tables[word[0][1]].get(" ", 0) + word_units
+			if test_units * scale <= max_width:
+				current.append(word)
+				current_units = test_units
+			else:
+				lines.append(current)
+				current = [word]
+				current_units = word_units
+
+		for word in words:
+			if len(word) == 1:
+				text, bold = word[0]
+				while len(text) > LONG_WORD_LIMIT:
+					place([(text[:LONG_WORD_LIMIT], bold)])
+					text = text[LONG_WORD_LIMIT:]
+				word = [(text, bold)]
+			place(word)
+		if current:
+			lines.append(current)
+
+		merged_lines: List[List[Span]] = []
+		for line_words in lines:
+			runs: List[Span] = []
+			for i, line_word in enumerate(line_words):
+				fragments = ([(" ", line_word[0][1])] if i else []) + line_word
+				for text, bold in fragments:
+					if runs and runs[-1][1] == bold:
+						runs[-1] = (runs[-1][0] + text, bold)
+					else:
+						runs.append((text, bold))
+			merged_lines.append(runs)
+		return merged_lines
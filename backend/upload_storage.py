@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile
+
+from structured_logging import get_logger
+from telemetry import span
+
+
+CHUNK_SIZE = 256 * 1024
+FINISHED_MARKER = ".finished"
+_EXTENSION_RE = re.compile(r"^\.[A-Za-z0-9]{1,5}$")
+
+log = get_logger("uploads")
+
+
+class SavedUpload:
+	def __init__(self, field: str, original_name: str, path: str, size: int, sha256: str):
+		self.field = field
+		self.original_name = original_name
+		self.path = path
+		self.size = size
+		self.sha256 = sha256
+
+
+class UploadStorage:
+	"""Per-submission upload directories with streamed, size-limited, hashed writes."""
+
+	def __init__(self, root: str, max_bytes: int, finished_ttl_seconds: float, abandoned_ttl_seconds: float):
+		self.root = root
+		self.max_bytes = max_bytes
+		self.finished_ttl_seconds = finished_ttl_seconds
+		self.abandoned_ttl_seconds = abandoned_ttl_seconds
+		os.makedirs(root, exist_ok=True)
+
+	def new_submission(self) -> str:
+		submission_dir = os.path.join(self.root, uuid.uuid4().hex)
+		os.makedirs(submission_dir)
+		return submission_dir
+
+	@staticmethod
+	def _target_name(field: str, original_name: str) -> str:
+		ext = os.path.splitext(original_name or "")[1].lower()
+		return field + (ext if _EXTENSION_RE.match(ext) else "")
+
+	async def save(self, submission_dir: str, field: str, upload: UploadFile) -> SavedUpload:
+		"""Stream the upload to disk in chunks, hashing as it goes; 413 once max_bytes is exceeded."""
+		path = os.path.join(submission_dir, self._target_name(field, upload.filename or ""))
+		digest = hashlib.sha256()
+		size = 0
+		try:
+			async with await anyio.open_file(path, "wb") as out:
+				while True:
+					chunk = await upload.read(CHUNK_SIZE)
+					if not chunk:
+						break
+					size += len(chunk)
+					if size > self.max_bytes:
+						raise HTTPException(status_code=413, detail=f"{field} exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit")
+					digest.update(chunk)
+					await out.write(chunk)
+		except BaseException:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			raise
+		return SavedUpload(field, upload.filename or "", path, size, digest.hexdigest())
+
+	async def save_all(self, uploads: Dict[str, Optional[UploadFile]]) -> List[SavedUpload]:
+		submission_dir = self.new_submission()
+		saved: List[SavedUpload] = []
+		try:
+			with span("upload_save"):
+				for field, upload in uploads.items():
+					if upload is not None and upload.filename:
+						saved.append(await self.save(submission_dir, field, upload))
+		except BaseException:
+			self.discard(submission_dir)
+			raise
+		if not saved:
+			self.discard(submission_dir)
+		return saved
+
+	@staticmethod
+	def submission_dir_of(saved: List[SavedUpload]) -> Optional[str]:
+		return os.path.dirname(saved[0].path) if saved else None
+
+	@staticmethod
+	def mark_finished(submission_dir: Optional[str]) -> None:
+		if submission_dir and os.path.isdir(submission_dir):
+			with open(os.path.join(submission_dir, FINISHED_MARKER), "w", encoding="utf-8") as f:
+				f.write(str(time.time()))
+
+	@staticmethod
+	def discard(submission_dir: Optional[str]) -> None:
+		if submission_dir:
+			shutil.rmtree(submission_dir, ignore_errors=True)
+
+	def cleanup_expired(self) -> int:
+		"""Remove finished submissions after finished_ttl and unfinished ones after abandoned_ttl."""
+		now = time.time()
+		removed = 0
+		for name in os.listdir(self.root):
+			submission_dir = os.path.join(self.root, name)
+			if not os.path.isdir(submission_dir):
+				continue
+			marker = os.path.join(submission_dir, FINISHED_MARKER)
+			try:
+				if os.path.exists(marker):
+					expired = now - os.path.getmtime(marker) > self.finished_ttl_seconds
+				else:
+					expired = now - os.path.getmtime(submission_dir) > self.abandoned_ttl_seconds
+			except OSError:
+				continue
+			if expired:
+				shutil.rmtree(submission_dir, ignore_errors=True)
+				removed += 1
+		if removed:
+			log.info("Removed expired submissions", extra={"count": removed})
+		return removed
@@ -20,6 +20,9 @@ const authOptions = {
     },
     async session({ session, token }) {
       session.accessToken = token.accessToken
+      if (session.user && token.sub) {
+        session.user.id = token.sub
+      }
       return session
     },
   },
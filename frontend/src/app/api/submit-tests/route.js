@@ -84,6 +84,12 @@ export async function POST(request) {
         "image_recall_score",
         submissionData.image_recall_score.toString()
       );
+      // Lets the backend keep a per-user metrics history. Only the id from the verified session is
+      // sent, never anything from the form, so nobody can write into another user's history.
+      const userId = session.user?.id;
+      if (userId) {
+        backendFormData.append("user_id", userId);
+      }
 
       // Add audio files if they exist
       for (const [key, audioData] of Object.entries(
@@ -0,0 +1,38 @@
+import { NextResponse } from "next/server";
+import { getAuthSession } from "@/lib/auth";
+
+// The signed-in user's own metric trends. The backend only answers callers holding TRENDS_TOKEN,
+// so the user id always comes from the verified session, never from the request.
+export async function GET(request) {
+  const session = await getAuthSession();
+  const userId = session?.user?.id;
+  if (!userId) {
+    return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  const query = new URLSearchParams();
+  for (const key of ["limit", "window", "since", "metrics", "include_series"]) {
+    if (searchParams.has(key)) {
+      query.set(key, searchParams.get(key));
+    }
+  }
+
+  try {
+    const backendResponse = await fetch(
+      `http://127.0.0.1:8000/api/users/${encodeURIComponent(userId)}/trends?${query}`,
+      {
+        headers: { "X-Trends-Token": process.env.TRENDS_TOKEN || "" },
+        cache: "no-store",
+      }
+    );
+    const body = await backendResponse.json();
+    return NextResponse.json(body, { status: backendResponse.status });
+  } catch (error) {
+    console.error("Trends request failed:", error.message);
+    return NextResponse.json(
+      { error: "Failed to load trends", message: error.message },
+      { status: 502 }
+    );
+  }
+}
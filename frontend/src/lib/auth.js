@@ -22,6 +22,10 @@ const authOptions = {
     },
     async session({ session, token }) {
       session.accessToken = token.accessToken;
+      // The provider's stable account id, verified by NextAuth; used as the backend history key.
+      if (session.user && token.sub) {
+        session.user.id = token.sub;
+      }
       return session;
     },
   },